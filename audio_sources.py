@@ -0,0 +1,336 @@
+"""
+Fuentes de audio intercambiables
+
+- DeviceSource: sounddevice.InputStream (captura real, p. ej. loopback)
+- FileSource:   reproduce un WAV (o un array) por bloques a ritmo real o
+                acelerado; sirve para benchmarks y pruebas en Linux sin
+                dispositivo de audio
+- StdinSource:  PCM crudo por la entrada estándar (p. ej. desde ffmpeg o
+                parec en un servidor de captura)
+
+Las tres llaman al mismo callback con la firma de sounddevice,
+callback(indata, frames, time, status), así audio_callback y
+audio_stream_callback no distinguen de dónde viene el audio.
+"""
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from resampler import resample
+
+
+class ReplayStatus:
+    """Equivalente a sounddevice.CallbackFlags para la reproducción de archivos"""
+
+    def __init__(self, input_overflow=False):
+        self.input_overflow = input_overflow
+
+    def __bool__(self):
+        return self.input_overflow
+
+    def __str__(self):
+        return "input overflow" if self.input_overflow else ""
+
+
+def read_audio(path):
+    """Leer un archivo de audio: (float32 (n, canales), frecuencia)"""
+    try:
+        import soundfile as sf
+    except ImportError:
+        sf = None
+    if sf is not None:
+        data, sample_rate = sf.read(path, dtype='float32', always_2d=True)
+        return data, sample_rate
+
+    # Sin soundfile: WAV PCM con la biblioteca estándar
+    import wave
+
+    with wave.open(path, 'rb') as wav:
+        width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        data = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 2**15
+    elif width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        ints = (bytes_[:, 0].astype(np.int32) | (bytes_[:, 1].astype(np.int32) << 8) |
+                (bytes_[:, 2].astype(np.int32) << 16))
+        data = (np.where(ints >= 2**23, ints - 2**24, ints)).astype(np.float32) / 2**23
+    elif width == 4:
+        data = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2**31
+    else:
+        raise ValueError(f"WAV de {8 * width} bits no soportado sin soundfile")
+    return data.reshape(-1, channels), sample_rate
+
+
+PCM_FORMATS = {'s16le': ('<i2', 2**15), 's32le': ('<i4', 2**31), 'f32le': ('<f4', 1.0)}
+
+# Dispositivos preferidos para capturar el audio del sistema (orden de preferencia)
+DEVICE_PRIORITIES = [
+    "Microsoft Sound Mapper",
+    "Primary Sound Capture",
+    "Mezcla estéreo",
+    "Stereo Mix"
+]
+
+
+def best_input_device():
+    """Encontrar el mejor dispositivo para capturar audio del sistema"""
+    import sounddevice as sd
+
+    devices = sd.query_devices()
+    for priority in DEVICE_PRIORITIES:
+        for i, device in enumerate(devices):
+            if (device['max_input_channels'] > 0 and
+                    priority.lower() in device['name'].lower()):
+                print(f"✅ Dispositivo seleccionado: ID {i} - {device['name']}")
+                return i
+
+    # Si no encuentra ninguno, usar el primero disponible
+    for i, device in enumerate(devices):
+        if device['max_input_channels'] > 0:
+            print(f"⚠️ Usando dispositivo por defecto: ID {i} - {device['name']}")
+            return i
+
+    raise Exception("No se encontró ningún dispositivo de entrada de audio")
+
+
+class DeviceSource:
+    """Captura desde un dispositivo con sounddevice"""
+
+    def __init__(self, callback, samplerate, channels=1, blocksize=1024, device=None):
+        self.callback = callback
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.device = device
+        self.finished = threading.Event()  # Un dispositivo no se termina solo: solo al cerrar
+        self._stream = None
+
+    def start(self):
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            device=self.device,
+            channels=self.channels,
+            samplerate=self.samplerate,
+            dtype='float32',
+            blocksize=self.blocksize,
+            callback=self.callback
+        )
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self.finished.set()
+
+    @property
+    def active(self):
+        return self._stream is not None and self._stream.active
+
+
+class FileSource:
+    """Reproduce audio por bloques llamando al callback como lo haría PortAudio
+
+    speed=1 respeta el tiempo real, speed=4 va cuatro veces más rápido y
+    speed=0 entrega tan rápido como el callback lo permite. A ritmo real, si
+    el hilo se atrasa más de max_lag_blocks se descartan bloques (como un
+    overflow de entrada) y el siguiente callback recibe status.input_overflow.
+    """
+
+    def __init__(self, audio, callback, samplerate, channels=1, blocksize=1024,
+                 speed=1.0, loop=False, max_lag_blocks=4):
+        if isinstance(audio, str):
+            data, file_rate = read_audio(audio)
+            self.name = audio
+        else:
+            data, file_rate = np.asarray(audio, dtype=np.float32), samplerate
+            self.name = "array"
+        if data.ndim == 1:
+            data = data[:, None]
+        if file_rate != samplerate:
+            data = np.stack([resample(data[:, c], file_rate, samplerate) for c in range(data.shape[1])], axis=1)
+        # Ajustar canales: duplicar mono o quedarse con los primeros
+        if data.shape[1] < channels:
+            data = np.repeat(data[:, :1], channels, axis=1)
+        self.data = np.ascontiguousarray(data[:, :channels], dtype=np.float32)
+
+        self.callback = callback
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.speed = speed
+        self.loop = loop
+        self.max_lag_blocks = max_lag_blocks
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.blocks = 0
+        self.dropped_blocks = 0
+        self.slow_callbacks = 0
+
+    @property
+    def duration(self):
+        return len(self.data) / self.samplerate
+
+    def start(self):
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        block_seconds = self.blocksize / self.samplerate
+        period = block_seconds / self.speed if self.speed > 0 else 0.0
+        n_blocks = (len(self.data) + self.blocksize - 1) // self.blocksize
+        t0 = time.perf_counter()
+        index = 0
+        overflow = False
+        try:
+            while not self._stop.is_set():
+                if index >= n_blocks:
+                    if not self.loop:
+                        break
+                    index, t0 = 0, time.perf_counter()
+
+                due = t0 + index * period
+                now = time.perf_counter()
+                if period:
+                    if now < due:
+                        time.sleep(due - now)
+                    elif now - due > self.max_lag_blocks * period:
+                        # El consumidor no da abasto: perder bloques como haría el dispositivo
+                        behind = int((now - due) / period)
+                        self.dropped_blocks += behind
+                        index += behind
+                        overflow = True
+                        continue
+
+                block = self.data[index * self.blocksize:(index + 1) * self.blocksize]
+                adc_time = time.perf_counter()
+                time_info = SimpleNamespace(inputBufferAdcTime=adc_time, currentTime=adc_time,
+                                            outputBufferDacTime=0.0)
+                self.callback(block, len(block), time_info, ReplayStatus(overflow))
+                overflow = False
+                self.blocks += 1
+                if period and time.perf_counter() - adc_time > block_seconds:
+                    self.slow_callbacks += 1
+                index += 1
+        finally:
+            self.finished.set()
+
+    def wait(self, timeout=None):
+        """Esperar a que termine la reproducción"""
+        return self.finished.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2)
+
+    def close(self):
+        self.stop()
+
+    @property
+    def active(self):
+        return self._thread is not None and not self.finished.is_set()
+
+
+class StdinSource:
+    """PCM crudo entrelazado (s16le, s32le o f32le) leído de un flujo binario
+
+    Entrega bloques a medida que llegan; el ritmo lo marca el productor. Al
+    llegar al fin del flujo se activa `finished`.
+    """
+
+    def __init__(self, callback, samplerate, channels=1, blocksize=1024, pcm_format='s16le', stream=None):
+        if pcm_format not in PCM_FORMATS:
+            raise ValueError(f"Formato PCM desconocido: '{pcm_format}' (disponibles: {', '.join(PCM_FORMATS)})")
+        self.dtype, self.scale = PCM_FORMATS[pcm_format]
+        self.callback = callback
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.blocks = 0
+
+    @property
+    def frame_bytes(self):
+        return np.dtype(self.dtype).itemsize * self.channels
+
+    def start(self):
+        self._stop.clear()
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        block_bytes = self.blocksize * self.frame_bytes
+        pending = b""
+        try:
+            while not self._stop.is_set():
+                chunk = self.stream.read(block_bytes - len(pending))
+                if not chunk:
+                    break
+                pending += chunk
+                if len(pending) < block_bytes:
+                    continue
+                self._deliver(pending)
+                pending = b""
+            # Último bloque incompleto (descartando un frame a medias)
+            usable = len(pending) - len(pending) % self.frame_bytes
+            if usable and not self._stop.is_set():
+                self._deliver(pending[:usable])
+        except Exception as e:
+            print(f"Error leyendo audio de la entrada estándar: {e}")
+        finally:
+            self.finished.set()
+
+    def _deliver(self, raw):
+        block = np.frombuffer(raw, dtype=self.dtype).astype(np.float32).reshape(-1, self.channels)
+        if self.scale != 1.0:
+            block /= self.scale
+        now = time.perf_counter()
+        time_info = SimpleNamespace(inputBufferAdcTime=now, currentTime=now, outputBufferDacTime=0.0)
+        self.callback(block, len(block), time_info, ReplayStatus())
+        self.blocks += 1
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def stop(self):
+        # Una lectura bloqueada no se interrumpe: el hilo es daemon y termina con el proceso
+        self._stop.set()
+
+    def close(self):
+        self.stop()
+
+    @property
+    def active(self):
+        return self._thread is not None and not self.finished.is_set()
+
+
+def create_source(spec, callback, samplerate, channels=1, blocksize=1024, device=None, speed=1.0,
+                  pcm_format='s16le'):
+    """'device' (o None) → DeviceSource; '-' → StdinSource; una ruta de archivo → FileSource"""
+    if spec in (None, 'device'):
+        return DeviceSource(callback, samplerate, channels, blocksize, device)
+    if spec == '-':
+        return StdinSource(callback, samplerate, channels, blocksize, pcm_format=pcm_format)
+    return FileSource(spec, callback, samplerate, channels, blocksize, speed=speed)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Audio capturado en disco, por segmentos mapeados en memoria
+
+El buffer circular solo guarda en RAM el horizonte de re-decodificación.
+Para ir más atrás (re-decodificar un tramo ya sobrescrito, reproducir o
+exportar lo capturado) el pipeline vuelca el audio a disco:
+
+- AudioStore añade el audio a archivos de tamaño fijo (segment_seconds) en
+  int16 o float32, con las mismas posiciones absolutas de muestra que
+  AudioRingBuffer (y que 'start'/'end' de los segmentos de session_store)
+- views(inicio, fin) devuelve vistas np.memmap sin copia sobre los
+  archivos; read() las convierte a float32 como el buffer circular
+- Ningún segmento queda mapeado entre lecturas: el audio vive en la caché
+  de páginas del sistema y la memoria residente no crece con la duración.
+  Los segmentos más antiguos que retention_seconds se borran
+- Cada escritura va directo al archivo: tras una caída el audio sigue en
+  disco hasta la siguiente sesión (reset() al arrancar la borra)
+
+Exportar un tramo a WAV desde la línea de comandos (segundos desde el
+inicio de la captura):
+  python audio_store.py sessions/audio/audio
+  python audio_store.py sessions/audio/audio --start 60 --end 90 --output tramo.wav
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import wave
+
+import numpy as np
+
+import config
+from ring_buffer import BufferOverrun
+
+INT16_SCALE = 32768.0
+SILENCE_BLOCK = 1 << 16  # Muestras de silencio por escritura al rellenar un hueco
+
+
+class AudioStore:
+    """Audio mono en segmentos de disco con posiciones absolutas de muestra (un escritor, varios lectores)"""
+
+    def __init__(self, path, sample_rate=config.SAMPLE_RATE, dtype=None, segment_seconds=None,
+                 retention_seconds=None):
+        opts = config.SPILL_CONFIG
+        self.path = path
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype or opts['dtype'])
+        if self.dtype not in (np.dtype(np.int16), np.dtype(np.float32)):
+            raise ValueError(f"Formato de audio en disco no soportado: {self.dtype}")
+        segment_seconds = opts['segment_seconds'] if segment_seconds is None else segment_seconds
+        retention_seconds = opts['retention_seconds'] if retention_seconds is None else retention_seconds
+        self.segment_samples = int(segment_seconds * sample_rate)
+        self.retention = int(retention_seconds * sample_rate)
+        self._file = None  # Segmento en escritura: (índice, archivo abierto)
+        self.first_segment = 0
+        self.write_pos = 0
+
+    @classmethod
+    def open(cls, path):
+        """Abrir para lectura un almacén ya escrito (p. ej. tras una caída)"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        store = cls(path, meta['sample_rate'], meta['dtype'])
+        store.segment_samples = meta['segment_samples']
+        indices = store._segments()
+        if indices:
+            store.first_segment = indices[0]
+            last = indices[-1]
+            store.write_pos = last * store.segment_samples + \
+                os.path.getsize(store._segment_path(last)) // store.dtype.itemsize
+        return store
+
+    @property
+    def oldest_pos(self):
+        """Primera posición absoluta todavía en disco"""
+        return min(self.first_segment * self.segment_samples, self.write_pos)
+
+    @property
+    def seconds(self):
+        return (self.write_pos - self.oldest_pos) / self.sample_rate
+
+    @property
+    def disk_bytes(self):
+        return (self.write_pos - self.oldest_pos) * self.dtype.itemsize
+
+    def _segment_path(self, index):
+        return os.path.join(self.path, f"{index:08d}.{self.dtype.name}")
+
+    def _segments(self):
+        names = glob.glob(os.path.join(self.path, f"*.{self.dtype.name}"))
+        return sorted(int(os.path.basename(name).split('.')[0]) for name in names)
+
+    def reset(self):
+        """Borrar el audio anterior y empezar en la posición 0"""
+        self.close()
+        os.makedirs(self.path, exist_ok=True)
+        previous = glob.glob(os.path.join(self.path, "*.int16")) + glob.glob(os.path.join(self.path, "*.float32"))
+        if previous:
+            print(f"🗑️ Audio en disco anterior borrado: {len(previous)} archivos en {self.path}")
+        for name in previous:
+            os.remove(name)
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'sample_rate': self.sample_rate, 'dtype': self.dtype.name,
+                       'segment_samples': self.segment_samples}, f)
+        self.first_segment = 0
+        self.write_pos = 0
+
+    def write(self, block):
+        """Añadir audio float32 en [-1, 1] al final (se parte en los límites de segmento)"""
+        if self.dtype == np.int16:
+            block = (np.clip(block, -1.0, 1.0) * (INT16_SCALE - 1)).astype(np.int16)
+        else:
+            block = np.asarray(block, dtype=np.float32)
+        while len(block):
+            index, offset = divmod(self.write_pos, self.segment_samples)
+            piece = block[:self.segment_samples - offset]
+            if self._file is None or self._file[0] != index:
+                self.close()
+                self._file = (index, open(self._segment_path(index), 'ab'))
+            piece.tofile(self._file[1])
+            # Visible para los lectores (caché de páginas) antes de publicar la posición
+            self._file[1].flush()
+            self.write_pos += len(piece)
+            block = block[len(piece):]
+        self._evict()
+
+    def fill_to(self, pos):
+        """Rellenar con silencio hasta `pos` (audio que se perdió antes de llegar a disco)"""
+        while self.write_pos < pos:
+            self.write(np.zeros(min(pos - self.write_pos, SILENCE_BLOCK), dtype=np.float32))
+
+    def _evict(self):
+        """Borrar los segmentos que quedaron enteros fuera de la retención"""
+        while (self.first_segment + 1) * self.segment_samples <= self.write_pos - self.retention:
+            try:
+                os.remove(self._segment_path(self.first_segment))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Windows no borra un archivo mapeado por un lector: se reintenta en la próxima escritura
+                return
+            self.first_segment += 1
+
+    def views(self, start, stop):
+        """Vistas np.memmap sin copia de [start, stop), una por segmento (en el formato del disco)"""
+        self._check_range(start, stop)
+        parts = []
+        pos = start
+        while pos < stop:
+            index, offset = divmod(pos, self.segment_samples)
+            length = min(self.segment_samples, self.write_pos - index * self.segment_samples)
+            try:
+                segment = np.memmap(self._segment_path(index), dtype=self.dtype, mode='r', shape=(length,))
+            except FileNotFoundError:
+                raise BufferOverrun(f"Segmento {index} ya borrado del disco") from None
+            end = min(stop - index * self.segment_samples, length)
+            parts.append(segment[offset:end])
+            pos = index * self.segment_samples + end
+        return parts
+
+    def read(self, start, stop):
+        """Leer [start, stop) como float32 (vista sin copia si es float32 y no cruza segmentos)"""
+        parts = self.views(start, stop)
+        if self.dtype == np.float32 and len(parts) == 1:
+            return np.asarray(parts[0])
+        out = np.empty(stop - start, dtype=np.float32)
+        pos = 0
+        for part in parts:
+            out[pos:pos + len(part)] = part
+            pos += len(part)
+        if self.dtype == np.int16:
+            out /= INT16_SCALE
+        return out
+
+    def _check_range(self, start, stop):
+        if start < self.oldest_pos:
+            raise BufferOverrun(f"Posición {start} fuera de la retención (más antigua en disco: {self.oldest_pos})")
+        if stop > self.write_pos:
+            raise ValueError(f"Posición {stop} todavía no escrita (escrito hasta {self.write_pos})")
+
+    def close(self):
+        """Cerrar el segmento en escritura (lo escrito ya está en disco)"""
+        if self._file is not None:
+            self._file[1].close()
+            self._file = None
+
+
+def export_wav(store, start, stop, path):
+    """Escribir [start, stop) como WAV mono de 16 bits"""
+    with wave.open(path, 'wb') as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(store.sample_rate)
+        pos = start
+        while pos < stop:
+            end = min(stop, pos + store.segment_samples)
+            audio = store.read(pos, end)
+            output.writeframes((np.clip(audio, -1.0, 1.0) * (INT16_SCALE - 1)).astype('<i2').tobytes())
+            pos = end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="directorio del audio en disco (SPILL_CONFIG['path']/<flujo>)")
+    parser.add_argument('--start', type=float, help="segundo inicial (por defecto lo más antiguo en disco)")
+    parser.add_argument('--end', type=float, help="segundo final (por defecto lo último escrito)")
+    parser.add_argument('--output', help="WAV de salida; sin él solo se muestra lo disponible")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.path, 'meta.json')):
+        print(f"❌ No hay audio en disco en {args.path}", file=sys.stderr)
+        return 1
+    store = AudioStore.open(args.path)
+    first, last = store.oldest_pos / store.sample_rate, store.write_pos / store.sample_rate
+    print(f"💽 {args.path}: {first:.1f}s - {last:.1f}s ({store.seconds / 60:.1f} min, "
+          f"{store.disk_bytes / 1e6:.1f} MB en {store.dtype.name})", file=sys.stderr)
+    if not args.output:
+        return 0
+
+    start = store.oldest_pos if args.start is None else int(args.start * store.sample_rate)
+    stop = store.write_pos if args.end is None else min(int(args.end * store.sample_rate), store.write_pos)
+    try:
+        export_wav(store, start, max(start, stop), args.output)
+    except BufferOverrun as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"📤 {(max(start, stop) - start) / store.sample_rate:.1f}s exportados a {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Colas acotadas con políticas de backpressure explícitas
+
+Cada cola del pipeline tiene una capacidad medida en lo que cuesta procesar
+(segundos de audio pendientes de Whisper, bytes de texto pendientes de
+traducir) además de un tope de elementos, y una política para cuando se
+llena (BACKPRESSURE_CONFIG):
+
+- drop_oldest:  descartar lo más antiguo (prima la latencia)
+- drop_newest:  rechazar lo que llega (prima lo ya encolado)
+- merge:        unir lo que llega con el último elemento si son contiguos
+                (p. ej. dos enunciados seguidos → una sola decodificación
+                más larga); si no se pueden unir, descarta lo más antiguo
+- block:        esperar hasta `timeout_seconds` a que haya sitio; después
+                rechazar lo que llega (frena al productor)
+
+Cada descarte y cada unión se cuenta en metrics (queue_drops_total,
+queue_merges_total) y la ocupación se exporta como queue_depth y
+queue_load. La interfaz de lectura es la de queue.Queue (get, get_nowait,
+qsize, empty), así drain_batch y los procesadores no cambian.
+"""
+
+import collections
+import queue
+import threading
+import time
+
+import config
+import metrics
+
+POLICIES = ('drop_oldest', 'drop_newest', 'merge', 'block')
+
+
+class BoundedQueue:
+    """Cola con capacidad por coste (segundos, bytes o elementos) y política de desborde"""
+
+    def __init__(self, name, policy='drop_oldest', capacity=None, max_items=None, timeout_seconds=1.0,
+                 size_of=None, merge=None, on_drop=None, stream=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Política de backpressure desconocida: '{policy}' (disponibles: {', '.join(POLICIES)})")
+        if policy == 'merge' and merge is None:
+            print(f"⚠️ La cola '{name}' no sabe unir elementos: se usa drop_oldest")
+            policy = 'drop_oldest'
+        self.name = name
+        self.policy = policy
+        self.capacity = capacity            # En las unidades de size_of; None = sin límite de coste
+        self.max_items = max_items          # None = sin límite de elementos
+        self.timeout = timeout_seconds
+        self.size_of = size_of or (lambda item: 1)
+        self.merge_fn = merge               # merge(anterior, nuevo) -> unido o None si no son contiguos
+        self.on_drop = on_drop              # Limpieza de un elemento descartado
+        self._items = collections.deque()   # (elemento, coste)
+        self.load = 0.0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self.dropped = 0
+        self.merged = 0
+        # Con varios flujos cada uno tiene sus colas: la etiqueta stream las distingue
+        self.labels = {'queue': name} if stream is None else {'queue': name, 'stream': stream}
+        metrics.register('queue_depth', self.qsize, **self.labels)
+        metrics.register('queue_load', lambda: self.load, **self.labels)
+
+    def _fits(self, cost):
+        if self.max_items is not None and len(self._items) >= self.max_items:
+            return False
+        # Un elemento más grande que toda la capacidad entra solo si la cola está vacía
+        return self.capacity is None or not self._items or self.load + cost <= self.capacity
+
+    def put(self, item, block=False, timeout=None):
+        """Encolar aplicando la política; devuelve False si `item` fue rechazado
+
+        block=True espera sitio (hasta `timeout`) sea cual sea la política: lo usa el
+        drenado al detener, donde no se quiere perder nada.
+        """
+        cost = self.size_of(item)
+        dropped = []
+        with self._lock:
+            accepted = self._put_locked(item, cost, dropped, block, timeout)
+            if accepted:
+                self._not_empty.notify()
+        for old in dropped:
+            self._count_drop(old)
+        if not accepted:
+            self._count_drop(item)
+        return accepted
+
+    def _put_locked(self, item, cost, dropped, block, timeout):
+        if self._fits(cost):
+            self._append(item, cost)
+            return True
+
+        if self.policy == 'merge' and self._items:
+            last, last_cost = self._items[-1]
+            combined = self.merge_fn(last, item)
+            if combined is not None:
+                self._items.pop()
+                self.load -= last_cost
+                combined_cost = self.size_of(combined)
+                if self._fits(combined_cost):
+                    self._append(combined, combined_cost)
+                    self.merged += 1
+                    metrics.inc('queue_merges_total', **self.labels)
+                    return True
+                # Ni unidos caben: vuelve el anterior y se sigue con drop_oldest
+                self._items.append((last, last_cost))
+                self.load += last_cost
+
+        if self.policy == 'drop_newest' and not block:
+            return False
+
+        if self.policy == 'block' or block:
+            wait = timeout if block and timeout is not None else self.timeout
+            deadline = time.monotonic() + wait
+            while not self._fits(cost):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._not_full.wait(remaining)
+            self._append(item, cost)
+            return True
+
+        # drop_oldest (y merge sin vecino contiguo)
+        while self._items and not self._fits(cost):
+            old, old_cost = self._items.popleft()
+            self.load -= old_cost
+            dropped.append(old)
+        self._append(item, cost)
+        return True
+
+    def put_control(self, item):
+        """Encolar sin límites ni política (centinelas de parada, marcas de drenado)"""
+        with self._lock:
+            self._append(item, 0)
+            self._not_empty.notify()
+
+    def _append(self, item, cost):
+        self._items.append((item, cost))
+        self.load += cost
+
+    def _count_drop(self, item):
+        self.dropped += 1
+        metrics.inc('queue_drops_total', policy=self.policy, **self.labels)
+        if self.on_drop is not None:
+            try:
+                self.on_drop(item)
+            except Exception as e:
+                print(f"Error liberando elemento descartado de '{self.name}': {e}")
+
+    def get(self, block=True, timeout=None):
+        with self._not_empty:
+            if not block:
+                if not self._items:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._items:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            item, cost = self._items.popleft()
+            self.load -= cost
+            if not self._items:
+                self.load = 0.0  # Sin deriva de coma flotante
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def clear(self):
+        """Vaciar sin contar descartes (reinicio de sesión)"""
+        with self._lock:
+            self._items.clear()
+            self.load = 0.0
+            self._not_full.notify_all()
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def stats(self):
+        return {'queue': self.name, 'policy': self.policy, 'items': len(self._items), 'load': self.load,
+                'capacity': self.capacity, 'dropped': self.dropped, 'merged': self.merged}
+
+
+def create_queue(name, size_of=None, merge=None, on_drop=None, stream=None):
+    """Cola configurada en BACKPRESSURE_CONFIG[name]"""
+    opts = config.BACKPRESSURE_CONFIG[name]
+    return BoundedQueue(name, policy=opts['policy'], capacity=opts.get('capacity'),
+                        max_items=opts.get('max_items'), timeout_seconds=opts.get('timeout_seconds', 1.0),
+                        size_of=size_of, merge=merge, on_drop=on_drop, stream=stream)
+
+
+def text_bytes(text):
+    """Coste de un texto pendiente de traducir: bytes UTF-8"""
+    return len(text.encode('utf-8')) if text else 0
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: log-mel de un lote de enunciados (features.py) frente al de los workers
+
+Compara, para un minuto de audio con pausas (lo que el VAD descarta no se
+decodifica):
+- workers sin caché: log_mel_batch de cada lote, ventanas rellenadas a 30 s
+- todo el audio al llegar (la versión anterior de MelFeatureRing, con update())
+- MelFeatureRing bajo demanda: solo las tramas reales de los enunciados en lote
+
+Uso: python benchmarks/bench_features.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features import MelFeatureRing, mel_filters
+from ring_buffer import AudioRingBuffer
+from transcriber import HOP_LENGTH, WINDOW_FRAMES, log_mel_batch
+
+SAMPLE_RATE = 16000
+SECONDS = 60
+UTTERANCE_SECONDS = 3.0
+PAUSE_SECONDS = 2.0
+BATCH = 4
+
+
+def utterances():
+    """(inicio, fin) de enunciados de 3 s separados por 2 s de silencio"""
+    spans, pos = [], 0
+    while pos + UTTERANCE_SECONDS * SAMPLE_RATE <= SECONDS * SAMPLE_RATE:
+        spans.append((pos, pos + int(UTTERANCE_SECONDS * SAMPLE_RATE)))
+        pos += int((UTTERANCE_SECONDS + PAUSE_SECONDS) * SAMPLE_RATE)
+    return spans
+
+
+def timed(fn):
+    start = time.perf_counter()
+    frames = fn()
+    return frames, time.perf_counter() - start
+
+
+def main():
+    audio = (0.1 * np.random.default_rng(0).standard_normal(SECONDS * SAMPLE_RATE)).astype(np.float32)
+    ring = AudioRingBuffer(len(audio))
+    ring.write(audio)
+    spans = utterances()
+    batches = [spans[i:i + BATCH] for i in range(0, len(spans), BATCH)]
+    filters = mel_filters(80)
+
+    def workers():
+        for batch in batches:
+            log_mel_batch([audio[start:end] for start, end in batch], filters)
+        return len(spans) * WINDOW_FRAMES
+
+    def eager():
+        # Todas las tramas del audio capturado, como hacía update() en cada vuelta del despachador
+        features = MelFeatureRing(ring, n_mels=80)
+        step = WINDOW_FRAMES * HOP_LENGTH
+        for start in range(0, len(audio), step):
+            features.window(start, min(start + step, len(audio)))
+        for start, end in spans:
+            features.window(start, end)
+        return features.computed
+
+    def lazy():
+        features = MelFeatureRing(ring, n_mels=80)
+        for start, end in spans:
+            features.window(start, end)
+        return features.computed
+
+    print(f"=== Log-mel de {len(spans)} enunciados de {UTTERANCE_SECONDS:.0f}s en {SECONDS}s de audio "
+          f"(lotes de {BATCH}) ===")
+    for name, fn in (("workers (ventanas de 30 s)", workers), ("todo el audio al llegar", eager),
+                     ("bajo demanda (lotes)", lazy)):
+        runs = [timed(fn) for _ in range(5)]
+        frames = runs[0][0]
+        seconds = min(elapsed for _, elapsed in runs)
+        print(f"{name:28s} {frames:6d} tramas  {seconds * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
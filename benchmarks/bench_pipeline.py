@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline del pipeline completo con reproducción de archivos
+
+Reproduce clips con FileSource por la misma cadena que main_hybrid.py
+(callback → re-muestreo → buffer circular → VAD → transcripción → traducción
+por lotes con entrega en orden) y reporta por clip:
+
+- latencia por etapa (p50/p95/p99): VAD (fin del audio → cierre del
+  enunciado), espera y duración de la transcripción, traducción y extremo a
+  extremo (fin del audio del enunciado → traducción entregada)
+- RTF de Whisper (tiempo de decodificación / audio decodificado) y RTF total
+  (tiempo de pared / duración del clip)
+- bloques perdidos por la fuente, callbacks lentos, overruns del buffer y
+  descartes en las colas
+
+La traducción usa el backend 'stub' (sin red). La transcripción usa un stub
+con RTF configurable, o los workers de Whisper reales con --whisper. Sin
+--clips se generan clips sintéticos deterministas (silencio, tono, ráfagas
+con forma de habla, con y sin ruido); con --clips DIR se añaden los WAV de
+ese directorio (p. ej. grabaciones de voz).
+
+Uso: python benchmarks/bench_pipeline.py [--clips DIR] [--speed 1] [--stub-rtf 0.15]
+                                         [--whisper] [--write-clips DIR]
+"""
+
+import argparse
+import bisect
+import glob
+import os
+import queue
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from audio_sources import FileSource
+from resampler import StreamingResampler
+from ring_buffer import AudioRingBuffer, BufferOverrun
+from translation_batch import BatchingTranslator
+from translation_cache import CachedTranslator
+from translation_workers import OrderedTranslationPool
+from translators import create_translator
+from vad import VoiceSegmenter
+
+CAPTURE_RATE = config.CAPTURE_SAMPLE_RATE
+BLOCK_SIZE = 1024
+DISPATCH_INTERVAL = 0.05
+
+
+def synthetic_clips(seconds=20, seed=7):
+    """Clips deterministas a CAPTURE_RATE: {nombre: array float32}"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * CAPTURE_RATE)
+    t = np.arange(n) / CAPTURE_RATE
+
+    def speech_like(noise_level):
+        # Ráfagas de 0.8-3 s con formantes modulados y pausas de 0.4-1.2 s
+        audio = np.zeros(n, dtype=np.float32)
+        pos = int(0.5 * CAPTURE_RATE)
+        while pos < n:
+            length = int(rng.uniform(0.8, 3.0) * CAPTURE_RATE)
+            seg_t = t[:min(length, n - pos)]
+            pitch = rng.uniform(100, 220)
+            voiced = sum(np.sin(2 * np.pi * pitch * k * seg_t) / k for k in range(1, 8))
+            envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 6) * seg_t)) * np.hanning(len(seg_t))
+            audio[pos:pos + len(seg_t)] = 0.15 * voiced * envelope
+            pos += length + int(rng.uniform(0.4, 1.2) * CAPTURE_RATE)
+        return audio + noise_level * rng.standard_normal(n).astype(np.float32)
+
+    return {
+        'silence': (0.0005 * rng.standard_normal(n)).astype(np.float32),
+        'tone_440': (0.2 * np.sin(2 * np.pi * 440 * t)).astype(np.float32),
+        'speech_like': speech_like(0.001).astype(np.float32),
+        'speech_like_noisy': speech_like(0.02).astype(np.float32),
+    }
+
+
+def write_wav(path, audio, sample_rate):
+    """Guardar float32 mono como WAV PCM de 16 bits (biblioteca estándar)"""
+    pcm = (np.clip(audio, -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+
+class StubTranscriber:
+    """Transcripción simulada: tarda stub_rtf × duración del audio"""
+
+    def __init__(self, rtf):
+        self.rtf = rtf
+        self.count = 0
+
+    def transcribe(self, audio, sample_rate, **options):
+        time.sleep(self.rtf * len(audio) / sample_rate)
+        self.count += 1
+        return {'text': f"utterance number {self.count}",
+                'segments': [{'start': 0.0, 'end': len(audio) / sample_rate,
+                              'avg_logprob': -0.3, 'no_speech_prob': 0.02}]}
+
+    def close(self):
+        pass
+
+
+class PipelineRun:
+    """Una pasada del pipeline sobre un clip, con marcas de tiempo por enunciado"""
+
+    def __init__(self, audio, transcriber, translator, speed):
+        self.ring = AudioRingBuffer.for_duration(120, config.SAMPLE_RATE)
+        self.resampler = StreamingResampler(CAPTURE_RATE, config.SAMPLE_RATE, max_block=BLOCK_SIZE)
+        self.segmenter = VoiceSegmenter(self.ring)
+        self.transcriber = transcriber
+        self.stop = threading.Event()
+        self.realtime_queue = queue.Queue(maxsize=10)
+        self.translation_queue = queue.Queue(maxsize=20)
+        self.pool = OrderedTranslationPool(translator, self.translation_queue, self.on_translation,
+                                           self.stop, text_of=lambda item: item['text'])
+        self.source = FileSource(audio, self.callback, CAPTURE_RATE, blocksize=BLOCK_SIZE, speed=speed)
+        # (posición en el buffer, instante de escritura) para fechar cada muestra
+        self.write_positions = []
+        self.write_times = []
+        self.segments = []
+        self.callback_seconds = []
+        self.queue_drops = {'realtime': 0, 'translation': 0}
+        self.overruns = 0
+        self.input_overflows = 0
+        self.capture_done = threading.Event()
+        self.dispatched = 0
+
+    def callback(self, indata, frames, time_info, status):
+        start = time.perf_counter()
+        if status:
+            self.input_overflows += 1
+        audio = self.resampler.process(indata[:, 0] if indata.ndim > 1 else indata)
+        if len(audio):
+            self.ring.write(audio)
+            self.write_positions.append(self.ring.write_pos)
+            self.write_times.append(time_info.inputBufferAdcTime + frames / CAPTURE_RATE)
+        self.callback_seconds.append(time.perf_counter() - start)
+
+    def captured_at(self, pos):
+        """Instante en que la muestra `pos` llegó al buffer"""
+        i = bisect.bisect_left(self.write_positions, pos)
+        return self.write_times[min(i, len(self.write_times) - 1)]
+
+    def dispatcher(self):
+        while not self.capture_done.is_set():
+            time.sleep(DISPATCH_INTERVAL)
+            self.dispatch(self.segmenter.process())
+        # Cerrar el último enunciado cuando el clip termina
+        self.dispatch(self.segmenter.process())
+        self.dispatch(self.segmenter.flush())
+
+    def dispatch(self, segments):
+        for start_pos, end_pos, forced in segments:
+            item = {'start': start_pos, 'end': end_pos, 'closed': time.perf_counter(),
+                    'captured': self.captured_at(end_pos)}
+            self.dispatched += 1
+            try:
+                self.realtime_queue.put(item, block=False)
+            except queue.Full:
+                self.queue_drops['realtime'] += 1
+
+    def transcribe_loop(self):
+        while not self.stop.is_set():
+            try:
+                item = self.realtime_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            try:
+                audio = self.ring.read(item['start'], item['end'], copy=True)
+            except BufferOverrun:
+                self.overruns += 1
+                continue
+            item['transcribe_start'] = time.perf_counter()
+            result = self.transcriber.transcribe(audio, config.SAMPLE_RATE, language="en", fp16=False)
+            item['transcribe_end'] = time.perf_counter()
+            item['text'] = result['text'].strip() or "(silencio)"
+            self.segments.append(item)
+            try:
+                self.translation_queue.put(item, block=False)
+            except queue.Full:
+                self.queue_drops['translation'] += 1
+
+    def on_translation(self, seq, item, translation, skipped):
+        item['delivered'] = time.perf_counter()
+        item['skipped'] = skipped
+
+    def run(self):
+        dispatcher = threading.Thread(target=self.dispatcher, daemon=True)
+        dispatcher.start()
+        threading.Thread(target=self.transcribe_loop, daemon=True).start()
+        self.pool.start()
+
+        started = time.perf_counter()
+        self.source.start()
+        self.source.wait()
+        self.capture_done.set()
+        dispatcher.join()
+        # Esperar a que todo llegue a la "UI"
+        deadline = time.perf_counter() + 60
+        while time.perf_counter() < deadline:
+            lost = self.overruns + self.queue_drops['realtime'] + self.queue_drops['translation']
+            if sum('delivered' in s for s in self.segments) + lost >= self.dispatched:
+                break
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        self.stop.set()
+        self.pool.join(2)
+        return elapsed
+
+
+def percentiles(values):
+    if not values:
+        return "      -        -        -"
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return f"{p50:7.0f}  {p95:7.0f}  {p99:7.0f}"
+
+
+def report(name, run, elapsed, duration):
+    segments = [s for s in run.segments if 'delivered' in s]
+    stages = {
+        'vad (fin audio → cierre)': [s['closed'] - s['captured'] for s in segments],
+        'espera transcripción': [s['transcribe_start'] - s['closed'] for s in segments],
+        'transcripción': [s['transcribe_end'] - s['transcribe_start'] for s in segments],
+        'traducción': [s['delivered'] - s['transcribe_end'] for s in segments],
+        'extremo a extremo': [s['delivered'] - s['captured'] for s in segments],
+    }
+    decoded = sum((s['end'] - s['start']) / config.SAMPLE_RATE for s in run.segments)
+    decode_time = sum(s['transcribe_end'] - s['transcribe_start'] for s in run.segments)
+
+    print(f"\n=== {name}: {duration:.1f} s de audio, {len(run.segments)} enunciados ===")
+    print(f"{'etapa':<28} {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}")
+    for stage, values in stages.items():
+        print(f"{stage:<28} {percentiles(values)}")
+    print(f"RTF Whisper {decode_time / decoded if decoded else 0:.3f} · RTF total {elapsed / duration:.3f} · "
+          f"voz {run.segmenter.speech_ratio():.0%} · callback p99 {np.percentile(run.callback_seconds, 99) * 1000:.2f} ms")
+    print(f"Pérdidas: bloques {run.source.dropped_blocks} · overflows {run.input_overflows} · "
+          f"callbacks lentos {run.source.slow_callbacks} · overruns {run.overruns} · "
+          f"cola RT {run.queue_drops['realtime']} · cola traducción {run.queue_drops['translation']} · "
+          f"traducciones omitidas {sum(1 for s in segments if s['skipped'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clips', help="directorio con WAV adicionales (voz real)")
+    parser.add_argument('--only-clips', action='store_true', help="no usar los clips sintéticos")
+    parser.add_argument('--seconds', type=float, default=20, help="duración de los clips sintéticos")
+    parser.add_argument('--speed', type=float, default=1.0, help="1 = tiempo real, 0 = sin esperas")
+    parser.add_argument('--stub-rtf', type=float, default=0.15, help="RTF del transcriptor simulado")
+    parser.add_argument('--rtt-ms', type=float, default=150, help="latencia del traductor simulado")
+    parser.add_argument('--whisper', action='store_true', help="usar los workers de Whisper reales")
+    parser.add_argument('--write-clips', help="guardar los clips sintéticos como WAV en este directorio")
+    args = parser.parse_args()
+
+    clips = {} if args.only_clips else synthetic_clips(args.seconds)
+    if args.write_clips:
+        os.makedirs(args.write_clips, exist_ok=True)
+        for name, audio in clips.items():
+            write_wav(os.path.join(args.write_clips, f"{name}.wav"), audio, CAPTURE_RATE)
+    if args.clips:
+        for path in sorted(glob.glob(os.path.join(args.clips, "*.wav"))):
+            clips[os.path.basename(path)] = path
+
+    if args.whisper:
+        from inference_workers import TranscriptionPool
+
+        transcriber = TranscriptionPool()
+        transcriber.start()
+        while transcriber.ready_count() == 0:
+            if transcriber.all_disabled():
+                sys.exit("Whisper no pudo cargarse")
+            time.sleep(0.2)
+    else:
+        transcriber = StubTranscriber(args.stub_rtf)
+
+    config.TRANSLATION_CONFIG['local']['rtt_ms'] = args.rtt_ms
+    translator = BatchingTranslator(CachedTranslator(create_translator('stub'), 'en', 'es',
+                                                     cache_config={'persistent': False}))
+    try:
+        for name, audio in clips.items():
+            run = PipelineRun(audio, transcriber, translator, args.speed)
+            elapsed = run.run()
+            report(name, run, elapsed, run.source.duration)
+    finally:
+        transcriber.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: StreamingResampler vs la función resample_audio anterior (np.interp)
+
+Uso: python benchmarks/bench_resampler.py
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resampler import StreamingResampler, polyphase_bank, resample
+
+FS_IN = 44100
+FS_OUT = 16000
+BLOCK = 2048
+WINDOW_SECONDS = 15
+
+
+def resample_audio_interp(audio_data, fs_in, fs_out):
+    """Versión anterior de main.py (interpolación lineal, sin filtro ni estado)"""
+    if fs_in == fs_out:
+        return audio_data.astype(np.float32)
+    
+    ratio = fs_out / fs_in
+    new_len = int(len(audio_data) * ratio)
+    x_old = np.linspace(0, 1, len(audio_data), endpoint=False)
+    x_new = np.linspace(0, 1, new_len, endpoint=False)
+    resampled = np.interp(x_new, x_old, audio_data)
+    return resampled.astype(np.float32)
+
+
+def alias_level_db(audio_16k, tone_hz):
+    """Nivel (dB relativo a 440 Hz) del alias que produce un tono por encima de 8 kHz"""
+    spectrum = np.abs(np.fft.rfft(audio_16k * np.hanning(len(audio_16k))))
+    freqs = np.fft.rfftfreq(len(audio_16k), 1 / FS_OUT)
+    alias_hz = FS_OUT - tone_hz
+    ref = spectrum[np.argmin(np.abs(freqs - 440))]
+    alias = spectrum[np.argmin(np.abs(freqs - alias_hz))]
+    return 20 * np.log10(alias / ref + 1e-12)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    window = (0.1 * rng.standard_normal(FS_IN * WINDOW_SECONDS)).astype(np.float32)
+    window64 = window.astype(np.float64)
+    blocks = [window[i:i + BLOCK] for i in range(0, len(window), BLOCK)]
+
+    print(f"=== Re-muestreo {FS_IN} → {FS_OUT} Hz, ventana de {WINDOW_SECONDS}s ===")
+
+    runs = 20
+    t_interp = timeit.timeit(lambda: resample_audio_interp(window64, FS_IN, FS_OUT), number=runs) / runs
+    print(f"np.interp (ventana completa):     {t_interp * 1000:8.2f} ms")
+
+    t_oneshot = timeit.timeit(lambda: resample(window, FS_IN, FS_OUT), number=runs) / runs
+    print(f"polifásico (ventana completa):   {t_oneshot * 1000:8.2f} ms")
+
+    resampler = StreamingResampler(FS_IN, FS_OUT, max_block=BLOCK)
+
+    def stream_all():
+        for block in blocks:
+            resampler.process(block)
+
+    t_stream = timeit.timeit(stream_all, number=runs) / runs
+    per_block = t_stream / len(blocks)
+    print(f"polifásico (streaming, {BLOCK}):    {t_stream * 1000:8.2f} ms "
+          f"({per_block * 1e6:.1f} µs/bloque, presupuesto {BLOCK / FS_IN * 1e6:.0f} µs)")
+
+    t_bank = timeit.timeit(lambda: polyphase_bank(FS_IN, FS_OUT), number=1000) / 1000
+    print(f"banco de filtros (caché):        {t_bank * 1e6:8.2f} µs")
+
+    # Calidad: tono de 10 kHz que debería eliminarse (alias en 6 kHz)
+    t = np.arange(FS_IN * 2) / FS_IN
+    tones = (0.5 * np.sin(2 * np.pi * 440 * t) + 0.5 * np.sin(2 * np.pi * 10000 * t)).astype(np.float32)
+    print("\n=== Aliasing de un tono de 10 kHz (más bajo es mejor) ===")
+    print(f"np.interp:   {alias_level_db(resample_audio_interp(tones, FS_IN, FS_OUT), 10000):7.1f} dB")
+    print(f"polifásico:  {alias_level_db(resample(tones, FS_IN, FS_OUT), 10000):7.1f} dB")
+
+    # Memoria del buffer largo (15 minutos) según el formato
+    seconds = 15 * 60
+    print("\n=== Memoria para 15 minutos de audio ===")
+    print(f"float64 @ {FS_IN} Hz: {seconds * FS_IN * 8 / 1e6:7.1f} MB")
+    print(f"float32 @ {FS_IN} Hz: {seconds * FS_IN * 4 / 1e6:7.1f} MB")
+    print(f"float32 @ {FS_OUT} Hz: {seconds * FS_OUT * 4 / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
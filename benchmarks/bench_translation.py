@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline de la etapa de traducción: segmento a segmento, por lotes y
+con workers concurrentes (entrega en orden)
+
+Usa LocalStubTranslator (latencia simulada, sin red) y una cola alimentada a
+ritmo constante, igual que la cola de traducción de main_hybrid.py.
+
+Uso: python benchmarks/bench_translation.py [--segments 60] [--interval-ms 40] [--rtt-ms 150]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translation_batch import BatchingTranslator, LocalStubTranslator
+from translation_workers import OrderedTranslationPool
+
+SAMPLE_TEXTS = [
+    "Okay, so let's get started.",
+    "Can everyone hear me?",
+    "The budget for next quarter is still under review.",
+    "Thank you.",
+    "We need to ship the release before Friday.",
+    "Any questions so far?",
+]
+
+
+def produce(q, n, interval):
+    """Encolar `n` segmentos con su instante de llegada"""
+    for i in range(n):
+        q.put((time.perf_counter(), SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" #{i}"))
+        time.sleep(interval)
+    q.put(None)
+
+
+def run_single(n, interval, rtt_ms):
+    translator = LocalStubTranslator(rtt_ms=rtt_ms)
+    q = queue.Queue()
+    latencies = []
+    threading.Thread(target=produce, args=(q, n, interval), daemon=True).start()
+    start = time.perf_counter()
+    while True:
+        item = q.get()
+        if item is None:
+            break
+        arrived, text = item
+        translator.translate(text)
+        latencies.append(time.perf_counter() - arrived)
+    return latencies, time.perf_counter() - start, translator.calls
+
+
+def run_batched(n, interval, rtt_ms, max_batch, max_wait_ms):
+    translator = LocalStubTranslator(rtt_ms=rtt_ms)
+    batcher = BatchingTranslator(translator, max_batch_size=max_batch, max_wait_ms=max_wait_ms)
+    q = queue.Queue()
+    latencies = []
+    threading.Thread(target=produce, args=(q, n, interval), daemon=True).start()
+    start = time.perf_counter()
+    done = False
+    while not done:
+        batch = batcher.drain(q, timeout=5)
+        if None in batch:
+            batch = batch[:batch.index(None)]
+            done = True
+        if not batch:
+            continue
+        batcher.translate_many([text for _, text in batch])
+        now = time.perf_counter()
+        latencies.extend(now - arrived for arrived, _ in batch)
+    return latencies, time.perf_counter() - start, translator.calls
+
+
+def run_pool(n, interval, rtt_ms, workers, max_batch, max_wait_ms):
+    translator = LocalStubTranslator(rtt_ms=rtt_ms)
+    batcher = BatchingTranslator(translator, max_batch_size=max_batch, max_wait_ms=max_wait_ms)
+    q = queue.Queue()
+    stop = threading.Event()
+    latencies = []
+    order = []
+    finished = threading.Event()
+
+    def on_result(seq, item, translation, skipped):
+        arrived, _ = item
+        latencies.append(time.perf_counter() - arrived)
+        order.append(seq)
+        if len(order) == n:
+            finished.set()
+
+    pool = OrderedTranslationPool(batcher, q, on_result, stop, text_of=lambda item: item[1],
+                                  workers=workers, timeout_seconds=30)
+    start = time.perf_counter()
+    pool.start()
+    for i in range(n):
+        q.put((time.perf_counter(), SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" #{i}"))
+        time.sleep(interval)
+    finished.wait(60)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    pool.join()
+    assert order == sorted(order), "resultados fuera de orden"
+    return latencies, elapsed, translator.calls
+
+
+def report(name, latencies, elapsed, calls):
+    lat = np.array(latencies) * 1000
+    print(f"{name:<22} {len(lat) / elapsed:7.1f} seg/s   p50 {np.percentile(lat, 50):7.0f} ms   "
+          f"p95 {np.percentile(lat, 95):7.0f} ms   peticiones {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--segments", type=int, default=60)
+    parser.add_argument("--interval-ms", type=float, default=40)
+    parser.add_argument("--rtt-ms", type=float, default=150)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=150)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    interval = args.interval_ms / 1000
+    print(f"=== {args.segments} segmentos cada {args.interval_ms:.0f} ms, RTT {args.rtt_ms:.0f} ms ===")
+    report("segmento a segmento", *run_single(args.segments, interval, args.rtt_ms))
+    report(f"lotes (≤{args.max_batch}, {args.max_wait_ms:.0f} ms)",
+           *run_batched(args.segments, interval, args.rtt_ms, args.max_batch, args.max_wait_ms))
+    for workers in args.workers:
+        report(f"{workers} workers, sin lotes",
+               *run_pool(args.segments, interval, args.rtt_ms, workers, 1, 0))
+    for workers in args.workers:
+        report(f"{workers} workers + lotes",
+               *run_pool(args.segments, interval, args.rtt_ms, workers, args.max_batch, args.max_wait_ms))
+
+
+if __name__ == "__main__":
+    main()
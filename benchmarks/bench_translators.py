@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los backends de traducción (translators.py)
+
+Para cada backend mide la latencia de un segmento suelto (p50/p95) y el
+rendimiento por lotes (segmentos/s) con translate_native_batch si existe.
+Los backends cuyas dependencias o modelos no estén disponibles se omiten.
+
+Uso: python benchmarks/bench_translators.py [--backends stub,ctranslate2,marian,google]
+                                            [--segments 64] [--batch-size 16]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from translators import BACKENDS, create_translator
+
+SAMPLE_TEXTS = [
+    "Okay, so let's get started.",
+    "Can everyone hear me?",
+    "The budget for next quarter is still under review.",
+    "Thank you.",
+    "We need to ship the release before Friday.",
+    "Any questions so far?",
+    "I think the main problem is the latency between the two services.",
+    "Let me share my screen for a second.",
+]
+
+
+def bench_backend(name, segments, batch_size):
+    config.TRANSLATION_CONFIG['local']['batch_size'] = batch_size
+    start = time.perf_counter()
+    try:
+        backend = create_translator(name)
+    except Exception as e:
+        print(f"{name:<12} omitido: {e}")
+        return
+    load_time = time.perf_counter() - start
+
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] + f" ({i})" for i in range(segments)]
+    backend.translate(texts[0])  # Calentamiento
+
+    single = []
+    for text in texts[:min(segments, 16)]:
+        t0 = time.perf_counter()
+        backend.translate(text)
+        single.append(time.perf_counter() - t0)
+
+    translate_batch = getattr(backend, 'translate_native_batch', None)
+    t0 = time.perf_counter()
+    if translate_batch is not None:
+        translate_batch(texts)
+    else:
+        for text in texts:
+            backend.translate(text)
+    batch_elapsed = time.perf_counter() - t0
+
+    single_ms = np.array(single) * 1000
+    print(f"{name:<12} carga {load_time:6.2f} s | segmento p50 {np.percentile(single_ms, 50):7.1f} ms "
+          f"p95 {np.percentile(single_ms, 95):7.1f} ms | lote {segments / batch_elapsed:7.1f} seg/s"
+          f"{'' if translate_batch else ' (sin lotes nativos)'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', default=",".join(BACKENDS))
+    parser.add_argument('--segments', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=config.TRANSLATION_CONFIG['local']['batch_size'])
+    args = parser.parse_args()
+
+    for name in args.backends.split(","):
+        bench_backend(name.strip(), args.segments, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
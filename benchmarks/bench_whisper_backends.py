@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Comparación de backends de Whisper: factor de tiempo real (RTF) y memoria (RSS)
+
+Cada combinación backend/compute_type se mide en un proceso nuevo, para que
+el pico de RSS de una no contamine a la siguiente. RTF = tiempo de
+decodificación / duración del audio (< 1 es más rápido que tiempo real).
+
+Uso: python benchmarks/bench_whisper_backends.py --audio grabacion.wav
+         [--model small] [--runs 3] [--threads 4]
+         [--variants openai,faster-whisper:int8,faster-whisper:int8_float32]
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rss_mb():
+    """RSS actual y pico del proceso en MB"""
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        peak = getattr(info, 'peak_wset', None)  # Windows
+        return info.rss / 2**20, (peak or info.rss) / 2**20
+    except ImportError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB en Linux
+        return peak, peak
+
+
+def measure(variant, model_size, audio_path, runs, threads, results):
+    """Cargar y medir una variante (se ejecuta en su propio proceso)"""
+    import config
+    from transcriber import load_model, prepare_audio
+
+    backend, _, compute_type = variant.partition(":")
+    config.WHISPER_CONFIG['cpu_threads'] = threads
+    if compute_type:
+        config.WHISPER_CONFIG['compute_type'] = compute_type
+
+    import soundfile as sf
+
+    audio, sample_rate = sf.read(audio_path, dtype='float32')
+    audio = prepare_audio(audio, sample_rate)
+    duration = len(audio) / 16000
+
+    base_rss, _ = rss_mb()
+    start = time.perf_counter()
+    try:
+        model = load_model(backend, model_size)
+    except Exception as e:
+        results.put((variant, None, f"{type(e).__name__}: {e}"))
+        return
+    load_time = time.perf_counter() - start
+
+    model.transcribe(audio[:16000 * 5], language="en", fp16=False)  # Calentamiento
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = model.transcribe(audio, language="en", fp16=False)
+        times.append(time.perf_counter() - start)
+    _, peak_rss = rss_mb()
+
+    results.put((variant, {
+        'load_seconds': load_time,
+        'rtf': min(times) / duration,
+        'rss_mb': peak_rss - base_rss,
+        'peak_rss_mb': peak_rss,
+        'segments': len(result['segments']),
+        'text': result['text'].strip()[:80]
+    }, None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--audio', required=True, help="WAV con voz en inglés (idealmente 30-120 s)")
+    parser.add_argument('--model', default='small')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--variants', default="openai,faster-whisper:int8,faster-whisper:int8_float32")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    print(f"{'variante':<30} {'carga':>8} {'RTF':>7} {'ΔRSS':>9} {'pico RSS':>9}  texto")
+    for variant in args.variants.split(","):
+        process = ctx.Process(target=measure, args=(variant, args.model, args.audio, args.runs,
+                                                    args.threads, results))
+        process.start()
+        process.join()
+        try:
+            name, metrics, error = results.get(timeout=5)
+        except queue.Empty:
+            name, metrics, error = variant, None, f"el proceso terminó con código {process.exitcode}"
+        if error:
+            print(f"{name:<30} omitido: {error}")
+            continue
+        print(f"{name:<30} {metrics['load_seconds']:7.1f}s {metrics['rtf']:7.3f} "
+              f"{metrics['rss_mb']:7.0f}MB {metrics['peak_rss_mb']:7.0f}MB  {metrics['text']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Desglose del tiempo de arranque a partir de `python -X importtime`
+
+Extrae con ast los imports de nivel superior de un script (main_hybrid.py por
+defecto), los importa en un intérprete limpio con -X importtime y agrupa el
+tiempo acumulado por paquete raíz. Con --deferred mide también los módulos
+que ahora se cargan en segundo plano (torch, whisper, deep_translator...),
+para ver lo que ya no paga la ventana al abrirse.
+
+Uso: python benchmarks/startup_time.py [--script main.py] [--deferred] [--top 15]
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_MODULES = ['whisper', 'faster_whisper', 'torch', 'deep_translator', 'ctranslate2', 'transformers']
+
+
+def script_imports(path):
+    """Módulos importados a nivel de módulo por el script"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_times(modules):
+    """{módulo: (propio_us, acumulado_us)} de importar `modules` en un proceso nuevo"""
+    code = "\n".join(f"try:\n    import {m}\nexcept Exception:\n    pass" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def report(title, modules, top):
+    # Lo que importa el intérprete al arrancar no depende del script
+    baseline = import_times([])
+    times = {name: t for name, t in import_times(modules).items() if name not in baseline}
+    by_root = defaultdict(int)
+    for name, (self_us, _) in times.items():
+        by_root[name.split(".")[0]] += self_us
+    total = sum(by_root.values())
+    missing = [m for m in modules if m not in times]
+
+    print(f"\n=== {title}: {total / 1e6:.2f} s en {len(times)} módulos ===")
+    for name, us in sorted(by_root.items(), key=lambda item: -item[1])[:top]:
+        print(f"{name:<28} {us / 1000:9.1f} ms  {100 * us / total if total else 0:5.1f}%")
+    if missing:
+        print(f"(no disponibles o ya importados: {', '.join(missing)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', default='main_hybrid.py')
+    parser.add_argument('--deferred', action='store_true', help="medir también los imports diferidos")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    report(f"Imports de {args.script} (antes de mostrar la ventana)",
+           script_imports(os.path.join(ROOT, args.script)), args.top)
+    if args.deferred:
+        report("Imports diferidos (workers / hilo de carga)", DEFERRED_MODULES, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,21 +9,178 @@ AUDIO_CONFIG = {
     'channels': 2,
     'device_id': 14,  # Mezcla estéreo Realtek DirectSound - ajustar según tu sistema
     'chunk_seconds': 3,
-    'silence_threshold': 0.01
+    'silence_threshold': 0.01,
+    'source': 'device',    # 'device' o la ruta de un WAV para reproducirlo (sin dispositivo)
+    'replay_speed': 1.0,   # Ritmo de reproducción del WAV (1 = tiempo real, 0 = sin esperas)
+    # Varias fuentes a la vez (multi_stream.py); vacío = solo 'source'. Cada una:
+    # {'name': 'sistema', 'source': 'device' o ruta de WAV, 'device': id o None (el mejor)}
+    'streams': []
+}
+
+# Configuración del sistema híbrido (main_hybrid.py)
+SAMPLE_RATE = AUDIO_CONFIG['sample_rate_model']            # Frecuencia de todo el pipeline
+CAPTURE_SAMPLE_RATE = AUDIO_CONFIG['sample_rate_capture']  # Frecuencia nativa del dispositivo
+CONTEXT_INTERVAL_MINUTES = 15   # Procesar contexto cada 15 minutos
+
+# Contexto incremental (context_builder.py)
+CONTEXT_CONFIG = {
+    'logprob_threshold': -0.8,        # avg_logprob menor → re-decodificar el segmento
+    'no_speech_threshold': 0.6,       # no_speech_prob mayor → re-decodificar el segmento
+    'prompt_chars': 224,              # Texto anterior usado como prompt
+    'max_span_seconds': 28,           # Máximo de un tramo unido (ventana de Whisper: 30s)
+    'redecode_horizon_seconds': 120   # Audio que se conserva para re-decodificar
+}
+
+# Detección de voz y segmentación por enunciados (vad.py)
+VAD_CONFIG = {
+    'frame_ms': 30,               # Duración de cada trama de análisis
+    'energy_margin_db': 9.0,      # Voz = energía por encima del piso de ruido + margen
+    'min_energy_db': -55.0,       # Energía mínima absoluta (dBFS) para considerar voz
+    'zcr_max': 0.45,              # Cruces por cero máximos (ruido de banda ancha)
+    'flatness_max': 0.45,         # Planitud espectral máxima (ruido blanco ≈ 0.56)
+    'noise_adapt': 0.05,          # Velocidad de adaptación del piso de ruido
+    'hangover_ms': 400,           # Silencio necesario para cerrar un enunciado
+    'min_speech_ms': 90,          # Voz continua necesaria para abrir un enunciado
+    'pre_roll_ms': 200,           # Audio previo incluido al abrir
+    'min_segment_seconds': 0.4,   # Segmentos más cortos se descartan
+    'max_segment_seconds': 8      # Corte forzado de enunciados largos (tiempo real)
+}
+
+# Transcripción en streaming con confirmación por acuerdo (streaming.py)
+STREAMING_CONFIG = {
+    'enabled': True,              # False: un resultado por enunciado completo (VAD)
+    'step_ms': 400,               # Intervalo entre pasadas sobre el enunciado en curso
+    'min_audio_ms': 1000,         # Audio mínimo antes de la primera pasada
+    'trim_seconds': 8,            # Recortar lo confirmado cuando el buffer supera esto
+    'max_buffer_seconds': 20      # Sin acuerdo tras esto: confirmar la hipótesis
+}
+
+# Backpressure de las colas (backpressure.py)
+# policy: 'drop_oldest', 'drop_newest', 'merge' (unir enunciados contiguos) o 'block' (esperar timeout_seconds)
+BACKPRESSURE_CONFIG = {
+    'realtime': {                 # Enunciados pendientes de Whisper (main_hybrid / headless)
+        'policy': 'merge',
+        'capacity': 30,           # Segundos de audio sin transcribir
+        'max_items': 10,
+        'merge_gap_seconds': 1.5  # Solo se unen enunciados separados por menos que esto
+    },
+    'transcription': {            # Enunciados pendientes de Whisper (main.py)
+        'policy': 'merge',
+        'capacity': 45,           # Segundos de audio sin transcribir
+        'max_items': 5
+    },
+    'translation': {              # Textos pendientes de traducir
+        'policy': 'block',
+        'capacity': 8000,         # Bytes UTF-8
+        'max_items': 20,
+        'timeout_seconds': 2.0    # Espera máxima del productor antes de descartar
+    },
+    'context': {                  # Cierres de período de contexto
+        'policy': 'merge',        # Dos períodos pendientes → uno más largo
+        'max_items': 5
+    }
 }
 
 # Configuración del modelo Whisper
 WHISPER_CONFIG = {
+    'backend': 'faster-whisper',  # 'faster-whisper' (CTranslate2, CPU) u 'openai' (PyTorch)
     'model_size': 'small',  # 'tiny', 'base', 'small', 'medium', 'large'
     'language': 'en',
-    'fp16': False
+    'fp16': False,
+    'compute_type': 'int8',         # faster-whisper: 'int8', 'int8_float32', 'float32'
+    'cpu_threads': 4,               # Hilos por decodificación (intra)
+    'num_workers': 1,               # Decodificaciones simultáneas por modelo (inter)
+    'beam_size': 5,
+    'vad_filter': True,             # Filtro VAD (Silero) de faster-whisper
+    'vad_min_silence_ms': 500,
+    'batch_decoding': True,         # Varios segmentos pendientes → una pasada del codificador (lote)
+                                    # (cola de enunciados de main.py; en pipeline.py solo sin streaming)
+    'feature_cache': True,          # Log-mel de los lotes solo con sus tramas reales (features.py)
+    'fallback_models': ['base'],    # Modelos más baratos precargados en cada worker (control adaptativo)
+    'adaptive': {                   # Bajar/subir calidad según RTF y retraso (quality.py)
+        'enabled': True,
+        'max_lag_seconds': 4.0,     # Espera en el pool + audio sin transcribir: por encima, bajar
+        'max_rtf': 0.9,             # RTF suavizado por encima del que se baja un nivel
+        'headroom_rtf': 0.4,        # RTF por debajo del que (sin retraso) se puede subir
+        'up_hold_seconds': 30,      # Holgura sostenida antes de subir (se duplica si rebota)
+        'cooldown_seconds': 5,      # Tras un cambio, esperar a que surta efecto
+        'smoothing': 0.3            # Peso de la última medida en la media exponencial del RTF
+    }
+}
+
+# Inferencia de Whisper en procesos separados (inference_workers.py)
+INFERENCE_CONFIG = {
+    'workers': 2,                       # Procesos worker; cada uno carga el modelo una vez
+    'slots': 6,                         # Bloques de memoria compartida reutilizables
+    'slot_seconds': 30,                 # Audio máximo por bloque (más largo: bloque temporal)
+    'heartbeat_interval_seconds': 1.0,  # Latido de cada worker y revisión de salud
+    'heartbeat_timeout_seconds': 30.0,  # Sin latidos durante este tiempo: reiniciar
+    'job_timeout_seconds': 120.0,       # Trabajo sin terminar tras este plazo: reiniciar worker
+    'warmup_seconds': 1.0,              # Decodificación de calentamiento (silencio) al cargar
+    'batch': {                          # Lotes entre flujos (varias fuentes a la vez, multi_stream.py)
+        'max_batch_size': 4,            # Segmentos por trabajo (también enunciados en cola de main.py/pipeline.py)
+        'max_wait_ms': 30               # Espera máxima para juntar segmentos de otros flujos
+    }
 }
 
 # Configuración de traducción
 TRANSLATION_CONFIG = {
     'source_language': 'en',
     'target_language': 'es',
-    'service': 'google'  # 'google', 'deepl' (futuro)
+    'service': 'google',  # 'google', 'ctranslate2', 'marian' (locales, sin red) o 'stub'
+    'local': {
+        'model_path': 'models/opus-mt-en-es-ct2',    # Salida de ct2-transformers-converter
+        'tokenizer': 'Helsinki-NLP/opus-mt-en-es',  # Tokenizador / modelo MarianMT
+        'compute_type': 'int8',         # CTranslate2: int8, int8_float32, float32
+        'batch_size': 16,               # Segmentos por pasada del modelo
+        'beam_size': 2,
+        'inter_threads': 1,             # Lotes en paralelo (CTranslate2)
+        'intra_threads': 4              # Hilos por lote
+    },
+    'cache': {
+        'max_entries': 5000,            # Entradas en la LRU en memoria
+        'ttl_seconds': 6 * 3600,        # Caducidad en memoria
+        'persistent': True,             # Guardar también en SQLite
+        'db_path': 'cache/translations.sqlite3',
+        'max_text_chars': 500,          # Textos más largos no se guardan
+        'prewarm_files': []             # Transcripciones JSONL de sesiones anteriores
+    },
+    'batch': {
+        'max_batch_size': 8,            # Segmentos por petición
+        'max_wait_ms': 150,             # Espera máxima para juntar un lote
+        'max_chars': 4500               # Límite de caracteres por petición (Google: 5000)
+    },
+    'workers': {
+        'count': 3,                     # Peticiones de traducción simultáneas
+        'timeout_seconds': 6.0          # Plazo por segmento antes de omitirlo
+    }
+}
+
+# Sesiones guardadas (session_store.py)
+SESSION_CONFIG = {
+    'enabled': True,
+    'path': 'sessions/sessions.sqlite3',
+    'commit_interval_seconds': 1.0,     # Lo pendiente se escribe en una transacción cada tanto...
+    'batch_size': 200,                  # ... o al juntar este número de registros
+    'fsync_interval_seconds': 10.0      # Checkpoint del WAL (con fsync) cada tanto; siempre al cerrar
+}
+
+# Audio capturado en disco, más allá del buffer circular (audio_store.py)
+SPILL_CONFIG = {
+    'enabled': False,                   # Opcional (headless.py --spill): ~115 MB/h en int16
+    'path': 'sessions/audio',           # Un subdirectorio por flujo
+    'dtype': 'int16',                   # int16 (la mitad de disco) o float32 (sin cuantizar)
+    'segment_seconds': 60,              # Audio por archivo
+    'retention_seconds': 3600           # Lo más antiguo se borra (por archivos enteros)
+}
+
+# Métricas del pipeline (metrics.py)
+METRICS_CONFIG = {
+    'enabled': True,
+    'host': '127.0.0.1',                # Solo local
+    'port': 9464,                       # /metrics (Prometheus) y /metrics.json; 0 = sin endpoint
+    'snapshot_path': 'metrics/snapshot.json',  # '' = sin snapshot periódico
+    'snapshot_interval_seconds': 10
 }
 
 # Configuración de UI
@@ -40,5 +197,16 @@ UI_CONFIG = {
         'accent_orange': '#f39c12',
         'text_light': '#ecf0f1',
         'text_muted': '#95a5a6'
+    },
+    'transcript': {                # Vista de la transcripción (transcript_view.py)
+        'max_lines': 2000,         # Líneas en el widget; las anteriores quedan en el historial comprimido
+        'refresh_fps': 10,         # Volcados por segundo de los resultados pendientes
+        'history_page_lines': 200  # Líneas que se cargan al llegar arriba con el scroll
     }
-}
\ No newline at end of file
+}
+
+# Configuración de depuración
+DEBUG_CONFIG = {
+    'dump_audio': False,       # Guardar cada ventana enviada a Whisper como WAV
+    'dump_dir': 'debug_audio'
+}
@@ -0,0 +1,154 @@
+"""
+Contexto incremental a partir de los segmentos de tiempo real
+
+El procesador de tiempo real ya decodificó todo el audio del período; en vez
+de volver a transcribir 15 minutos, el contexto se arma con esos segmentos
+(texto, posiciones, avg_logprob, no_speech_prob). Solo se vuelven a
+decodificar los tramos dudosos:
+
+- segmentos de baja confianza, con el texto anterior como prompt
+- enunciados cortados a la fuerza (VAD por longitud máxima), que se
+  decodifican unidos para reparar la palabra partida en el borde
+"""
+
+import threading
+
+import config
+
+
+def result_confidence(result):
+    """(avg_logprob, no_speech_prob) de un resultado de Whisper, ponderados por duración"""
+    segments = result.get("segments") or []
+    if not segments:
+        return 0.0, 0.0
+    weights = [max(seg.get("end", 0) - seg.get("start", 0), 0.01) for seg in segments]
+    total = sum(weights)
+    avg_logprob = sum(w * seg.get("avg_logprob", 0.0) for w, seg in zip(weights, segments)) / total
+    no_speech_prob = sum(w * seg.get("no_speech_prob", 0.0) for w, seg in zip(weights, segments)) / total
+    return avg_logprob, no_speech_prob
+
+
+class IncrementalContext:
+    """Acumula segmentos de tiempo real y decide qué tramos re-decodificar"""
+
+    def __init__(self, sample_rate=config.SAMPLE_RATE, **overrides):
+        opts = dict(config.CONTEXT_CONFIG)
+        opts.update(overrides)
+        self.sample_rate = sample_rate
+        self.logprob_threshold = opts['logprob_threshold']
+        self.no_speech_threshold = opts['no_speech_threshold']
+        self.prompt_chars = opts['prompt_chars']
+        self.max_span = int(sample_rate * opts['max_span_seconds'])
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Olvidar todo (nueva sesión)"""
+        with self.lock:
+            self.segments = []       # Segmentos del período actual, en orden
+            self.pending = []        # Tramos [primero, último] (índices) a re-decodificar
+            self.open_group = None   # Cadena de cortes forzados todavía abierta
+            self.redecoded = 0
+            self.improved = 0
+
+    def add_segment(self, start, end, text, avg_logprob, no_speech_prob, forced=False):
+        """Registrar un segmento ya transcrito por el procesador de tiempo real"""
+        with self.lock:
+            index = len(self.segments)
+            self.segments.append({
+                'start': start,
+                'end': end,
+                'text': text,
+                'avg_logprob': avg_logprob,
+                'no_speech_prob': no_speech_prob,
+                'forced': forced,
+                'redecoded': False
+            })
+
+            # Cadena de enunciados cortados a la fuerza: se re-decodifican juntos
+            group = self.open_group
+            if group is not None:
+                first = self.segments[group[0]]
+                prev = self.segments[index - 1]
+                if prev['end'] == start and end - first['start'] <= self.max_span:
+                    group[1] = index
+                else:
+                    self._close_group()
+                    group = None
+            if forced and group is None:
+                self.open_group = [index, index]
+            elif not forced and self.open_group is not None:
+                self._close_group()
+
+            if self.open_group is None and not self._covered(index) and self._low_confidence(self.segments[index]):
+                self.pending.append([index, index])
+
+    def _close_group(self):
+        group = self.open_group
+        self.open_group = None
+        if group[1] > group[0]:
+            self.pending.append(group)
+        elif self._low_confidence(self.segments[group[0]]):
+            self.pending.append(group)
+
+    def _covered(self, index):
+        return any(first <= index <= last for first, last in self.pending)
+
+    def _low_confidence(self, seg):
+        return (seg['avg_logprob'] < self.logprob_threshold or
+                seg['no_speech_prob'] > self.no_speech_threshold)
+
+    def next_redecode(self):
+        """Próximo tramo a re-decodificar: (span_id, start, end, prompt) o None"""
+        with self.lock:
+            if not self.pending:
+                return None
+            first, last = self.pending[0]
+            prompt = " ".join(seg['text'] for seg in self.segments[:first] if seg['text'])
+            return ((first, last), self.segments[first]['start'], self.segments[last]['end'],
+                    prompt[-self.prompt_chars:])
+
+    def apply_redecode(self, span_id, text=None, avg_logprob=None):
+        """Guardar el resultado de un tramo (text=None si no se pudo decodificar)"""
+        with self.lock:
+            if span_id not in [tuple(p) for p in self.pending]:
+                return
+            self.pending = [p for p in self.pending if tuple(p) != span_id]
+            first, last = span_id
+            if first >= len(self.segments) or text is None:
+                return
+            self.redecoded += 1
+            original = min(seg['avg_logprob'] for seg in self.segments[first:last + 1])
+            # Unir tramos cortados siempre; en baja confianza solo si la nueva es mejor
+            if last == first and avg_logprob is not None and avg_logprob < original:
+                return
+            self.improved += 1
+            self.segments[first]['text'] = text.strip()
+            self.segments[first]['redecoded'] = True
+            if avg_logprob is not None:
+                self.segments[first]['avg_logprob'] = avg_logprob
+            for seg in self.segments[first + 1:last + 1]:
+                seg['text'] = ""
+                seg['redecoded'] = True
+
+    def flush_period(self):
+        """Cerrar el período: devuelve el texto completo y deja los segmentos pendientes de la cadena abierta"""
+        with self.lock:
+            if self.open_group is not None:
+                # El último enunciado sigue abierto: pasa al período siguiente
+                keep_from = self.open_group[0]
+            else:
+                keep_from = len(self.segments)
+            done = self.segments[:keep_from]
+            text = " ".join(seg['text'] for seg in done if seg['text'])
+
+            self.segments = self.segments[keep_from:]
+            if self.open_group is not None:
+                self.open_group = [i - keep_from for i in self.open_group]
+            # Los tramos no re-decodificados a tiempo se quedan con el texto de tiempo real
+            self.pending = [[f - keep_from, l - keep_from] for f, l in self.pending if f >= keep_from]
+            return text, len(done)
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.pending)
@@ -0,0 +1,129 @@
+"""
+Log-mel de las ventanas que van en lote, recortado del audio del buffer circular
+
+Whisper calcula el log-mel de cada ventana en el worker, justo antes de
+decodificar, sobre la ventana rellenada a 30 s: 3000 tramas por enunciado
+aunque dure 3 s. Aquí:
+
+- MelFeatureRing calcula bajo demanda, cuando se forma un lote, solo las
+  tramas reales de cada ventana (FFT de 400 muestras cada 160) y las guarda
+  en un anillo alineado con las posiciones absolutas de AudioRingBuffer:
+  las ventanas que se solapan (re-decodificar, unir enunciados) no repiten
+  ninguna FFT y el silencio que descarta el VAD nunca se calcula
+- window(inicio, fin) recorta esas tramas y aplica la normalización de
+  Whisper (máximo - 8 dB, que depende de la ventana)
+
+Las ventanas se envían a los workers junto al audio y el camino por lotes de
+transcriber.py solo rellena hasta 30 s. Un segmento suelto (incluida la
+re-decodificación de un tramo) va por model.transcribe con todas sus
+opciones y calcula su propio log-mel. Las tramas de los bordes de cada
+ventana ven el audio vecino real en lugar del relleno con reflexión de
+Whisper: la diferencia se limita a la primera y la última trama.
+"""
+import threading
+
+import numpy as np
+
+import config
+from transcriber import HOP_LENGTH, N_FFT, WHISPER_SAMPLE_RATE, WINDOW_FRAMES
+
+LOG_FLOOR = -10.0  # log10 del mínimo de potencia de Whisper (1e-10): tramas de silencio o relleno
+
+
+def _hz_to_mel(freq):
+    """Escala mel de Slaney (la de librosa y los filtros de Whisper)"""
+    freq = np.asanyarray(freq, dtype=np.float64)
+    mel = 3.0 * freq / 200.0
+    log_region = freq >= 1000.0
+    return np.where(log_region, 15.0 + np.log(np.maximum(freq, 1e-10) / 1000.0) / (np.log(6.4) / 27.0), mel)
+
+
+def _mel_to_hz(mel):
+    mel = np.asanyarray(mel, dtype=np.float64)
+    freq = 200.0 * mel / 3.0
+    log_region = mel >= 15.0
+    return np.where(log_region, 1000.0 * np.exp(np.log(6.4) / 27.0 * (mel - 15.0)), freq)
+
+
+def mel_filters(n_mels=80, sample_rate=WHISPER_SAMPLE_RATE, n_fft=N_FFT):
+    """Banco de filtros mel (Slaney, normalizado por área) de forma (n_mels, n_fft // 2 + 1)"""
+    fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    mel_freqs = _mel_to_hz(np.linspace(_hz_to_mel(0.0), _hz_to_mel(sample_rate / 2), n_mels + 2))
+    widths = np.diff(mel_freqs)
+    ramps = mel_freqs[:, None] - fft_freqs[None, :]
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0.0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_freqs[2:] - mel_freqs[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+
+def model_mels(model_size):
+    """Bandas mel que espera cada modelo (large-v3 usa 128)"""
+    return 128 if str(model_size).startswith('large-v3') else 80
+
+
+class MelFeatureRing:
+    """Tramas log10-mel (sin normalizar) del audio del buffer circular, calculadas al pedirlas
+
+    La trama k está centrada en la muestra absoluta k * 160; cada hueco del
+    anillo recuerda qué trama guarda, así que window() solo calcula las que
+    faltan.
+    """
+
+    def __init__(self, audio_ring, n_mels=None):
+        self.audio_ring = audio_ring
+        self.n_mels = n_mels or model_mels(config.WHISPER_CONFIG['model_size'])
+        self.capacity = audio_ring.capacity // HOP_LENGTH
+        self._frames = np.full((self.capacity, self.n_mels), LOG_FLOOR, dtype=np.float32)
+        self._frame_ids = np.full(self.capacity, -1, dtype=np.int64)  # Trama guardada en cada hueco
+        self._filters = mel_filters(self.n_mels)
+        self._window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)  # Hann periódica, como torch
+        self._lock = threading.Lock()
+        self.computed = 0
+
+    def reset(self):
+        with self._lock:
+            self._frame_ids[:] = -1
+
+    def _compute(self, first, last):
+        """Calcular las tramas [first, last) que no estén ya en el anillo"""
+        wanted = np.arange(first, last)
+        missing = wanted[self._frame_ids[wanted % self.capacity] != wanted]
+        if not len(missing):
+            return
+        first, last = int(missing[0]), int(missing[-1]) + 1
+        start = first * HOP_LENGTH - N_FFT // 2
+        stop = (last - 1) * HOP_LENGTH + N_FFT // 2
+        if start < 0:
+            # Antes de la primera muestra: ceros
+            audio = np.concatenate([np.zeros(-start, dtype=np.float32), self.audio_ring.read(0, stop, copy=True)])
+        else:
+            audio = self.audio_ring.read(start, stop, copy=True)
+        frames = np.lib.stride_tricks.sliding_window_view(audio, N_FFT)[::HOP_LENGTH]
+        power = np.abs(np.fft.rfft(frames * self._window, axis=-1)).astype(np.float32) ** 2
+        log_mel = np.log10(np.maximum(power @ self._filters.T, 1e-10))
+        indices = np.arange(first, last)
+        self._frames[indices % self.capacity] = log_mel
+        self._frame_ids[indices % self.capacity] = indices
+        self.computed += len(indices)
+
+    def window(self, start_pos, end_pos):
+        """Log-mel normalizado de [start_pos, end_pos) como lo espera Whisper: (n_mels, tramas reales)
+
+        Las tramas van desde la del salto en que empieza la ventana hasta 30 s
+        como mucho; el resto de la ventana de Whisper es relleno (se completa
+        al decodificar). BufferOverrun si el audio ya no está en el buffer.
+        """
+        first = start_pos // HOP_LENGTH
+        last = min(-(-end_pos // HOP_LENGTH), first + WINDOW_FRAMES)
+        # Solo las tramas con sus 400 muestras ya escritas
+        available = min(last, (self.audio_ring.write_pos - N_FFT // 2) // HOP_LENGTH + 1)
+        with self._lock:
+            if available > first:
+                self._compute(first, available)
+                log_spec = self._frames[np.arange(first, available) % self.capacity].T.copy()
+            else:
+                log_spec = np.full((self.n_mels, 1), LOG_FLOOR, dtype=np.float32)
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Modo sin interfaz: captura → VAD → Whisper → traducción → JSON lines
+
+Para servidores de captura Linux: no importa tkinter, pystray ni PIL. El
+audio llega de un dispositivo (sounddevice), de un WAV o como PCM crudo por
+la entrada estándar; cada resultado del pipeline (pipeline.py) se escribe
+como una línea JSON en stdout o en un archivo. Los mensajes de consola, los
+de los workers incluidos, van a stderr para no mezclarse con los resultados.
+
+Con SIGTERM o Ctrl+C se deja de capturar, se termina de transcribir y
+traducir lo pendiente (hasta --drain-timeout) y se sale; una segunda señal
+sale sin esperar. Al terminar un WAV o la entrada estándar se drena igual.
+
+Con varios --input (o AUDIO_CONFIG['streams']) cada fuente tiene su propio
+pipeline y todas comparten los workers de Whisper (multi_stream.py); cada
+línea lleva 'source' con el nombre del flujo.
+
+Ejemplos:
+  python headless.py --input device --output resultados.jsonl
+  python headless.py --input grabacion.wav --speed 0
+  python headless.py --input sistema=device:14 --input micro=device:3
+  ffmpeg -i entrada.mp4 -f s16le -ac 1 -ar 16000 - | python headless.py --input -
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import config
+import metrics
+from audio_sources import PCM_FORMATS, best_input_device, create_source
+from inference_workers import TranscriptionPool
+from model_loader import ModelLoader
+from multi_stream import MultiStreamManager, parse_stream_spec
+from pipeline import HybridPipeline
+from session_store import SessionStore
+
+
+class JsonlWriter:
+    """Suscriptor del pipeline: una línea JSON por evento"""
+
+    def __init__(self, stream, partials=False):
+        self.stream = stream
+        self.partials = partials
+        self.lock = threading.Lock()
+        self.written = 0
+
+    def __call__(self, event):
+        if event['type'] == 'partial' and not self.partials:
+            return
+        record = {'timestamp': round(time.time(), 3)}
+        record.update((key, value) for key, value in event.items() if key != 'trace')
+        trace = event.get('trace')
+        if trace is not None:
+            record['latency_ms'] = round(1000 * (time.perf_counter() - trace.marks['captured']))
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+            self.written += 1
+        if trace is not None:
+            # Escrito = "mostrado": cierra la traza de latencia del segmento
+            metrics.finish(trace)
+
+
+def open_output(path):
+    """Archivo de resultados; con '-' es stdout y la consola pasa a stderr"""
+    if path != '-':
+        return open(path, 'a', encoding='utf-8', buffering=1)
+    sys.stdout.flush()
+    # Duplicar el descriptor 1 para los resultados y apuntar el 1 a stderr: así los
+    # print() de este proceso y de los workers (que heredan el descriptor) no ensucian el JSONL
+    output = os.fdopen(os.dup(1), 'w', encoding='utf-8', buffering=1)
+    os.dup2(2, 1)
+    return output
+
+
+def wait_for_models(model_loader, shutdown):
+    """Esperar a Whisper y al traductor; False si fallaron o llegó una señal"""
+    last_progress = None
+    while not model_loader.ready():
+        error = model_loader.failed()
+        if error:
+            print(f"❌ Error cargando modelos: {error}")
+            return False
+        if shutdown.wait(0.5):
+            return False
+        progress = model_loader.progress()
+        if progress != last_progress:
+            print(progress)
+            last_progress = progress
+    model_loader.progress()  # Desglose de tiempos de arranque
+    return True
+
+
+def run_streams(args, streams, transcription_pool, model_loader, output, session_store, shutdown):
+    """Varias fuentes a la vez: un pipeline por flujo sobre los mismos workers de Whisper"""
+    manager = MultiStreamManager(transcription_pool, model_loader, streams, speed=args.speed,
+                                 channels=args.channels, pcm_format=args.pcm_format)
+    writer = manager.subscribe(JsonlWriter(output, partials=args.partials))
+    if session_store is not None:
+        manager.subscribe(session_store.on_event)
+        session_store.begin_session(source=", ".join(f"{spec['name']}={spec['source']}" for spec in streams),
+                                    model=transcription_pool.model_size)
+    try:
+        manager.start()
+        print(f"🎯 Pipeline sin interfaz iniciado ({len(streams)} flujos)")
+
+        while not shutdown.is_set():
+            if manager.wait(0.5):
+                print("🏁 Fin de todas las entradas de audio")
+                break
+
+        manager.stop(drain=True, timeout=args.drain_timeout)
+        print(f"🛑 Pipelines detenidos ({writer.written} resultados escritos)")
+        manager.print_stats()
+        return 0
+    finally:
+        manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', action='append',
+                        help="'device', la ruta de un WAV o '-' para PCM crudo por stdin; repetible "
+                        "como [nombre=]fuente (device:ID elige el dispositivo) para varios flujos")
+    parser.add_argument('--output', default='-', help="archivo JSONL (se añade al final) o '-' para stdout")
+    parser.add_argument('--device', type=int, help="id del dispositivo (por defecto el mejor disponible)")
+    parser.add_argument('--rate', type=int, help="frecuencia de entrada (dispositivo: "
+                        f"{config.CAPTURE_SAMPLE_RATE}; WAV y stdin: {config.SAMPLE_RATE})")
+    parser.add_argument('--channels', type=int, default=1, help="canales del dispositivo o de stdin")
+    parser.add_argument('--pcm-format', default='s16le', choices=sorted(PCM_FORMATS), help="formato de stdin")
+    parser.add_argument('--speed', type=float, default=config.AUDIO_CONFIG['replay_speed'],
+                        help="ritmo de reproducción del WAV (1 = tiempo real, 0 = sin esperas)")
+    parser.add_argument('--partials', action='store_true', help="escribir también las hipótesis parciales")
+    parser.add_argument('--drain-timeout', type=float, default=30.0,
+                        help="segundos para terminar lo pendiente al detener")
+    parser.add_argument('--no-session', action='store_true',
+                        help="no guardar la sesión en SESSION_CONFIG['path']")
+    parser.add_argument('--spill', action='store_true',
+                        help="guardar también el audio en SPILL_CONFIG['path'] (borra el de la vez anterior)")
+    args = parser.parse_args()
+    if args.spill:
+        config.SPILL_CONFIG['enabled'] = True
+    # Varios --input (o, sin --input, AUDIO_CONFIG['streams']) → un flujo por fuente
+    streams = None
+    if args.input is None and config.AUDIO_CONFIG['streams']:
+        streams = config.AUDIO_CONFIG['streams']
+    elif args.input is not None and len(args.input) > 1:
+        streams = [parse_stream_spec(spec) for spec in args.input]
+    # Un solo flujo: la misma sintaxis ([nombre=]fuente, device:ID) que con varios
+    single = parse_stream_spec(args.input[0] if args.input else config.AUDIO_CONFIG['source'] or 'device')
+    args.input = single['source']
+    if single['device'] is not None:
+        args.device = single['device']
+
+    output = open_output(args.output)
+    shutdown = threading.Event()
+
+    def request_shutdown(signum, frame):
+        if shutdown.is_set():
+            print("⏹️ Segunda señal: salida sin drenar")
+            sys.exit(1)
+        print(f"🛑 Señal {signal.Signals(signum).name}: drenando lo pendiente...")
+        shutdown.set()
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+
+    metrics_exporter = metrics.start_exporter()
+    session_store = None
+    if config.SESSION_CONFIG['enabled'] and not args.no_session:
+        session_store = SessionStore().start()
+    transcription_pool = TranscriptionPool()
+    model_loader = ModelLoader(transcription_pool)
+    try:
+        model_loader.start()
+        if not wait_for_models(model_loader, shutdown):
+            return 1
+
+        if streams is not None:
+            return run_streams(args, streams, transcription_pool, model_loader, output, session_store, shutdown)
+
+        capture_rate = args.rate or (config.CAPTURE_SAMPLE_RATE if args.input == 'device' else config.SAMPLE_RATE)
+        block_size = 1024
+        pipeline = HybridPipeline(transcription_pool, model_loader, capture_rate=capture_rate,
+                                  block_size=block_size)
+        writer = pipeline.subscribe(JsonlWriter(output, partials=args.partials))
+        if session_store is not None:
+            pipeline.subscribe(session_store.on_event)
+            session_store.begin_session(source=args.input, model=transcription_pool.model_size)
+
+        device = args.device
+        if args.input == 'device' and device is None:
+            device = best_input_device()
+        source = create_source(args.input, pipeline.audio_callback, capture_rate, channels=args.channels,
+                               blocksize=block_size, device=device, speed=args.speed, pcm_format=args.pcm_format)
+        pipeline.start(source)
+        print(f"🎯 Pipeline sin interfaz iniciado (entrada: {args.input}, {capture_rate} Hz)")
+
+        while not shutdown.is_set():
+            if source.finished.wait(0.5):
+                print("🏁 Fin de la entrada de audio")
+                break
+
+        pipeline.stop(drain=True, timeout=args.drain_timeout)
+        print(f"🛑 Pipeline detenido ({writer.written} resultados escritos)")
+        pipeline.print_stats()
+        return 0
+    finally:
+        transcription_pool.close()
+        if session_store is not None:
+            session_store.close()
+        if metrics_exporter is not None:
+            metrics_exporter.close()
+        output.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
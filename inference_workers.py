@@ -0,0 +1,716 @@
+"""
+Inferencia de Whisper en procesos separados
+
+Decodificar en hilos del mismo proceso que el callback de PortAudio, el
+mainloop de Tk y el icono de pystray provoca contención del GIL: overflows
+de entrada y UI congelada. Aquí cada worker es un proceso que carga el modelo
+una sola vez.
+
+- El audio viaja en bloques de multiprocessing.shared_memory reutilizables,
+  sin serializar arrays; por el pipe solo pasa el nombre del bloque
+- Cada worker tiene su propio pipe: el proceso principal le asigna un trabajo
+  cuando está libre y recibe por ahí el resultado (texto y segmentos)
+- Un hilo supervisor recibe resultados y latidos, detecta workers caídos o
+  colgados y los reinicia; los trabajos afectados fallan con InferenceError
+- Con WHISPER_CONFIG['adaptive'] un QualityController (quality.py) ajusta
+  modelo y opciones de cada trabajo según el RTF y el retraso medidos; los
+  modelos de reserva se cargan en los workers después de declararse listos
+- submit_batch envía varios segmentos (de uno o varios flujos) como un solo
+  trabajo: el audio va contiguo en un bloque y el worker devuelve un
+  resultado por segmento. InferenceScheduler junta en lotes lo que piden
+  los pipelines de todos los flujos (multi_stream.py)
+"""
+
+import collections
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+import config
+import metrics
+from quality import QualityController
+from transcriber import WHISPER_SAMPLE_RATE, prepare_audio
+
+
+class InferenceError(Exception):
+    """El trabajo de transcripción falló, venció su plazo o su worker se reinició"""
+
+
+def _attach(name):
+    """Abrir un bloque creado por el proceso principal
+
+    Los hijos de 'spawn' comparten el resource_tracker del padre: el registro
+    del worker no duplica nada y el bloque solo se libera cuando el padre lo
+    desvincula.
+    """
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(backend, model_sizes, conn, heartbeat_interval, warmup_seconds):
+    """Bucle del proceso worker: cargar los modelos y atender trabajos hasta recibir None"""
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def heartbeat():
+        while True:
+            try:
+                send(('heartbeat', None, None))
+            except (OSError, EOFError):
+                return
+            time.sleep(heartbeat_interval)
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        from transcriber import load_model, transcribe_audio, transcribe_batch, warmup_model
+
+        model = load_model(backend, model_sizes[0])
+        # Pagar la primera inferencia (asignaciones, kernels) antes de declararse listo
+        warmup_model(model, warmup_seconds)
+    except Exception as e:
+        send(('fatal', None, f"{type(e).__name__}: {e}"))
+        return
+    models = {model_sizes[0]: model}
+    send(('ready', None, os.getpid()))
+
+    def load_fallbacks():
+        # Modelos de reserva del control adaptativo: hasta que estén, se usa el principal
+        for size in model_sizes[1:]:
+            try:
+                fallback = load_model(backend, size)
+                warmup_model(fallback, warmup_seconds)
+                models[size] = fallback
+            except Exception as e:
+                print(f"⚠️ Modelo de reserva '{size}' no disponible: {e}")
+
+    if len(model_sizes) > 1:
+        threading.Thread(target=load_fallbacks, daemon=True).start()
+
+    slots = {}
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, shm_name, length, reusable, tag, options = job
+        try:
+            shm = slots.get(shm_name) or _attach(shm_name)
+            audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+            if reusable:
+                slots[shm_name] = shm
+            else:
+                audio = audio.copy()
+                shm.close()
+            if tag == 'batch':
+                result = _transcribe_segments(models, model_sizes[0], audio, options, transcribe_batch)
+            else:
+                job_size = _job_model(models, model_sizes[0], options)
+                result = transcribe_audio(models[job_size], audio, WHISPER_SAMPLE_RATE, tag=tag, **options)
+                result['model'] = job_size
+            del audio
+            message = ('done', job_id, result)
+        except Exception as e:
+            message = ('error', job_id, f"{type(e).__name__}: {e}")
+        send(message)
+
+
+def _job_model(models, default_size, options):
+    """Modelo pedido por el control de calidad; el principal si el de reserva aún no cargó"""
+    size = options.pop('model_size', default_size)
+    return size if size in models else default_size
+
+
+def _transcribe_segments(models, default_size, block, specs, transcribe_batch):
+    """Trabajo por lotes: specs = [(inicio, longitud, etiqueta, opciones, mel)] dentro de `block`
+
+    mel es None o (inicio, bandas, tramas) del log-mel ya calculado del
+    segmento. Los segmentos se agrupan por modelo (el control de calidad puede
+    cambiarlo entre uno y otro) y cada grupo se decodifica junto; un resultado
+    por segmento, en el orden de specs.
+    """
+    groups = {}
+    for index, (offset, length, tag, options, mel) in enumerate(specs):
+        if mel is not None:
+            mel_offset, n_mels, frames = mel
+            options['mel'] = block[mel_offset:mel_offset + n_mels * frames].reshape(n_mels, frames)
+        size = _job_model(models, default_size, options)
+        groups.setdefault(size, []).append((index, block[offset:offset + length], tag, options))
+    results = [None] * len(specs)
+    for size, items in groups.items():
+        outputs = transcribe_batch(models[size], [item[1:] for item in items])
+        for (index, *_), output in zip(items, outputs):
+            output['model'] = size
+            results[index] = output
+    return results
+
+
+@contextmanager
+def _spawn_without_main_script():
+    """Evitar que el proceso hijo re-ejecute el script principal
+
+    Con 'spawn' el hijo importa __main__; main.py y main_hybrid.py construyen
+    la ventana de Tk y el icono a nivel de módulo. El worker solo necesita
+    este módulo, así que se oculta el script (__file__, y __spec__ para
+    `python -m main_hybrid`) mientras se lanza el proceso.
+    """
+    main_module = sys.modules['__main__']
+    main_file = getattr(main_module, '__file__', None)
+    main_spec = getattr(main_module, '__spec__', None)
+    if main_file is not None:
+        del main_module.__file__
+    main_module.__spec__ = None
+    try:
+        yield
+    finally:
+        if main_file is not None:
+            main_module.__file__ = main_file
+        main_module.__spec__ = main_spec
+
+
+def gather(futures):
+    """Future con la lista de resultados de `futures` (o la primera excepción)"""
+    combined = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            combined.set_exception(errors[0])
+        else:
+            combined.set_result([future.result() for future in futures])
+
+    if not futures:
+        combined.set_result([])
+    for future in futures:
+        future.add_done_callback(on_done)
+    return combined
+
+
+class _WorkerHandle:
+    """Estado de un worker visto desde el proceso principal"""
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.process = None
+        self.conn = None
+        self.pid = None
+        self.ready = False
+        self.disabled = False
+        self.job_id = None
+        self.job_started = 0.0
+        self.job_wait = 0.0
+        self.last_heartbeat = 0.0
+        self.restarts = 0
+        self.jobs_done = 0
+
+
+class TranscriptionPool:
+    """Reparte transcripciones entre procesos worker y devuelve los resultados"""
+
+    def __init__(self, model_size=None, backend=None, workers=None, **overrides):
+        opts = dict(config.INFERENCE_CONFIG)
+        opts.update(overrides)
+        if workers is not None:
+            opts['workers'] = workers
+        self.model_size = model_size or config.WHISPER_CONFIG['model_size']
+        self.backend = backend or config.WHISPER_CONFIG['backend']
+        self.quality = None
+        if config.WHISPER_CONFIG['adaptive']['enabled']:
+            self.quality = QualityController(self.backend, self.model_size)
+        self.model_sizes = self.quality.model_sizes() if self.quality is not None else [self.model_size]
+        self.heartbeat_interval = opts['heartbeat_interval_seconds']
+        self.heartbeat_timeout = opts['heartbeat_timeout_seconds']
+        self.job_timeout = opts['job_timeout_seconds']
+        self.slot_samples = int(opts['slot_seconds'] * WHISPER_SAMPLE_RATE)
+        self.slot_size = 2 * self.slot_samples  # float32 por bloque: el audio y, si van, sus tramas log-mel
+        self.warmup_seconds = opts['warmup_seconds']
+        self._ctx = multiprocessing.get_context("spawn")
+        self._handles = [_WorkerHandle(i) for i in range(opts['workers'])]
+        self._slots = [shared_memory.SharedMemory(create=True, size=4 * self.slot_size)
+                       for _ in range(opts['slots'])]
+        self._free_slots = queue.Queue()
+        for slot in self._slots:
+            self._free_slots.put(slot)
+        self._jobs = {}  # job_id -> (future, bloque, reutilizable, instante de envío, mensaje)
+        self._pending = collections.deque()  # job_ids sin worker asignado
+        self._job_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._closing = threading.Event()
+        self._supervisor = None
+        self.completed = 0
+        self.failed = 0
+        metrics.register('whisper_pending_jobs', lambda: len(self._pending))
+
+    def start(self):
+        """Lanzar los workers (cada uno carga el modelo en segundo plano)"""
+        for handle in self._handles:
+            self._spawn(handle)
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+
+    def _spawn(self, handle):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main, args=(self.backend, self.model_sizes, child_conn, self.heartbeat_interval,
+                  self.warmup_seconds),
+            name=f"whisper-worker-{handle.worker_id}", daemon=True)
+        with _spawn_without_main_script():
+            process.start()
+        child_conn.close()
+        handle.process = process
+        handle.conn = parent_conn
+        handle.pid = process.pid
+        handle.ready = False
+        handle.job_id = None
+        handle.last_heartbeat = time.monotonic()
+
+    def submit(self, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", **options):
+        """Encolar un trabajo; devuelve un Future con el resultado de model.transcribe
+
+        Un segmento suelto siempre va por model.transcribe (beam search, VAD,
+        fallback de temperatura): el mel ya calculado solo se usa en lotes.
+        """
+        options.pop('mel', None)
+        audio = prepare_audio(audio, sample_rate)
+        if self.quality is not None:
+            options = self.quality.apply(options)
+        return self._enqueue([audio], tag, options)
+
+    def submit_batch(self, items):
+        """Encolar varios segmentos como un trabajo; items: [(audio, sample_rate, etiqueta, opciones)]
+
+        Si las opciones traen mel (log-mel de la ventana), va en el mismo bloque
+        detrás del audio. Devuelve un Future con la lista de resultados en el
+        mismo orden.
+        """
+        arrays, specs, offset = [], [], 0
+        for audio, sample_rate, tag, options in items:
+            audio = prepare_audio(audio, sample_rate)
+            options = dict(options)
+            mel = options.pop('mel', None)
+            if self.quality is not None:
+                options = self.quality.apply(options)
+            arrays.append(audio)
+            mel_spec = None
+            if mel is not None:
+                arrays.append(np.ascontiguousarray(mel, dtype=np.float32).ravel())
+                mel_spec = (offset + len(audio),) + mel.shape
+            specs.append((offset, len(audio), tag, options, mel_spec))
+            offset += sum(len(array) for array in arrays[-2 if mel is not None else -1:])
+        return self._enqueue(arrays, 'batch', specs)
+
+    def _enqueue(self, arrays, tag, options):
+        """Copiar el audio (contiguo) a un bloque compartido y poner el trabajo en espera"""
+        future = Future()
+        if self._closing.is_set():
+            future.set_exception(InferenceError("El pool de transcripción está cerrado"))
+            return future
+
+        length = sum(len(audio) for audio in arrays)
+        try:
+            if length > self.slot_size:
+                raise queue.Empty
+            shm, reusable = self._free_slots.get_nowait(), True
+        except queue.Empty:
+            # Audio más largo que un bloque o todos ocupados: bloque temporal
+            shm, reusable = shared_memory.SharedMemory(create=True, size=4 * max(length, 1)), False
+        view = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+        offset = 0
+        for audio in arrays:
+            view[offset:offset + len(audio)] = audio
+            offset += len(audio)
+        del view
+
+        with self._lock:
+            job_id = next(self._job_ids)
+            message = (job_id, shm.name, length, reusable, tag, options)
+            self._jobs[job_id] = (future, shm, reusable, time.monotonic(), message)
+            self._pending.append(job_id)
+            self._dispatch()
+        return future
+
+    def transcribe(self, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", timeout=None, **options):
+        """Transcribir de forma bloqueante (misma forma de resultado que transcribe_audio)"""
+        return self.submit(audio, sample_rate, tag, **options).result(timeout)
+
+    def add_lag_source(self, fn):
+        """fn() -> segundos de audio esperando antes del pool; lo usa el control de calidad"""
+        if self.quality is not None:
+            self.quality.add_lag_source(fn)
+
+    def _dispatch(self):
+        """Asignar trabajos pendientes a los workers listos y libres (con el lock tomado)"""
+        for handle in self._handles:
+            if not self._pending:
+                return
+            if not handle.ready or handle.job_id is not None:
+                continue
+            job_id = self._pending.popleft()
+            try:
+                handle.conn.send(self._jobs[job_id][4])
+            except (OSError, ValueError):
+                # Pipe roto: el supervisor reiniciará al worker
+                self._pending.appendleft(job_id)
+                handle.ready = False
+                continue
+            handle.job_id = job_id
+            handle.job_started = time.monotonic()
+            handle.job_wait = handle.job_started - self._jobs[job_id][3]
+            metrics.observe('whisper_queue_wait_seconds', handle.job_wait)
+
+    def _finish(self, job_id, result=None, error=None):
+        """Resolver un trabajo y devolver su bloque; ignora trabajos ya resueltos"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job_id in self._pending:
+                self._pending.remove(job_id)
+        if job is None:
+            return
+        future, shm, reusable = job[:3]
+        if reusable:
+            self._free_slots.put(shm)
+        else:
+            shm.close()
+            shm.unlink()
+        if error is None:
+            self.completed += 1
+            future.set_result(result)
+        else:
+            self.failed += 1
+            future.set_exception(InferenceError(error))
+
+    def _supervise(self):
+        next_check = time.monotonic() + self.heartbeat_interval
+        while not self._closing.is_set():
+            conns = {h.conn: h for h in self._handles if h.conn is not None}
+            for conn in wait(list(conns), timeout=self.heartbeat_interval):
+                handle = conns[conn]
+                try:
+                    self._handle_message(handle, *conn.recv())
+                except (EOFError, OSError):
+                    # El proceso murió: dejar de escucharlo hasta reiniciarlo
+                    handle.conn = None
+                except Exception as e:
+                    print(f"Error en supervisor de inferencia: {e}")
+            now = time.monotonic()
+            if now >= next_check:
+                self._check_health(now)
+                next_check = now + self.heartbeat_interval
+
+    def _handle_message(self, handle, kind, job_id, payload):
+        handle.last_heartbeat = time.monotonic()
+        if kind == 'ready':
+            handle.pid = payload
+            print(f"✅ Worker de Whisper {handle.worker_id} listo (pid {handle.pid}, {self.backend} {self.model_size})")
+            with self._lock:
+                handle.ready = True
+                self._dispatch()
+        elif kind in ('done', 'error'):
+            with self._lock:
+                handle.job_id = None
+                handle.jobs_done += 1
+                job = self._jobs.get(job_id)
+            if kind == 'done' and job is not None:
+                # Solo decodificación (sin espera en cola) frente a la duración del audio
+                _, _, length, _, tag, options = job[4]
+                if tag == 'batch':
+                    metrics.observe('whisper_batch_size', len(options))
+                    length = sum(spec[1] for spec in options)  # Solo audio (sin las tramas log-mel)
+                if length:
+                    decode_seconds = time.monotonic() - handle.job_started
+                    rtf = decode_seconds * WHISPER_SAMPLE_RATE / length
+                    metrics.observe('whisper_rtf', rtf, tag=tag)
+                    if self.quality is not None:
+                        self.quality.observe(rtf, handle.job_wait)
+            self._finish(job_id, result=payload if kind == 'done' else None,
+                         error=payload if kind == 'error' else None)
+            with self._lock:
+                self._dispatch()
+        elif kind == 'fatal':
+            # El modelo no carga: reiniciar no lo arreglaría
+            handle.disabled = True
+            print(f"❌ Worker de Whisper {handle.worker_id} no pudo cargar el modelo: {payload}")
+            if all(h.disabled for h in self._handles):
+                self._fail_all("Ningún worker de Whisper disponible")
+
+    def _check_health(self, now):
+        for handle in self._handles:
+            if handle.disabled:
+                continue
+            reason = None
+            if not handle.process.is_alive() or handle.conn is None:
+                reason = f"terminó con código {handle.process.exitcode}"
+            elif now - handle.last_heartbeat > self.heartbeat_timeout:
+                reason = "no responde"
+            elif handle.job_id is not None and now - handle.job_started > self.job_timeout:
+                # Desde que el worker tomó el trabajo: la espera en _pending no cuenta
+                reason = "trabajo colgado"
+            if reason is not None:
+                self._restart(handle, reason)
+
+        # Trabajos en espera más allá del plazo (p. ej. todos los workers reiniciando)
+        with self._lock:
+            overdue = [job_id for job_id in self._pending if now - self._jobs[job_id][3] > self.job_timeout]
+        for job_id in overdue:
+            self._finish(job_id, error="Plazo de transcripción vencido")
+
+    def _restart(self, handle, reason):
+        print(f"⚠️ Worker de Whisper {handle.worker_id} {reason}: reiniciando")
+        if handle.process.is_alive():
+            handle.process.terminate()
+            handle.process.join(2)
+        if handle.conn is not None:
+            handle.conn.close()
+        with self._lock:
+            job_id, handle.job_id, handle.ready = handle.job_id, None, False
+        if job_id is not None:
+            self._finish(job_id, error=f"El worker {handle.worker_id} se reinició ({reason})")
+        handle.restarts += 1
+        self._spawn(handle)
+
+    def _fail_all(self, reason):
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self._finish(job_id, error=reason)
+
+    def close(self, timeout=5.0):
+        """Detener los workers y liberar la memoria compartida"""
+        if self._closing.is_set():
+            return
+        self._closing.set()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+        for handle in self._handles:
+            try:
+                handle.conn.send(None)
+            except (AttributeError, OSError, ValueError):
+                pass
+        deadline = time.monotonic() + timeout
+        for handle in self._handles:
+            if handle.process is None:
+                continue
+            handle.process.join(max(deadline - time.monotonic(), 0))
+            if handle.process.is_alive():
+                handle.process.terminate()
+            if handle.conn is not None:
+                handle.conn.close()
+        self._fail_all("El pool de transcripción se cerró")
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
+
+    @property
+    def worker_count(self):
+        return len(self._handles)
+
+    def ready_count(self):
+        """Workers con el modelo cargado y calentado"""
+        return sum(1 for h in self._handles if h.ready)
+
+    def all_disabled(self):
+        return all(h.disabled for h in self._handles)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': [{'id': h.worker_id, 'pid': h.pid, 'ready': h.ready, 'busy': h.job_id is not None,
+                             'jobs': h.jobs_done, 'restarts': h.restarts, 'disabled': h.disabled}
+                            for h in self._handles],
+                'pending': len(self._pending),
+                'completed': self.completed,
+                'failed': self.failed,
+                'restarts': sum(h.restarts for h in self._handles),
+                'quality': self.quality.stats() if self.quality is not None else None
+            }
+
+
+class InferenceScheduler:
+    """Planificador compartido: junta los segmentos de todos los flujos en trabajos por lotes
+
+    Cada flujo pide transcripciones a través de su StreamClient. Mientras
+    todos los workers están ocupados las peticiones se acumulan; en cuanto
+    uno queda libre se arma un lote de hasta max_batch_size segmentos
+    (esperando como mucho max_wait_ms a que lleguen más), tomando por turnos
+    de cada flujo para que uno muy activo no deje sin servicio a los demás.
+    La memoria no crece con los flujos: hay un solo modelo por worker y el
+    lote cabe en un bloque compartido.
+    """
+
+    def __init__(self, pool, max_batch_size=None, max_wait_ms=None):
+        opts = config.INFERENCE_CONFIG['batch']
+        self.pool = pool
+        self.max_batch_size = max_batch_size or opts['max_batch_size']
+        self.max_wait = (opts['max_wait_ms'] if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_inflight = pool.worker_count  # Un lote por worker; el resto espera aquí y se junta
+        self._waiting = collections.OrderedDict()  # flujo -> deque de (audio, etiqueta, opciones, future, llegada)
+        self._count = 0
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        self._thread = None
+        self.batches = 0
+        self.segments = 0
+        metrics.register('whisper_scheduled_segments', lambda: self._count)
+
+    def __getattr__(self, name):
+        # stats, add_lag_source, model_size... son los del pool
+        return getattr(self.pool, name)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stream(self, source):
+        """Cliente para el pipeline de un flujo (misma interfaz que TranscriptionPool)"""
+        return StreamClient(self, source)
+
+    def submit(self, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", source=None, **options):
+        """Encolar un segmento del flujo `source`; devuelve un Future con su resultado"""
+        # Copia: el audio suele ser una vista del buffer circular del flujo y el lote sale más tarde
+        audio = np.array(prepare_audio(audio, sample_rate))
+        future = Future()
+        with self._cond:
+            if self._closing:
+                future.set_exception(InferenceError("El planificador de transcripción está cerrado"))
+                return future
+            self._waiting.setdefault(source, collections.deque()).append(
+                (audio, tag, options, future, time.monotonic()))
+            self._count += 1
+            self._cond.notify()
+        return future
+
+    def transcribe(self, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", timeout=None, source=None, **options):
+        return self.submit(audio, sample_rate, tag, source=source, **options).result(timeout)
+
+    def submit_batch(self, items, source=None):
+        """Varios segmentos del mismo flujo: entran al planificador y se juntan con los demás"""
+        return gather([self.submit(audio, sample_rate, tag, source=source, **options)
+                       for audio, sample_rate, tag, options in items])
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closing and (not self._count or self._inflight >= self.max_inflight):
+                    self._cond.wait()
+                if self._closing:
+                    return
+                # Esperar un poco a que otros flujos aporten segmentos, contando desde el más antiguo
+                deadline = min(requests[0][4] for requests in self._waiting.values() if requests) + self.max_wait
+                while not self._closing and self._count < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closing:
+                    return
+                batch = self._take()
+                self._inflight += 1
+            self._send(batch)
+
+    def _take(self):
+        """Un segmento de cada flujo por turno hasta llenar el lote o el bloque compartido (con el lock)"""
+        batch, samples = [], 0
+        while len(batch) < self.max_batch_size and self._count:
+            for source in list(self._waiting):
+                requests = self._waiting[source]
+                if not requests:
+                    continue
+                length = len(requests[0][0])
+                if batch and (len(batch) >= self.max_batch_size or samples + length > self.pool.slot_samples):
+                    return batch
+                batch.append((source,) + requests.popleft())
+                samples += length
+                self._count -= 1
+                # El flujo servido pasa al final de la ronda
+                self._waiting.move_to_end(source)
+        return batch
+
+    def _send(self, batch):
+        try:
+            if len(batch) == 1:
+                _, audio, tag, options, _, _ = batch[0]
+                future = self.pool.submit(audio, WHISPER_SAMPLE_RATE, tag, **options)
+            else:
+                future = self.pool.submit_batch([(audio, WHISPER_SAMPLE_RATE, tag, options)
+                                                 for _, audio, tag, options, _, _ in batch])
+        except Exception as e:
+            future = Future()
+            future.set_exception(InferenceError(f"{type(e).__name__}: {e}"))
+        future.add_done_callback(lambda done: self._deliver(batch, done))
+
+    def _deliver(self, batch, done):
+        with self._cond:
+            self._inflight -= 1
+            self.batches += 1
+            self.segments += len(batch)
+            self._cond.notify()
+        error = done.exception()
+        results = None if error is not None else done.result()
+        if len(batch) == 1 and results is not None:
+            results = [results]
+        for index, (source, _, _, _, future, _) in enumerate(batch):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                metrics.inc('whisper_segments_total', stream=source)
+                future.set_result(results[index])
+
+    def close(self):
+        """Detener el planificador (el pool se cierra aparte); lo que esperaba lote falla"""
+        with self._cond:
+            self._closing = True
+            waiting = [request for requests in self._waiting.values() for request in requests]
+            self._waiting.clear()
+            self._count = 0
+            self._cond.notify_all()
+        for request in waiting:
+            request[3].set_exception(InferenceError("El planificador de transcripción se cerró"))
+
+    def stats(self):
+        stats = self.pool.stats()
+        stats['batches'] = self.batches
+        stats['avg_batch_size'] = self.segments / self.batches if self.batches else 0.0
+        return stats
+
+
+class StreamClient:
+    """Vista del planificador para un flujo: lo que HybridPipeline espera de TranscriptionPool"""
+
+    def __init__(self, scheduler, source):
+        self.scheduler = scheduler
+        self.source = source
+
+    def __getattr__(self, name):
+        return getattr(self.scheduler, name)
+
+    def submit(self, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", **options):
+        return self.scheduler.submit(audio, sample_rate, tag, source=self.source, **options)
+
+    def transcribe(self, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", timeout=None, **options):
+        return self.submit(audio, sample_rate, tag, **options).result(timeout)
+
+    def submit_batch(self, items):
+        return self.scheduler.submit_batch(items, source=self.source)
@@ -6,11 +6,23 @@ from PIL import Image, ImageDraw
 
 import sounddevice as sd
 import numpy as np
-import soundfile as sf
-import whisper
 import time
-import os
-from deep_translator import GoogleTranslator
+
+import config
+import metrics
+from audio_sources import best_input_device, create_source
+from backpressure import create_queue, text_bytes
+from context_builder import result_confidence
+from features import MelFeatureRing
+from inference_workers import TranscriptionPool
+from metrics import CaptureClock, SegmentTrace
+from model_loader import ModelLoader
+from resampler import StreamingResampler
+from session_store import SessionStore
+from translation_batch import drain_batch
+from ring_buffer import AudioRingBuffer, BufferOverrun
+from translation_workers import OrderedTranslationPool
+from vad import VoiceSegmenter
 
 # Configuración del sistema híbrido dual
 FS_CAPTURE = 44100
@@ -24,21 +36,48 @@ REALTIME_WINDOW_SECONDS = 3  # Ventana pequeña para tiempo real
 SILENCE_THRESHOLD = 0.0005   # Umbral para detectar silencio
 SILENCE_DURATION = 0.1       # 0.1 segundos de silencio para procesar
 
+# Configuración de ventanas contextuales
+AUDIO_WINDOW_SECONDS = 15      # Duración máxima de un enunciado por transcripción
+
 # Configuración contextual (cada 15 minutos)
 CONTEXT_INTERVAL_MINUTES = 15  # Procesar contexto cada 15 minutos
-CONTEXT_OVERLAP_SECONDS = 30   # Overlap de 30 segundos entre contextos
 
 # Sistema híbrido dual
-audio_stream = queue.Queue(maxsize=50)  # Stream continuo
 realtime_queue = queue.Queue(maxsize=10)  # Cola para tiempo real
 context_queue = queue.Queue(maxsize=5)    # Cola para contexto periódico
+
+
+def merge_windows(previous, info):
+    """Dos enunciados pendientes de Whisper → una sola decodificación más larga"""
+    window_seconds = previous['window_seconds'] + info['window_seconds']
+    if window_seconds > 2 * AUDIO_WINDOW_SECONDS:
+        return None
+    pause = np.zeros(int(0.2 * FS_MODEL), dtype=info['audio'].dtype)
+    return info.follow(audio=np.concatenate([previous['audio'], pause, info['audio']]),
+                       timestamp=previous['timestamp'], window_seconds=window_seconds).absorb(previous)
+
+
+# Colas acotadas por coste según BACKPRESSURE_CONFIG
+# Ventanas pendientes de transcribir (segundos de audio) y textos pendientes de traducir (bytes)
+text_stream = create_queue('transcription', size_of=lambda info: info['window_seconds'], merge=merge_windows)
+translation_stream = create_queue('translation', size_of=lambda info: text_bytes(info['text']))
 transcribing = False
 stop_flag = threading.Event()
 
-# Buffers duales
-realtime_buffer = np.array([], dtype=np.float64)  # Buffer para tiempo real
-context_buffer = np.array([], dtype=np.float64)   # Buffer para contexto (15 min)
-buffer_lock = threading.Lock()
+# Contexto conversacional
+MAX_CONTEXT_HISTORY = 10
+conversation_context = []
+translation_context = []
+last_transcription_time = 0
+translation_pool = None
+
+# Etapa de captura: mono + re-muestreo a 16 kHz antes del buffer circular
+capture_resampler = StreamingResampler(FS_CAPTURE, FS_MODEL, max_block=CHUNK_SIZE)
+audio_ring = AudioRingBuffer.for_duration(4 * AUDIO_WINDOW_SECONDS, FS_MODEL)
+capture_clock = CaptureClock()  # Posición del buffer → instante de captura
+# Log-mel de los enunciados que van en lote, recortado del buffer circular (features.py)
+audio_features = MelFeatureRing(audio_ring) \
+    if config.WHISPER_CONFIG['feature_cache'] and config.WHISPER_CONFIG['batch_decoding'] else None
 
 # Control de tiempo
 last_realtime_process = 0
@@ -49,9 +88,13 @@ context_start_time = 0
 silence_start_time = 0
 is_in_silence = False
 
-# Cargar modelo Whisper y traductor
-model = whisper.load_model("small")  # Modelo para transcripción
-translator = GoogleTranslator(source='en', target='es')  # Google Translate para traducción
+# Modelo Whisper y traductor: se cargan en segundo plano con la ventana ya visible
+transcription_pool = TranscriptionPool()  # Whisper (WHISPER_CONFIG) en procesos worker
+transcription_pool.add_lag_source(lambda: text_stream.load)  # Audio pendiente para el control de calidad
+model_loader = ModelLoader(transcription_pool)
+
+# Transcripciones y traducciones de cada sesión, guardadas en segundo plano
+session_store = SessionStore().start() if config.SESSION_CONFIG['enabled'] else None
 
 # UI mejorada
 root = tk.Tk()
@@ -121,33 +164,6 @@ def run_icon():
 threading.Thread(target=run_icon, daemon=True).start()
 
 # Función: diagnosticar dispositivos de audio
-def get_best_audio_device():
-    """Encontrar el mejor dispositivo para capturar audio del sistema"""
-    devices = sd.query_devices()
-    
-    # Prioridades de dispositivos (en orden)
-    priorities = [
-        "Microsoft Sound Mapper",  # Captura TODO el audio del sistema
-        "Primary Sound Capture",  # Alternativa
-        "Mezcla estéreo",         # Para audio Realtek
-        "Stereo Mix"              # Inglés
-    ]
-    
-    for priority in priorities:
-        for i, device in enumerate(devices):
-            if (device['max_input_channels'] > 0 and 
-                priority.lower() in device['name'].lower()):
-                print(f"✅ Dispositivo seleccionado: ID {i} - {device['name']}")
-                return i
-    
-    # Si no encuentra ninguno, usar el primero con entrada
-    for i, device in enumerate(devices):
-        if device['max_input_channels'] > 0:
-            print(f"⚠️ Usando dispositivo por defecto: ID {i} - {device['name']}")
-            return i
-    
-    raise Exception("No se encontró ningún dispositivo de entrada de audio")
-
 def diagnose_audio():
     """Mostrar dispositivos de audio disponibles para debugging"""
     try:
@@ -167,7 +183,7 @@ def diagnose_audio():
         print("=" * 50)
         
         # Recomendar dispositivo
-        best_device = get_best_audio_device()
+        best_device = best_input_device()
         return best_device
         
     except Exception as e:
@@ -176,49 +192,39 @@ def diagnose_audio():
 
 # Hilo: captura de audio en tiempo real (streaming continuo)
 def audio_stream_callback(indata, frames, time, status):
-    """Callback para captura continua de audio"""
+    """Callback para captura continua de audio (sin locks ni asignaciones)"""
     if status:
         print(f"Audio status: {status}")
+        if status.input_overflow:
+            metrics.inc('input_overflows_total')
     
-    # Manejar tanto mono como estéreo
-    if len(indata.shape) == 2 and indata.shape[1] > 1:
-        # Estéreo -> mono
-        mono_data = indata.mean(axis=1)
-    else:
-        # Ya es mono o tiene forma extraña
-        mono_data = indata.flatten() if len(indata.shape) > 1 else indata
+    # Estéreo -> mono y 44.1 kHz -> 16 kHz (el filtro conserva estado entre bloques)
+    audio_16k = capture_resampler.process(indata)
     
-    # Añadir al stream si hay suficiente nivel de audio
-    audio_level = np.max(np.abs(mono_data))
-    if audio_level > 0.0005:  # Umbral más bajo para Bluetooth
-        try:
-            # Convertir a float64 para procesamiento interno
-            audio_stream.put_nowait(mono_data.astype(np.float64))
-        except queue.Full:
-            # Si la cola está llena, remover el más viejo
-            try:
-                audio_stream.get_nowait()
-                audio_stream.put_nowait(mono_data.astype(np.float64))
-            except:
-                pass
+    # Todo el audio va al buffer: el VAD decide qué se transcribe
+    audio_ring.write(audio_16k)
+    capture_clock.record(audio_ring.write_pos, time, frames, FS_CAPTURE)
 
 def start_audio_stream():
     """Iniciar stream continuo de audio"""
     global stream
+    source = config.AUDIO_CONFIG['source']
+    if source != 'device':
+        # Reproducir un WAV por el mismo callback (pruebas sin dispositivo)
+        stream = create_source(source, audio_stream_callback, FS_CAPTURE, channels=CHANNELS_CAPTURE,
+                               blocksize=CHUNK_SIZE, speed=config.AUDIO_CONFIG['replay_speed'])
+        stream.start()
+        print(f"🎵 Reproduciendo {source}")
+        return
     try:
         # Detectar automáticamente el mejor dispositivo
-        best_device = get_best_audio_device()
+        best_device = best_input_device()
         device_info = sd.query_devices(best_device)
         print(f"🎯 Usando dispositivo: {device_info['name']}")
         
-        stream = sd.InputStream(
-            samplerate=FS_CAPTURE,
-            channels=min(CHANNELS_CAPTURE, device_info['max_input_channels']),  # Ajustar canales
-            device=best_device,
-            callback=audio_stream_callback,
-            blocksize=CHUNK_SIZE,
-            dtype='float32'  # Formato compatible
-        )
+        stream = create_source(source, audio_stream_callback, FS_CAPTURE,
+                               channels=min(CHANNELS_CAPTURE, device_info['max_input_channels']),  # Ajustar canales
+                               blocksize=CHUNK_SIZE, device=best_device)
         stream.start()
         print("🎵 Stream de audio iniciado correctamente")
         
@@ -228,14 +234,8 @@ def start_audio_stream():
         try:
             print("🔄 Intentando con dispositivo original...")
             device_info = sd.query_devices(DEVICE_ID)
-            stream = sd.InputStream(
-                samplerate=FS_CAPTURE,
-                channels=CHANNELS_CAPTURE,
-                device=DEVICE_ID,
-                callback=audio_stream_callback,
-                blocksize=CHUNK_SIZE,
-                dtype='float32'
-            )
+            stream = create_source(source, audio_stream_callback, FS_CAPTURE, channels=CHANNELS_CAPTURE,
+                                   blocksize=CHUNK_SIZE, device=DEVICE_ID)
             stream.start()
             print("🎵 Stream iniciado con dispositivo de respaldo")
         except Exception as e2:
@@ -252,97 +252,65 @@ def stop_audio_stream():
 
 # Hilo: procesamiento con contexto conversacional
 def contextual_audio_processor():
-    """Procesa audio manteniendo contexto de la conversación"""
-    global audio_buffer, last_transcription_time
+    """Envía a transcripción los enunciados detectados (VAD), descartando el silencio"""
+    global last_transcription_time
     
-    window_frames = int(FS_CAPTURE * AUDIO_WINDOW_SECONDS)  # 15 segundos de audio
-    overlap_frames = int(FS_CAPTURE * CONTEXT_OVERLAP_SECONDS)  # 5 segundos overlap
+    # Enunciados de hasta AUDIO_WINDOW_SECONDS, cortados en las pausas naturales
+    segmenter = VoiceSegmenter(audio_ring, FS_MODEL, max_segment_seconds=AUDIO_WINDOW_SECONDS)
     
     while not stop_flag.is_set():
         try:
-            # Obtener chunk de audio del stream
-            chunk = audio_stream.get(timeout=0.1)
+            segments = segmenter.process()
+            if not segments:
+                time.sleep(0.1)
+                continue
             
-            with buffer_lock:
-                # Añadir al buffer acumulativo
-                audio_buffer = np.concatenate([audio_buffer, chunk])
+            for start_pos, end_pos, forced in segments:
+                current_time = time.time()
+                window_seconds = (end_pos - start_pos) / FS_MODEL
                 
-                # Verificar si tenemos suficiente audio para una ventana completa
-                if len(audio_buffer) >= window_frames:
-                    current_time = time.time()
-                    
-                    # Tomar ventana de 15 segundos
-                    window_audio = audio_buffer[:window_frames].copy()
-                    
-                    # Mantener overlap de 5 segundos para la próxima ventana
-                    audio_buffer = audio_buffer[window_frames - overlap_frames:]
+                # Enviar a transcripción (en memoria, sin archivo temporal).
+                # Se copia porque el buffer circular se sobrescribe mientras espera en la cola.
+                context_info = SegmentTrace(
+                    capture_clock.time_at(end_pos),
+                    audio=audio_ring.read(start_pos, end_pos, copy=True),
+                    span=(start_pos, end_pos),
+                    timestamp=current_time,
+                    window_seconds=window_seconds
+                ).mark('closed')
+                
+                # Si Whisper no da abasto la cola une o descarta según su política
+                if text_stream.put(context_info):
+                    last_transcription_time = current_time
                     
-                    # Solo procesar si ha pasado tiempo suficiente (evitar spam)
-                    if current_time - last_transcription_time >= 3:  # Mínimo 3 segundos entre transcripciones
-                        # Resample y enviar a transcripción
-                        audio_16k = resample_audio(window_audio, FS_CAPTURE, FS_MODEL)
-                        
-                        # Crear archivo temporal
-                        ts = int(current_time * 1000)
-                        tmp_path = f"temp_context_{ts}.wav"
-                        sf.write(tmp_path, audio_16k, FS_MODEL, subtype='PCM_16')
-                        
-                        # Enviar con información de contexto
-                        context_info = {
-                            'audio_file': tmp_path,
-                            'timestamp': current_time,
-                            'window_seconds': AUDIO_WINDOW_SECONDS
-                        }
-                        
-                        try:
-                            text_stream.put_nowait(context_info)
-                            last_transcription_time = current_time
-                            
-                            root.after(0, lambda: label_status.config(
-                                text=f"Estado: Procesando ventana de {AUDIO_WINDOW_SECONDS}s con contexto 🧠", fg="#3498db"))
-                        except queue.Full:
-                            # Remover el más viejo si la cola está llena
-                            try:
-                                old_context = text_stream.get_nowait()
-                                try:
-                                    os.remove(old_context['audio_file'])
-                                except:
-                                    pass
-                                text_stream.put_nowait(context_info)
-                            except:
-                                pass
+                    root.after(0, lambda w=window_seconds: label_status.config(
+                        text=f"Estado: Procesando enunciado de {w:.1f}s con contexto 🧠", fg="#3498db"))
                     
-        except queue.Empty:
-            continue
+        except BufferOverrun as e:
+            # El procesador se quedó atrás: el segmentador salta a lo más reciente
+            metrics.inc('ring_overruns_total', stage='context')
+            print(f"⚠️ Audio perdido en procesador contextual: {e}")
         except Exception as e:
             print(f"Error en procesador contextual: {e}")
-
-def resample_audio(audio_data, fs_in, fs_out):
-    """Resample audio de manera eficiente"""
-    if fs_in == fs_out:
-        return audio_data.astype(np.float32)
     
-    ratio = fs_out / fs_in
-    new_len = int(len(audio_data) * ratio)
-    x_old = np.linspace(0, 1, len(audio_data), endpoint=False)
-    x_new = np.linspace(0, 1, new_len, endpoint=False)
-    resampled = np.interp(x_new, x_old, audio_data)
-    return resampled.astype(np.float32)
+    print(f"🔇 Audio con voz enviado a Whisper: {segmenter.speech_ratio():.0%}")
 
 # Hilo: transcripción contextual con Whisper
 def contextual_transcribe_loop():
-    """Transcribir audio manteniendo contexto conversacional"""
-    global conversation_context
-    
+    """Transcribir audio manteniendo contexto conversacional
+
+    Los enunciados que ya esperan en la cola (Whisper se quedó atrás) van
+    juntos en un trabajo: una pasada del codificador para todos.
+    """
+    max_batch = config.INFERENCE_CONFIG['batch']['max_batch_size']
     while not stop_flag.is_set():
-        try:
-            # Obtener información contextual del stream
-            context_info = text_stream.get(timeout=0.5)
-        except queue.Empty:
+        # Sin esperar a que lleguen más: solo lo acumulado
+        batch = drain_batch(text_stream, max_batch, 0, timeout=0.5)
+        if not batch:
             continue
         
         try:
-            # Crear prompt de contexto basado en transcripciones anteriores
+            # Crear prompt de contexto basado en transcripciones anteriores (el mismo para todo el lote)
             context_prompt = ""
             if conversation_context:
                 # Usar las últimas 3 transcripciones como contexto
@@ -353,65 +321,94 @@ def contextual_transcribe_loop():
                 context_prompt = "This is the beginning of a conversation in English:"
             
             # Transcribir con Whisper usando contexto
-            print(f"🧠 Transcribiendo ventana de {AUDIO_WINDOW_SECONDS}s con contexto...")
-            result = model.transcribe(
-                context_info['audio_file'], 
-                language="en", 
-                fp16=False, 
-                task="transcribe", 
-                verbose=False,
-                initial_prompt=context_prompt,
-                condition_on_previous_text=True  # Usar contexto anterior
-            )
-            
-            text = result.get("text", "").strip()
-            
-            if text and len(text) > 5:  # Filtro para textos significativos
-                # Limpiar repeticiones comunes
-                if not is_repetitive_text(text):
-                    print(f"🎤 Transcripción contextual: '{text}'")
-                    
-                    # Añadir al contexto conversacional
-                    conversation_context.append(text)
-                    
-                    # Mantener solo el contexto reciente
-                    if len(conversation_context) > MAX_CONTEXT_HISTORY:
-                        conversation_context = conversation_context[-MAX_CONTEXT_HISTORY:]
-                    
-                    # Crear texto acumulativo para mostrar
-                    display_text = " ".join(conversation_context[-3:])  # Últimas 3 frases
-                    
-                    # Actualizar UI inmediatamente
-                    root.after(0, lambda t=display_text: label_original.config(text=t))
-                    
-                    # Enviar a traducción con contexto
-                    translation_context_info = {
-                        'text': text,
-                        'full_context': display_text,
-                        'timestamp': context_info['timestamp']
-                    }
-                    
-                    try:
-                        translation_stream.put_nowait(translation_context_info)
-                    except queue.Full:
-                        try:
-                            translation_stream.get_nowait()
-                            translation_stream.put_nowait(translation_context_info)
-                        except:
-                            pass
-                else:
-                    print(f"⏭️ Texto repetitivo ignorado: '{text}'")
+            options = {
+                'language': "en",
+                'fp16': False,
+                'task': "transcribe",
+                'verbose': False,
+                'initial_prompt': context_prompt,
+                'condition_on_previous_text': True  # Usar contexto anterior
+            }
+            for context_info in batch:
+                context_info.mark('transcribe_start')
+            if len(batch) == 1:
+                context_info = batch[0]
+                print(f"🧠 Transcribiendo enunciado de {context_info['window_seconds']:.1f}s con contexto...")
+                results = [transcription_pool.transcribe(context_info['audio'], FS_MODEL, tag="context",
+                                                         **options)]
             else:
-                print(f"⏭️ Texto muy corto ignorado: '{text}'")
-                
+                seconds = sum(context_info['window_seconds'] for context_info in batch)
+                print(f"🧠 Transcribiendo {len(batch)} enunciados ({seconds:.1f}s) en un lote con contexto...")
+                results = transcription_pool.submit_batch(
+                    [(context_info['audio'], FS_MODEL, "context", window_options(context_info, options))
+                     for context_info in batch]).result()
         except Exception as e:
             print(f"Error en transcripción contextual: {e}")
-        finally:
-            # Limpiar archivo temporal
+            continue
+        
+        for context_info, result in zip(batch, results):
             try:
-                os.remove(context_info['audio_file'])
-            except:
-                pass
+                publish_transcription(context_info, result)
+            except Exception as e:
+                print(f"Error en transcripción contextual: {e}")
+
+def window_options(context_info, options):
+    """Opciones con el log-mel de la ventana si su audio sigue en el buffer circular
+
+    Dos enunciados unidos por la cola no tienen posición (llevan una pausa
+    insertada): el worker calcula su log-mel.
+    """
+    span = context_info.get('span')
+    if audio_features is None or span is None:
+        return options
+    try:
+        return dict(options, mel=audio_features.window(*span))
+    except BufferOverrun:
+        return options
+
+def publish_transcription(context_info, result):
+    """Filtrar una transcripción, añadirla al contexto y mandarla a traducir"""
+    global conversation_context
+    
+    text = result.get("text", "").strip()
+    context_info.mark('transcribe_end')
+    
+    if text and len(text) > 5:  # Filtro para textos significativos
+        # Limpiar repeticiones comunes
+        if not is_repetitive_text(text):
+            print(f"🎤 Transcripción contextual: '{text}'")
+            
+            # Añadir al contexto conversacional
+            conversation_context.append(text)
+            
+            # Mantener solo el contexto reciente
+            if len(conversation_context) > MAX_CONTEXT_HISTORY:
+                conversation_context = conversation_context[-MAX_CONTEXT_HISTORY:]
+            
+            # Crear texto acumulativo para mostrar
+            display_text = " ".join(conversation_context[-3:])  # Últimas 3 frases
+            
+            # Actualizar UI inmediatamente
+            root.after(0, lambda t=display_text: label_original.config(text=t))
+            
+            # Enviar a traducción con contexto
+            avg_logprob, no_speech_prob = result_confidence(result)
+            translation_context_info = context_info.follow(
+                text=text,
+                full_context=display_text,
+                timestamp=context_info['timestamp'],
+                window_seconds=context_info['window_seconds'],
+                avg_logprob=avg_logprob,
+                no_speech_prob=no_speech_prob,
+                model=result.get('model')
+            )
+            
+            if not translation_stream.put(translation_context_info):
+                print(f"⚠️ Cola de traducción llena, texto descartado: {text[:30]}")
+        else:
+            print(f"⏭️ Texto repetitivo ignorado: '{text}'")
+    else:
+        print(f"⏭️ Texto muy corto ignorado: '{text}'")
 
 def is_repetitive_text(text):
     """Detectar si el texto es repetitivo o sin sentido"""
@@ -432,50 +429,49 @@ def is_repetitive_text(text):
     
     return False
 
-# Hilo: traducción contextual
-def contextual_translation_loop():
-    """Traducir manteniendo contexto conversacional"""
+# Traducción contextual: workers concurrentes, resultados entregados en orden
+def on_translation(seq, context_info, spanish_text, skipped):
+    """Recibir cada traducción en orden de secuencia y actualizar el contexto"""
     global translation_context
     
-    while not stop_flag.is_set():
-        try:
-            # Obtener información contextual de traducción
-            context_info = translation_stream.get(timeout=0.5)
-        except queue.Empty:
-            continue
-        
-        try:
-            english_text = context_info['text']
-            full_context = context_info['full_context']
-            
-            print(f"🔄 Traduciendo con contexto: '{english_text}'")
-            
-            # Traducir el texto actual
-            spanish_text = translator.translate(english_text)
-            print(f"✅ Traducción: '{spanish_text}'")
-            
-            # Añadir al contexto de traducciones
-            translation_context.append(spanish_text)
-            
-            # Mantener contexto limitado
-            if len(translation_context) > MAX_CONTEXT_HISTORY:
-                translation_context = translation_context[-MAX_CONTEXT_HISTORY:]
-            
-            # Crear texto de traducción acumulativo
-            display_translation = " ".join(translation_context[-3:])  # Últimas 3 traducciones
-            
-            # Actualizar UI con contexto completo
-            root.after(0, lambda t=display_translation: label_translation.config(text=t))
-            root.after(0, lambda: label_status.config(text="Estado: 🧠 Traducción contextual", fg="#27ae60"))
-            
-        except Exception as e:
-            print(f"Error en traducción contextual: {e}")
-            root.after(0, lambda: label_status.config(text="Error de traducción", fg="#e74c3c"))
+    if session_store is not None and session_store.started is not None:
+        # Posición aproximada en la sesión: el enunciado terminó al encolarse
+        end = context_info['timestamp'] - session_store.started
+        session_store.record_segment(context_info['text'], spanish_text,
+                                     start=max(end - context_info['window_seconds'], 0), end=end,
+                                     created=context_info['timestamp'], avg_logprob=context_info['avg_logprob'],
+                                     no_speech_prob=context_info['no_speech_prob'], model=context_info['model'])
+    
+    if spanish_text is None:
+        motivo = "plazo vencido" if skipped else "error"
+        print(f"⏭️ Traducción #{seq} omitida ({motivo}): '{context_info['text']}'")
+        root.after(0, lambda: label_status.config(text="Traducción omitida (servicio lento)", fg="#f39c12"))
+        return
+    
+    print(f"✅ Traducción #{seq}: '{spanish_text}'")
+    
+    # Añadir al contexto de traducciones
+    translation_context.append(spanish_text)
+    
+    # Mantener contexto limitado
+    if len(translation_context) > MAX_CONTEXT_HISTORY:
+        translation_context = translation_context[-MAX_CONTEXT_HISTORY:]
+    
+    # Crear texto de traducción acumulativo
+    display_translation = " ".join(translation_context[-3:])  # Últimas 3 traducciones
+    
+    # Actualizar UI con contexto completo
+    def show(t=display_translation):
+        label_translation.config(text=t)
+        metrics.finish(context_info)
+    root.after(0, show)
+    root.after(0, lambda: label_status.config(text="Estado: 🧠 Traducción contextual", fg="#27ae60"))
 
 # Funciones de control para contexto conversacional
 def start_transcription():
     """Iniciar captura y traducción contextual"""
-    global transcribing, conversation_context, translation_context, audio_buffer, last_transcription_time
+    global transcribing, conversation_context, translation_context, last_transcription_time
+    global translation_pool
     if transcribing:
         return
     
@@ -484,29 +480,16 @@ def start_transcription():
     translation_context.clear()
     last_transcription_time = 0
     
-    with buffer_lock:
-        audio_buffer = np.array([], dtype=np.float64)
+    # El stream está detenido: se puede reiniciar el buffer sin carreras
+    capture_resampler.reset()
+    audio_ring.reset()
+    if audio_features is not None:
+        audio_features.reset()
+    capture_clock.reset()
     
     # Limpiar colas
-    while not audio_stream.empty():
-        try:
-            audio_stream.get_nowait()
-        except:
-            break
-    while not text_stream.empty():
-        try:
-            context_info = text_stream.get_nowait()
-            try:
-                os.remove(context_info['audio_file'])
-            except:
-                pass
-        except:
-            break
-    while not translation_stream.empty():
-        try:
-            translation_stream.get_nowait()
-        except:
-            break
+    text_stream.clear()
+    translation_stream.clear()
     
     transcribing = True
     stop_flag.clear()
@@ -514,6 +497,9 @@ def start_transcription():
     # Diagnóstico inicial
     diagnose_audio()
     
+    if session_store is not None:
+        session_store.begin_session(source=config.AUDIO_CONFIG['source'], model=transcription_pool.model_size)
+    
     try:
         # Iniciar stream de audio continuo
         start_audio_stream()
@@ -521,9 +507,11 @@ def start_transcription():
         # Iniciar hilos de procesamiento contextual
         threading.Thread(target=contextual_audio_processor, daemon=True).start()
         threading.Thread(target=contextual_transcribe_loop, daemon=True).start()
-        threading.Thread(target=contextual_translation_loop, daemon=True).start()
+        translation_pool = OrderedTranslationPool(model_loader.batch_translator, translation_stream, on_translation,
+                                                  stop_flag, text_of=lambda info: info['text'])
+        translation_pool.start()
         
-        label_status.config(text=f"Estado: 🧠 Conversación contextual iniciada ({AUDIO_WINDOW_SECONDS}s ventanas)", fg="#27ae60")
+        label_status.config(text=f"Estado: 🧠 Conversación contextual iniciada (enunciados de hasta {AUDIO_WINDOW_SECONDS}s)", fg="#27ae60")
         
     except Exception as e:
         label_status.config(text=f"Error al iniciar: {str(e)[:50]}", fg="#e74c3c")
@@ -537,6 +525,8 @@ def stop_transcription():
     
     # Detener stream
     stop_audio_stream()
+    if session_store is not None:
+        session_store.end_session()
     
     # Mostrar resumen final
     if conversation_context:
@@ -546,6 +536,23 @@ def stop_transcription():
             print("ESPAÑOL:", " ".join(translation_context[-5:]))
         print("=" * 40)
     
+    if translation_pool is not None:
+        pool_stats = translation_pool.stats()
+        print(f"🌐 Traducciones: {pool_stats['delivered']} entregadas, {pool_stats['skipped']} omitidas "
+              f"({pool_stats['workers']} workers)")
+    
+    inference_stats = transcription_pool.stats()
+    print(f"🧵 Whisper: {inference_stats['completed']} transcripciones, {inference_stats['failed']} fallidas, "
+          f"{inference_stats['restarts']} reinicios de workers")
+    if model_loader.translator is not None:
+        cache_stats = model_loader.translator.stats()
+        print(f"💾 Caché de traducción: {cache_stats['memory_hits'] + cache_stats['disk_hits']} aciertos, "
+              f"{cache_stats['misses']} fallos ({cache_stats['hit_rate']:.0%})")
+        backend_stats = model_loader.translator.translator.stats()
+        print(f"🌍 Traductor {backend_stats['backend']}: {backend_stats['avg_latency_ms']:.0f} ms/petición, "
+              f"{backend_stats['items_per_second']:.1f} segmentos/s")
+    metrics.print_latency_summary()
+    
     label_status.config(text="Estado: Detenido", fg="#e74c3c")
     label_original.config(text="El audio transcrito aparecerá aquí...")
     label_translation.config(text="La traducción aparecerá aquí...")
@@ -575,9 +582,35 @@ btn_diagnose = tk.Button(button_frame, text="🔧 Diagnosticar Audio", command=d
 btn_diagnose.pack(side="left", padx=10)
 
 # Info footer
-info_label = tk.Label(root, text="🧠 Ventanas de 15s con contexto conversacional - Mantiene historial de la conversación", 
+info_label = tk.Label(root, text="🧠 Enunciados detectados por voz con contexto conversacional - Mantiene historial de la conversación", 
                      font=("Arial", 9), fg="#95a5a6", bg="#2c3e50")
 info_label.pack(side="bottom", pady=5)
 
+def refresh_loading_status():
+    """Mostrar el progreso de carga y habilitar el inicio cuando los modelos estén listos"""
+    progress = model_loader.progress()
+    error = model_loader.failed()
+    if error:
+        label_status.config(text=f"❌ Error cargando modelos: {error[:50]}", fg="#e74c3c")
+    elif model_loader.ready():
+        label_status.config(text="Estado: Listo", fg="#27ae60")
+        btn_start.config(state=tk.NORMAL)
+    else:
+        label_status.config(text=progress, fg="#f39c12")
+        root.after(300, refresh_loading_status)
+
+def start_loading():
+    """Lanzar la carga de modelos con la ventana ya dibujada"""
+    model_loader.start()
+    refresh_loading_status()
+
 if __name__ == "__main__":
-    root.mainloop()
\ No newline at end of file
+    metrics_exporter = metrics.start_exporter()
+    btn_start.config(state=tk.DISABLED)
+    root.after(100, start_loading)
+    root.mainloop()
+    if session_store is not None:
+        session_store.close()
+    transcription_pool.close()
+    if metrics_exporter is not None:
+        metrics_exporter.close()
\ No newline at end of file
@@ -1,53 +1,47 @@
 #!/usr/bin/env python3
 """
 Sistema Híbrido de Traducción de Audio EN→ES
-- Traducción en tiempo real (sin contexto, cada 3s)
+- Traducción en tiempo real (sin contexto, por enunciado detectado con VAD)
 - Análisis contextual completo (cada 15 minutos)
 - Detección de pausas para respetar el habla natural
 """
 
 import tkinter as tk
 from tkinter import scrolledtext
-import sounddevice as sd
-import soundfile as sf
-import whisper
-import numpy as np
-import queue
 import threading
 import time as time_module
-import os
 import pystray
 from PIL import Image, ImageDraw
-from deep_translator import GoogleTranslator
 
 import config
+import metrics
+from audio_sources import best_input_device, create_source
+from inference_workers import TranscriptionPool
+from model_loader import ModelLoader
+from multi_stream import MultiStreamManager
+from pipeline import HybridPipeline
+from session_store import SessionStore, format_offset
+from transcript_view import TranscriptView
 
-# Configuración de Whisper y Traductor
-print("🚀 Cargando modelos...")
-whisper_model = whisper.load_model("base")
-translator = GoogleTranslator(source='en', target='es')
-print("✅ Modelos cargados")
+# Whisper y Traductor: se cargan en segundo plano con la ventana ya visible
+transcription_pool = TranscriptionPool()  # Whisper (WHISPER_CONFIG) en procesos worker
+model_loader = ModelLoader(transcription_pool)
 
-# Variables globales para el sistema híbrido dual
-audio_stream = queue.Queue(maxsize=50)
-realtime_queue = queue.Queue(maxsize=10)
-context_queue = queue.Queue(maxsize=5)
+# Captura → VAD → Whisper → traducción (pipeline.py); la ventana es un suscriptor más.
+# Con AUDIO_CONFIG['streams'], un pipeline por fuente sobre el mismo Whisper (multi_stream.py)
+AUDIO_BLOCK_SIZE = 1024
+streams = config.AUDIO_CONFIG['streams']
+if streams:
+    pipeline = MultiStreamManager(transcription_pool, model_loader, streams, block_size=AUDIO_BLOCK_SIZE)
+else:
+    pipeline = HybridPipeline(transcription_pool, model_loader, block_size=AUDIO_BLOCK_SIZE)
 transcribing = False
-stop_flag = threading.Event()
 
-# Buffers duales
-realtime_buffer = np.array([], dtype=np.float64)
-context_buffer = np.array([], dtype=np.float64)
-buffer_lock = threading.Lock()
-
-# Control de tiempo
-last_realtime_process = 0
-last_context_process = 0
-context_start_time = 0
-
-# Detector de pausas
-silence_start_time = 0
-is_in_silence = False
+# Cada sesión (inicio → detener) se guarda en segundo plano (session_store.py)
+session_store = None
+if config.SESSION_CONFIG['enabled']:
+    session_store = SessionStore().start()
+    pipeline.subscribe(session_store.on_event)
 
 # Configuración de la ventana principal
 root = tk.Tk()
@@ -79,6 +73,21 @@ stop_button = tk.Button(control_frame, text="⏹️ Detener",
                        command=lambda: stop_hybrid_system())
 stop_button.pack(side=tk.LEFT, padx=5)
 
+# Búsqueda en todas las sesiones guardadas (índice FTS5 de session_store.py)
+search_entry = tk.Entry(control_frame, font=("Arial", 11), width=24, bg="#34495e", fg="#ecf0f1",
+                        insertbackground="#ecf0f1")
+search_entry.pack(side=tk.LEFT, padx=(20, 5))
+search_entry.bind("<Return>", lambda event: search_sessions())
+
+search_button = tk.Button(control_frame, text="🔍 Buscar", font=("Arial", 11), bg="#3498db", fg="white",
+                          command=lambda: search_sessions())
+search_button.pack(side=tk.LEFT)
+
+# Hipótesis en curso (streaming): texto confirmado + parcial sin confirmar
+partial_label = tk.Label(root, text="", font=("Arial", 11, "italic"), fg="#95a5a6", bg="#2c3e50",
+                         wraplength=850, justify=tk.LEFT, anchor="w")
+partial_label.pack(fill="x", padx=20)
+
 # Área de texto con scroll
 text_frame = tk.Frame(root, bg="#2c3e50")
 text_frame.pack(pady=10, padx=20, fill="both", expand=True)
@@ -90,306 +99,109 @@ text_area = scrolledtext.ScrolledText(text_frame,
                                      state=tk.DISABLED)
 text_area.pack(fill="both", expand=True)
 
-def audio_callback(indata, frames, time, status):
-    """Callback de audio que procesa el stream continuo con detector de pausas"""
-    global realtime_buffer, context_buffer, last_realtime_process, last_context_process
-    global silence_start_time, is_in_silence, context_start_time
-    
-    if stop_flag.is_set():
-        return
-    
-    if status:
-        print(f"Audio callback status: {status}")
-    
-    # Convertir audio y detectar nivel de volumen
-    audio_data = indata[:, 0] if indata.ndim > 1 else indata
-    audio_level = np.sqrt(np.mean(audio_data**2))
-    
-    # Detector de pausas/silencio
-    current_time = time_module.time()
-    
-    if audio_level < config.SILENCE_THRESHOLD:
-        if not is_in_silence:
-            silence_start_time = current_time
-            is_in_silence = True
-    else:
-        is_in_silence = False
-    
-    # Solo procesar si no estamos en una pausa activa
-    silence_duration = current_time - silence_start_time if is_in_silence else 0
-    
-    try:
-        with buffer_lock:
-            # Agregar a ambos buffers
-            realtime_buffer = np.concatenate([realtime_buffer, audio_data])
-            context_buffer = np.concatenate([context_buffer, audio_data])
-            
-            # Procesar tiempo real cada 3 segundos (si no hay pausa activa)
-            if (current_time - last_realtime_process >= config.REALTIME_WINDOW_SECONDS and 
-                not (is_in_silence and silence_duration < config.SILENCE_DURATION)):
-                
-                if len(realtime_buffer) > 0:
-                    # Copiar buffer para procesamiento
-                    process_buffer = realtime_buffer.copy()
-                    
-                    # Limpiar buffer para tiempo real
-                    realtime_buffer = np.array([], dtype=np.float64)
-                    last_realtime_process = current_time
-                    
-                    # Agregar a cola sin bloquear
-                    try:
-                        realtime_queue.put(('realtime', process_buffer), block=False)
-                    except queue.Full:
-                        pass
-            
-            # Procesar contexto cada 15 minutos
-            context_interval_seconds = config.CONTEXT_INTERVAL_MINUTES * 60
-            if current_time - last_context_process >= context_interval_seconds:
-                if len(context_buffer) > 0:
-                    # Copiar buffer completo para análisis contextual
-                    full_context_buffer = context_buffer.copy()
-                    
-                    # Guardar tiempo de inicio para referencia
-                    context_period = context_start_time if context_start_time > 0 else last_context_process
-                    last_context_process = current_time
-                    
-                    # Reset buffer contextual para siguiente período
-                    context_buffer = np.array([], dtype=np.float64)
-                    context_start_time = current_time
-                    
-                    # Agregar a cola contextual
-                    try:
-                        context_queue.put(('context', full_context_buffer, context_period, current_time), block=False)
-                    except queue.Full:
-                        pass
-                        
-    except Exception as e:
-        print(f"Error en audio callback: {e}")
+# Los resultados se vuelcan por lotes a ritmo fijo y el widget guarda solo las últimas líneas
+transcript = TranscriptView(root, text_area, status_label=status_label, partial_label=partial_label)
 
-def realtime_processor():
-    """Procesa audio en tiempo real (sin contexto)"""
-    while not stop_flag.is_set():
-        try:
-            # Obtener audio de la cola
-            queue_item = realtime_queue.get(timeout=1)
-            if queue_item is None:
-                break
-                
-            process_type, audio_data = queue_item
-            
-            if len(audio_data) == 0:
-                continue
-            
-            # Transcribir audio
-            temp_file = "temp_realtime_audio.wav"
-            sf.write(temp_file, audio_data, config.SAMPLE_RATE)
-            
-            print(f"🎤 Procesando tiempo real... ({len(audio_data)/config.SAMPLE_RATE:.1f}s)")
-            
-            result = whisper_model.transcribe(
-                temp_file,
-                language="en",
-                task="transcribe",
-                fp16=False,
-                verbose=False
-            )
-            
-            text = result["text"].strip()
-            if text:
-                print(f"📝 Transcripción RT: {text}")
-                
-                # Traducir inmediatamente
-                try:
-                    translated = translator.translate(text)
-                    print(f"🔄 Traducción RT: {translated}")
-                    
-                    # Actualizar GUI con resultado en tiempo real
-                    update_gui_realtime(text, translated)
-                    
-                except Exception as e:
-                    print(f"Error traduciendo tiempo real: {e}")
-            
-            # Limpiar archivo temporal
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-                
-        except queue.Empty:
-            continue
-        except Exception as e:
-            print(f"Error en procesador tiempo real: {e}")
+def on_pipeline_event(event):
+    """Suscriptor de la GUI: cada resultado del pipeline se muestra en el hilo de Tk"""
+    if event['type'] == 'segment':
+        update_gui_realtime(event['text'], event['translation'] or "(traducción no disponible)", event['trace'],
+                            event.get('source'))
+    elif event['type'] == 'partial':
+        update_gui_partial(event['committed'], event['partial'])
+    elif event['type'] == 'context':
+        update_gui_context(event['text'], event['translation'], event['duration_minutes'])
 
-def context_processor():
-    """Procesa contexto completo cada 15 minutos"""
-    while not stop_flag.is_set():
-        try:
-            # Obtener contexto de la cola
-            queue_item = context_queue.get(timeout=1)
-            if queue_item is None:
-                break
-                
-            process_type, audio_data, start_time, end_time = queue_item
-            duration_minutes = (end_time - start_time) / 60
-            
-            if len(audio_data) == 0:
-                continue
-            
-            print(f"\n🧠 PROCESANDO CONTEXTO COMPLETO ({duration_minutes:.1f} minutos)")
-            
-            # Transcribir todo el contexto
-            temp_file = "temp_context_audio.wav"
-            sf.write(temp_file, audio_data, config.SAMPLE_RATE)
-            
-            result = whisper_model.transcribe(
-                temp_file,
-                language="en",
-                task="transcribe",
-                fp16=False,
-                verbose=True
-            )
-            
-            full_text = result["text"].strip()
-            
-            if full_text:
-                print(f"📚 Transcripción contextual: {full_text[:200]}...")
-                
-                # Traducir con contexto completo
-                try:
-                    contextual_translation = translator.translate(full_text)
-                    print(f"🎯 Traducción contextual: {contextual_translation[:200]}...")
-                    
-                    # Actualizar GUI con análisis contextual
-                    update_gui_context(full_text, contextual_translation, duration_minutes)
-                    
-                except Exception as e:
-                    print(f"Error en traducción contextual: {e}")
-            
-            # Limpiar archivo temporal
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-                
-        except queue.Empty:
-            continue
-        except Exception as e:
-            print(f"Error en procesador contextual: {e}")
-
-def update_gui_realtime(text, translation):
-    """Actualiza GUI con resultado en tiempo real"""
-    def update():
-        text_area.config(state=tk.NORMAL)
-        timestamp = time_module.strftime("%H:%M:%S")
-        text_area.insert(tk.END, f"⚡ [{timestamp}] RT: {text} → {translation}\n")
-        text_area.see(tk.END)
-        text_area.config(state=tk.DISABLED)
-        
-        status_label.config(text=f"⚡ Tiempo real activo | Último: {text[:30]}...")
-    
-    root.after(0, update)
+pipeline.subscribe(on_pipeline_event)
+
+def update_gui_realtime(text, translation, trace=None, source=None):
+    """Actualiza GUI con resultado en tiempo real (se muestra en el próximo volcado)"""
+    timestamp = time_module.strftime("%H:%M:%S")
+    on_shown = (lambda: metrics.finish(trace)) if trace is not None else None
+    origin = f"{source} " if source else ""
+    transcript.append(f"⚡ [{timestamp}] {origin}RT: {text} → {translation}", on_shown=on_shown)
+    transcript.set_status(f"⚡ Tiempo real activo | Último: {text[:30]}...")
+
+def update_gui_partial(committed, partial):
+    """Muestra la frase en curso: lo confirmado y, entre corchetes, lo que aún puede cambiar"""
+    text = f"✍️ {committed} [{partial}]" if partial else (f"✍️ {committed}" if committed else "")
+    transcript.set_partial(text)
 
 def update_gui_context(text, translation, duration):
     """Actualiza GUI con análisis contextual"""
-    def update():
-        text_area.config(state=tk.NORMAL)
-        timestamp = time_module.strftime("%H:%M:%S")
-        text_area.insert(tk.END, f"\n🧠 [{timestamp}] CONTEXTO ({duration:.1f}min):\n")
-        text_area.insert(tk.END, f"📝 Original: {text[:100]}...\n")
-        text_area.insert(tk.END, f"🎯 Traducción contextual: {translation[:100]}...\n")
-        text_area.insert(tk.END, "-" * 80 + "\n\n")
-        text_area.see(tk.END)
-        text_area.config(state=tk.DISABLED)
-        
-        status_label.config(text=f"🧠 Análisis contextual completado ({duration:.1f} min)")
-    
-    root.after(0, update)
+    timestamp = time_module.strftime("%H:%M:%S")
+    transcript.append(f"\n🧠 [{timestamp}] CONTEXTO ({duration:.1f}min):\n"
+                      f"📝 Original: {text[:100]}...\n"
+                      f"🎯 Traducción contextual: {translation[:100]}...\n"
+                      + "-" * 80 + "\n\n")
+    transcript.set_status(f"🧠 Análisis contextual completado ({duration:.1f} min)")
 
-def get_best_audio_device():
-    """Encontrar el mejor dispositivo para capturar audio del sistema"""
-    devices = sd.query_devices()
-    
-    # Prioridades para dispositivos (orden de preferencia)
-    priorities = [
-        "Microsoft Sound Mapper",
-        "Primary Sound Capture",
-        "Mezcla estéreo",
-        "Stereo Mix"
-    ]
-    
-    for priority in priorities:
-        for i, device in enumerate(devices):
-            if (device['max_input_channels'] > 0 and 
-                priority.lower() in device['name'].lower()):
-                print(f"✅ Dispositivo seleccionado: ID {i} - {device['name']}")
-                return i
-    
-    # Si no encuentra ninguno, usar el primero disponible
-    for i, device in enumerate(devices):
-        if device['max_input_channels'] > 0:
-            print(f"⚠️ Usando dispositivo por defecto: ID {i} - {device['name']}")
-            return i
-    
-    raise Exception("No se encontró ningún dispositivo de entrada de audio")
+def search_sessions():
+    """Buscar en las sesiones guardadas (en un hilo) y mostrar los resultados en otra ventana"""
+    query = search_entry.get().strip()
+    if not query or session_store is None:
+        return
+
+    def run():
+        try:
+            results = session_store.search(query, limit=200)
+        except Exception as e:
+            print(f"Error buscando '{query}': {e}")
+            results = []
+        root.after(0, lambda: show_search_results(query, results))
+
+    threading.Thread(target=run, daemon=True).start()
+
+def show_search_results(query, results):
+    """Ventana con cada coincidencia: sesión, posición en el audio y texto"""
+    window = tk.Toplevel(root)
+    window.title(f"🔍 {query} — {len(results)} resultados")
+    window.geometry("800x500")
+    window.configure(bg="#2c3e50")
+    output = scrolledtext.ScrolledText(window, font=("Courier", 10), bg="#34495e", fg="#ecf0f1")
+    output.pack(fill="both", expand=True, padx=10, pady=10)
+    for result in results:
+        offset = format_offset(result['start_ms']) if result['start_ms'] is not None else "contexto"
+        output.insert(tk.END, f"{result['session_id']}  {offset}\n  {result['snippet']}\n")
+        if result['translation']:
+            output.insert(tk.END, f"  → {result['translation']}\n")
+        output.insert(tk.END, "\n")
+    if not results:
+        output.insert(tk.END, "Sin resultados\n")
+    output.config(state=tk.DISABLED)
 
 def start_hybrid_system():
     """Iniciar el sistema híbrido de traducción"""
-    global transcribing, last_realtime_process, last_context_process, context_start_time
-    global realtime_buffer, context_buffer
+    global transcribing
     
     if transcribing:
         return
     
     try:
-        # Resetear variables
-        stop_flag.clear()
         transcribing = True
         
-        current_time = time_module.time()
-        last_realtime_process = current_time
-        last_context_process = current_time
-        context_start_time = current_time
-        
-        with buffer_lock:
-            realtime_buffer = np.array([], dtype=np.float64)
-            context_buffer = np.array([], dtype=np.float64)
-        
-        # Obtener mejor dispositivo
-        device_id = get_best_audio_device()
-        
-        # Iniciar captura de audio
-        stream = sd.InputStream(
-            device=device_id,
-            channels=1,
-            samplerate=config.SAMPLE_RATE,
-            dtype='float32',
-            blocksize=1024,
-            callback=audio_callback
-        )
-        
-        # Iniciar procesadores en threads separados
-        realtime_thread = threading.Thread(target=realtime_processor, daemon=True)
-        context_thread = threading.Thread(target=context_processor, daemon=True)
-        
-        realtime_thread.start()
-        context_thread.start()
-        
-        # Iniciar stream de audio
-        stream.start()
-        
+        if streams:
+            if session_store is not None:
+                session_store.begin_session(source=", ".join(f"{spec['name']}={spec['source']}" for spec in streams),
+                                            model=transcription_pool.model_size)
+            pipeline.start()
+        else:
+            # Fuente de audio: dispositivo (el mejor disponible) o un WAV reproducido
+            source = config.AUDIO_CONFIG['source']
+            device_id = best_input_device() if source == 'device' else None
+            stream = create_source(source, pipeline.audio_callback, config.CAPTURE_SAMPLE_RATE, channels=1,
+                                   blocksize=AUDIO_BLOCK_SIZE, device=device_id,
+                                   speed=config.AUDIO_CONFIG['replay_speed'])
+            if session_store is not None:
+                session_store.begin_session(source=source, model=transcription_pool.model_size)
+            pipeline.start(stream)
         print("🎯 Sistema híbrido iniciado")
-        print(f"⚡ Tiempo real: cada {config.REALTIME_WINDOW_SECONDS}s")
-        print(f"🧠 Contexto: cada {config.CONTEXT_INTERVAL_MINUTES} minutos")
-        print(f"🔇 Silencio: {config.SILENCE_DURATION}s @ {config.SILENCE_THRESHOLD}")
         
         # Actualizar UI
         start_button.config(state=tk.DISABLED)
         stop_button.config(state=tk.NORMAL)
         status_label.config(text="🎯 Sistema híbrido ACTIVO", fg="#27ae60")
         
-        # Guardar referencia al stream
-        root.audio_stream = stream
-        
     except Exception as e:
         print(f"Error iniciando sistema: {e}")
         transcribing = False
@@ -405,17 +217,13 @@ def stop_hybrid_system():
         return
     
     try:
-        # Señalar detención
-        stop_flag.set()
         transcribing = False
-        
-        # Detener stream de audio
-        if hasattr(root, 'audio_stream'):
-            root.audio_stream.stop()
-            root.audio_stream.close()
-            del root.audio_stream
+        pipeline.stop()
+        if session_store is not None:
+            session_store.end_session()
         
         print("🛑 Sistema híbrido detenido")
+        pipeline.print_stats()
         
         # Actualizar UI
         start_button.config(state=tk.NORMAL)
@@ -435,7 +243,7 @@ def create_tray_icon():
 
 def on_quit(icon, item):
     """Cerrar aplicación desde bandeja"""
-    stop_flag.set()
+    pipeline.stop_flag.set()
     icon.stop()
     root.quit()
 
@@ -456,11 +264,40 @@ def on_closing():
 
 root.protocol("WM_DELETE_WINDOW", on_closing)
 
+def refresh_loading_status():
+    """Mostrar el progreso de carga y habilitar el inicio cuando los modelos estén listos"""
+    progress = model_loader.progress()
+    error = model_loader.failed()
+    if error:
+        status_label.config(text=f"❌ Error cargando modelos: {error[:60]}", fg="#e74c3c")
+    elif model_loader.ready():
+        status_label.config(text="✅ Modelos listos - Sistema detenido", fg="#27ae60")
+        start_button.config(state=tk.NORMAL)
+    else:
+        status_label.config(text=progress, fg="#f39c12")
+        root.after(300, refresh_loading_status)
+
+def start_loading():
+    """Lanzar la carga de modelos con la ventana ya dibujada"""
+    model_loader.start()
+    refresh_loading_status()
+
 if __name__ == "__main__":
     print("🎯 Sistema Híbrido de Traducción EN→ES")
-    print("⚡ Tiempo real: Traducciones inmediatas cada 3 segundos")
+    print("⚡ Tiempo real: Traducciones inmediatas por enunciado")
     print("🧠 Contexto: Análisis completo cada 15 minutos")
     print("🔇 Detección de pausas automática")
     print("=" * 60)
     
-    root.mainloop()
\ No newline at end of file
+    metrics_exporter = metrics.start_exporter()
+    start_button.config(state=tk.DISABLED)
+    transcript.start()
+    root.after(100, start_loading)
+    root.mainloop()
+    if metrics_exporter is not None:
+        metrics_exporter.close()
+    if session_store is not None:
+        session_store.close()
+    if streams:
+        pipeline.close()
+    transcription_pool.close()
\ No newline at end of file
@@ -0,0 +1,400 @@
+"""
+Métricas del pipeline: contadores, gauges, histogramas y trazas por segmento
+
+- Cada segmento lleva una SegmentTrace con el instante de cada etapa
+  (captura, cierre del enunciado, transcripción, traducción y pantalla). Al
+  mostrarse se registra el tiempo entre etapas y el total captura → pantalla.
+- El instante de captura sale del `time` que PortAudio pasa al callback
+  (inputBufferAdcTime), convertido al reloj local con CaptureClock.
+- Los gauges (profundidad de colas...) se leen con funciones registradas en
+  el momento de exportar, sin coste en el camino caliente.
+- MetricsExporter sirve /metrics (formato de texto de Prometheus) y
+  /metrics.json en un puerto local y guarda un snapshot JSON periódico.
+"""
+
+import bisect
+import json
+import numbers
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import config
+
+PREFIX = "audio_translator_"
+
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0)
+BATCH_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16)
+
+# nombre -> (tipo, ayuda, buckets)
+DEFINITIONS = {
+    'capture_to_display_seconds': ('histogram', "Latencia de extremo a extremo: captura del audio a pantalla",
+                                   LATENCY_BUCKETS),
+    'segment_stage_seconds': ('histogram', "Tiempo desde la etapa anterior hasta cada etapa de un segmento",
+                              LATENCY_BUCKETS),
+    'whisper_rtf': ('histogram', "Tiempo de decodificación de Whisper / duración del audio", RATIO_BUCKETS),
+    'whisper_queue_wait_seconds': ('histogram', "Espera de un trabajo de Whisper hasta tener worker",
+                                   LATENCY_BUCKETS),
+    'whisper_batch_size': ('histogram', "Segmentos por trabajo de Whisper en lote (de todos los flujos)",
+                           BATCH_BUCKETS),
+    'translation_rtt_seconds': ('histogram', "Duración de cada petición al backend de traducción",
+                                LATENCY_BUCKETS),
+    'queue_depth': ('gauge', "Elementos esperando en cada cola", None),
+    'queue_load': ('gauge', "Ocupación de cada cola en su unidad (segundos de audio, bytes o elementos)", None),
+    'queue_merges_total': ('counter', "Elementos unidos al anterior por la política merge", None),
+    'whisper_pending_jobs': ('gauge', "Trabajos de Whisper sin worker asignado", None),
+    'whisper_scheduled_segments': ('gauge', "Segmentos esperando lote en el planificador compartido", None),
+    'whisper_segments_total': ('counter', "Segmentos transcritos por el planificador, por flujo", None),
+    'whisper_quality_level': ('gauge', "Nivel de calidad de Whisper (0 = el configurado; más alto, más barato)",
+                              None),
+    'whisper_quality_switches_total': ('counter', "Cambios de nivel del control adaptativo de calidad", None),
+    'queue_drops_total': ('counter', "Elementos descartados por cola llena (por política)", None),
+    'input_overflows_total': ('counter', "Overflows de entrada reportados por la fuente de audio", None),
+    'ring_overruns_total': ('counter', "Lecturas de audio que ya había sobrescrito el buffer circular", None),
+    'translation_cache_lookups_total': ('counter', "Búsquedas en la caché de traducción por resultado", None),
+    'segments_displayed_total': ('counter', "Segmentos mostrados en pantalla", None),
+}
+
+# Orden de las etapas de un segmento
+STAGES = ('captured', 'closed', 'transcribe_start', 'transcribe_end', 'translate_start', 'translate_end',
+          'displayed')
+
+
+def _series(name, labels):
+    """Nombre de la serie en formato Prometheus: nombre{clave="valor"}"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """Histograma acumulativo por buckets (como los de Prometheus)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # El último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def copy(self):
+        other = Histogram(self.buckets)
+        other.counts, other.sum, other.count = list(self.counts), self.sum, self.count
+        return other
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimación por interpolación lineal dentro del bucket (como histogram_quantile)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if cumulative + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+
+class SegmentTrace(dict):
+    """Datos de un segmento (como dict) más el instante de cada etapa en `marks`"""
+
+    def __init__(self, captured=None, **fields):
+        super().__init__(**fields)
+        self.marks = {}
+        self.mark('captured', captured)
+
+    def mark(self, stage, when=None):
+        self.marks[stage] = time.perf_counter() if when is None else when
+        return self
+
+    def absorb(self, earlier):
+        """Unir con un segmento anterior (colas con merge): se quedan las marcas más tempranas"""
+        for stage, when in earlier.marks.items():
+            self.marks[stage] = min(when, self.marks.get(stage, when))
+        self['merged'] = self.get('merged', 0) + earlier.get('merged', 0) + 1
+        return self
+
+    def follow(self, **fields):
+        """Nuevo segmento derivado de este (p. ej. el texto transcrito) con las mismas marcas"""
+        trace = SegmentTrace(**fields)
+        trace.marks = dict(self.marks)
+        return trace
+
+
+class CaptureClock:
+    """Relaciona posiciones del buffer circular con el instante (perf_counter) de captura"""
+
+    def __init__(self, capacity=8192):
+        self.positions = np.zeros(capacity, dtype=np.int64)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+
+    def record(self, end_pos, time_info, frames, sample_rate):
+        """Desde el callback: `end_pos` es write_pos tras escribir el bloque"""
+        now = time.perf_counter()
+        # Antigüedad del primer sample del bloque según PortAudio (0 si el host no la da)
+        lag = time_info.currentTime - time_info.inputBufferAdcTime if time_info.inputBufferAdcTime else 0.0
+        if not 0.0 <= lag < 1.0:
+            lag = 0.0
+        i = self.count % len(self.positions)
+        self.positions[i] = end_pos
+        self.times[i] = now - lag + frames / sample_rate
+        self.count += 1
+
+    def time_at(self, pos):
+        """Instante en que se capturó la muestra `pos` (o ahora si no hay registro)"""
+        n = min(self.count, len(self.positions))
+        if not n:
+            return time.perf_counter()
+        start = self.count % len(self.positions) if self.count > len(self.positions) else 0
+        order = np.roll(np.arange(n), -start) if start else np.arange(n)
+        i = min(np.searchsorted(self.positions[order], pos), n - 1)
+        return float(self.times[order[i]])
+
+
+class MetricsRegistry:
+    """Contadores, gauges e histogramas etiquetados; seguro entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}      # (nombre, etiquetas) -> valor
+        self._histograms = {}  # (nombre, etiquetas) -> Histogram
+        self._collectors = {}  # (nombre, etiquetas) -> función que devuelve el valor
+        self._invalid = set()  # Series con valores no numéricos ya avisadas
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                buckets = DEFINITIONS[name][2] if name in DEFINITIONS else LATENCY_BUCKETS
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def register(self, name, fn, **labels):
+        """Valor calculado al exportar: gauges (lambda: cola.qsize()) o contadores que ya lleva otro objeto"""
+        with self._lock:
+            self._collectors[self._key(name, labels)] = fn
+
+    def mark(self, items, stage):
+        """Marcar una etapa en los segmentos de un lote (ignora lo que no sea SegmentTrace)"""
+        now = time.perf_counter()
+        for item in items:
+            if isinstance(item, SegmentTrace):
+                item.mark(stage, now)
+
+    def finish(self, trace):
+        """Segmento mostrado: registrar el tiempo entre etapas y el total captura → pantalla"""
+        if 'displayed' not in trace.marks:
+            trace.mark('displayed')
+        previous = None
+        for stage in STAGES:
+            if stage not in trace.marks:
+                continue
+            if previous is not None:
+                self.observe('segment_stage_seconds', max(0.0, trace.marks[stage] - trace.marks[previous]),
+                             stage=stage)
+            previous = stage
+        self.observe('capture_to_display_seconds',
+                     max(0.0, trace.marks['displayed'] - trace.marks['captured']))
+        self.inc('segments_displayed_total')
+
+    def summary(self, name, **labels):
+        """Cuenta, media y p50/p95/p99 de un histograma (None si no tiene observaciones)"""
+        with self._lock:
+            histogram = self._histograms.get(self._key(name, labels))
+            histogram = histogram.copy() if histogram is not None else None
+        if histogram is None or not histogram.count:
+            return None
+        return self._summarize(histogram)
+
+    @staticmethod
+    def _summarize(histogram):
+        return dict(count=histogram.count, mean=histogram.sum / histogram.count if histogram.count else None,
+                    **{f"p{int(q * 100)}": histogram.quantile(q) for q in (0.5, 0.95, 0.99)})
+
+    def _collect(self):
+        """Copia consistente de valores e histogramas, con los gauges ya evaluados"""
+        with self._lock:
+            values = dict(self._values)
+            histograms = {key: h.copy() for key, h in self._histograms.items()}
+            collectors = dict(self._collectors)
+        for key, fn in collectors.items():
+            try:
+                values[key] = fn()
+            except Exception:
+                pass
+        # Un valor no numérico (None, texto) no tumba la exportación entera: la serie se omite
+        for key, value in list(values.items()):
+            if not isinstance(value, (numbers.Real, np.bool_)):
+                del values[key]
+                if key not in self._invalid:
+                    self._invalid.add(key)
+                    print(f"⚠️ Métrica {_series(*key)} omitida: valor no numérico {value!r}")
+        return values, histograms
+
+    def render_prometheus(self):
+        """Formato de texto de exposición de Prometheus (versión 0.0.4)"""
+        values, histograms = self._collect()
+        lines = []
+        names = sorted({name for name, _ in values} | {name for name, _ in histograms})
+        for name in names:
+            kind, help_text, _ = DEFINITIONS.get(name, ('untyped', name, None))
+            full = PREFIX + name
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for (series_name, labels), value in sorted(values.items()):
+                if series_name == name:
+                    lines.append(f"{_series(full, labels)} {float(value)}")
+            for (series_name, labels), histogram in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for le, n in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += n
+                    lines.append(f"{_series(full + '_bucket', labels + (('le', str(le)),))} {cumulative}")
+                lines.append(f"{_series(full + '_sum', labels)} {histogram.sum}")
+                lines.append(f"{_series(full + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Resumen en JSON: valores y, por histograma, cuenta, media y p50/p95/p99"""
+        values, histograms = self._collect()
+        summary = {}
+        for (name, labels), histogram in sorted(histograms.items()):
+            summary[_series(name, labels)] = self._summarize(histogram)
+        return {
+            'timestamp': time.time(),
+            'values': {_series(name, labels): value for (name, labels), value in sorted(values.items())},
+            'histograms': summary
+        }
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body, content_type = self.registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(self.registry.snapshot(), ensure_ascii=False), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Sin una línea en consola por cada scrape
+
+
+class MetricsExporter:
+    """Endpoint HTTP local (/metrics, /metrics.json) y snapshot JSON periódico"""
+
+    def __init__(self, registry, host=None, port=None, snapshot_path=None, snapshot_interval=None):
+        opts = config.METRICS_CONFIG
+        self.registry = registry
+        self.host = host or opts['host']
+        self.port = port if port is not None else opts['port']
+        self.snapshot_path = snapshot_path if snapshot_path is not None else opts['snapshot_path']
+        self.snapshot_interval = snapshot_interval or opts['snapshot_interval_seconds']
+        self._server = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.port:
+            try:
+                handler = type("MetricsHandler", (_MetricsHandler,), {'registry': self.registry})
+                self._server = ThreadingHTTPServer((self.host, self.port), handler)
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, daemon=True).start()
+                print(f"📈 Métricas en http://{self.host}:{self._server.server_port}/metrics")
+            except OSError as e:
+                print(f"⚠️ Endpoint de métricas no disponible ({self.host}:{self.port}): {e}")
+        if self.snapshot_path:
+            threading.Thread(target=self._snapshot_loop, daemon=True).start()
+        return self
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """Escribir el snapshot de forma atómica (nunca se lee un JSON a medias)"""
+        try:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.registry.snapshot(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Error guardando snapshot de métricas: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self.snapshot_path:
+            self.write_snapshot()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Registro global del proceso: metrics.inc(...), metrics.observe(...)
+registry = MetricsRegistry()
+inc = registry.inc
+set_value = registry.set
+observe = registry.observe
+register = registry.register
+mark = registry.mark
+finish = registry.finish
+summary = registry.summary
+
+
+def print_latency_summary():
+    """Línea de consola con la latencia captura → pantalla (al detener)"""
+    latency = summary('capture_to_display_seconds')
+    if latency:
+        print(f"📈 Captura → pantalla: p50 {latency['p50']:.2f}s · p95 {latency['p95']:.2f}s · "
+              f"p99 {latency['p99']:.2f}s ({latency['count']} segmentos)")
+
+
+def start_exporter():
+    """Arrancar el exportador si METRICS_CONFIG lo habilita; devuelve el exportador o None"""
+    if not config.METRICS_CONFIG['enabled']:
+        return None
+    return MetricsExporter(registry).start()
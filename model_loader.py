@@ -0,0 +1,97 @@
+"""
+Carga de modelos en segundo plano
+
+La ventana y el listado de dispositivos aparecen al instante. Whisper se
+carga en los procesos worker (con una decodificación de calentamiento antes
+de declararse listo) y el traductor en un hilo; las dependencias pesadas
+(torch, whisper, deep_translator, ctranslate2) no se importan en el proceso
+de la UI hasta que hacen falta. progress() resume el estado para la barra de
+estado y ready() indica cuándo se puede iniciar.
+"""
+
+import threading
+import time
+
+import config
+import metrics
+
+STARTED_AT = time.perf_counter()  # Aproxima el arranque del proceso: se importa al principio
+
+
+def build_translator():
+    """Traductor configurado con caché y lotes: (CachedTranslator, BatchingTranslator)"""
+    from translation_batch import BatchingTranslator
+    from translation_cache import CachedTranslator
+    from translators import create_translator
+
+    translator = CachedTranslator(create_translator(), config.TRANSLATION_CONFIG['source_language'],
+                                  config.TRANSLATION_CONFIG['target_language'])
+    translator.prewarm_configured()
+    # La caché ya lleva sus contadores: se leen al exportar
+    metrics.register('translation_cache_lookups_total', lambda: translator.memory_hits, result='memory_hit')
+    metrics.register('translation_cache_lookups_total', lambda: translator.disk_hits, result='disk_hit')
+    metrics.register('translation_cache_lookups_total', lambda: translator.misses, result='miss')
+    return translator, BatchingTranslator(translator)
+
+
+class ModelLoader:
+    """Lanza la carga de Whisper y del traductor y expone su progreso"""
+
+    def __init__(self, transcription_pool):
+        self.transcription_pool = transcription_pool
+        self.translator = None
+        self.batch_translator = None
+        self.translator_error = None
+        self.timings = {}
+        self._translator_done = threading.Event()
+        self._reported = set()
+
+    def start(self):
+        """No bloquea: los workers arrancan y el traductor se carga en un hilo"""
+        self.timings['ui'] = time.perf_counter() - STARTED_AT
+        self.transcription_pool.start()
+        threading.Thread(target=self._load_translator, daemon=True).start()
+
+    def _load_translator(self):
+        try:
+            self.translator, self.batch_translator = build_translator()
+        except Exception as e:
+            self.translator_error = e
+            print(f"❌ Error cargando el traductor: {e}")
+        self.timings['translator'] = time.perf_counter() - STARTED_AT
+        self._translator_done.set()
+
+    def whisper_ready(self):
+        return self.transcription_pool.ready_count() > 0
+
+    def translator_ready(self):
+        return self.translator is not None
+
+    def ready(self):
+        return self.whisper_ready() and self.translator_ready()
+
+    def failed(self):
+        """Mensaje de error si algún modelo no podrá cargarse, si no None"""
+        if self.translator_error is not None:
+            return f"traductor: {self.translator_error}"
+        if self.transcription_pool.all_disabled():
+            return "Whisper no pudo cargarse"
+        return None
+
+    def progress(self):
+        """Texto breve con el estado de carga para la UI"""
+        ready_workers = self.transcription_pool.ready_count()
+        if ready_workers and 'whisper' not in self.timings:
+            self.timings['whisper'] = time.perf_counter() - STARTED_AT
+        whisper_state = f"Whisper {ready_workers}/{self.transcription_pool.worker_count}"
+        translator_state = "traductor ✅" if self.translator_ready() else "traductor ⏳"
+        self._report()
+        return f"⏳ Cargando modelos: {whisper_state} · {translator_state}"
+
+    def _report(self):
+        """Imprimir una sola vez el desglose de tiempos de arranque"""
+        if 'startup' in self._reported or not ('whisper' in self.timings and self._translator_done.is_set()):
+            return
+        self._reported.add('startup')
+        print(f"⏱️ Arranque: UI {self.timings['ui']:.2f}s · traductor {self.timings['translator']:.2f}s · "
+              f"Whisper (con calentamiento) {self.timings['whisper']:.2f}s")
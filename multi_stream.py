@@ -0,0 +1,143 @@
+"""
+Captura de varias fuentes a la vez con un Whisper compartido
+
+Para transcribir en paralelo el audio del sistema y el micrófono (o varios
+dispositivos de loopback) no se puede cargar un modelo por flujo. Aquí:
+
+- Cada flujo tiene su propio HybridPipeline: buffer circular, VAD,
+  streaming, contexto incremental y colas con backpressure por flujo
+  (las métricas de las colas llevan la etiqueta stream)
+- Todos piden transcripciones al mismo InferenceScheduler, que junta en
+  lotes los segmentos de todos los flujos sobre los mismos workers
+  (inference_workers.py); añadir un flujo no añade modelos en memoria
+- Cada evento publicado lleva 'source' con el nombre del flujo
+
+Los flujos se definen en AUDIO_CONFIG['streams'] (main_hybrid.py) o con
+varios --input en headless.py.
+"""
+
+import os
+import threading
+
+import config
+from audio_sources import best_input_device, create_source
+from inference_workers import InferenceScheduler
+from pipeline import HybridPipeline
+
+
+def parse_stream_spec(text):
+    """'[nombre=]fuente' → {'name', 'source', 'device'}; 'device:14' elige el dispositivo 14"""
+    name, _, source = text.rpartition('=')
+    device = None
+    if source.startswith('device:'):
+        source, device = 'device', int(source.split(':', 1)[1])
+    if not name:
+        if source == 'device':
+            name = 'device' if device is None else f"device{device}"
+        elif source == '-':
+            name = 'stdin'
+        else:
+            name = os.path.splitext(os.path.basename(source))[0]
+    return {'name': name, 'source': source, 'device': device}
+
+
+class StopFlags:
+    """stop_flag de varios pipelines como uno solo (para quien solo hace stop_flag.set())"""
+
+    def __init__(self, pipelines):
+        self.pipelines = pipelines
+
+    def set(self):
+        for pipeline in self.pipelines.values():
+            pipeline.stop_flag.set()
+
+    def is_set(self):
+        return all(pipeline.stop_flag.is_set() for pipeline in self.pipelines.values())
+
+
+class MultiStreamManager:
+    """Un HybridPipeline por fuente y un planificador de Whisper compartido entre todos"""
+
+    def __init__(self, transcription_pool, model_loader, specs, block_size=1024, speed=None, channels=1,
+                 pcm_format='s16le'):
+        names = [spec['name'] for spec in specs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Nombres de flujo repetidos: {', '.join(names)}")
+        if sum(1 for spec in specs if spec['source'] == '-') > 1:
+            raise ValueError("Solo un flujo puede leer de la entrada estándar")
+        self.scheduler = InferenceScheduler(transcription_pool)
+        self.specs = {spec['name']: spec for spec in specs}
+        self.block_size = block_size
+        self.speed = config.AUDIO_CONFIG['replay_speed'] if speed is None else speed
+        self.channels = channels
+        self.pcm_format = pcm_format
+        self.pipelines = {}
+        for spec in specs:
+            self.pipelines[spec['name']] = HybridPipeline(
+                self.scheduler.stream(spec['name']), model_loader, capture_rate=self.capture_rate(spec),
+                block_size=block_size, stream_id=spec['name'])
+        self.sources = {}
+        self.stop_flag = StopFlags(self.pipelines)
+
+    @staticmethod
+    def capture_rate(spec):
+        if spec.get('rate'):
+            return spec['rate']
+        return config.CAPTURE_SAMPLE_RATE if spec['source'] == 'device' else config.SAMPLE_RATE
+
+    def subscribe(self, fn):
+        """Registrar fn(evento) en todos los flujos; devuelve fn"""
+        for pipeline in self.pipelines.values():
+            pipeline.subscribe(fn)
+        return fn
+
+    def start(self):
+        """Abrir cada fuente y arrancar su pipeline; si una falla se detienen las ya abiertas"""
+        self.scheduler.start()
+        try:
+            for name, pipeline in self.pipelines.items():
+                spec = self.specs[name]
+                device = spec.get('device')
+                if spec['source'] == 'device' and device is None:
+                    device = best_input_device()
+                source = create_source(spec['source'], pipeline.audio_callback, self.capture_rate(spec),
+                                       channels=spec.get('channels', self.channels), blocksize=self.block_size,
+                                       device=device, speed=spec.get('speed', self.speed),
+                                       pcm_format=self.pcm_format)
+                pipeline.start(source)
+                self.sources[name] = source
+                print(f"🎙️ Flujo '{name}': {spec['source']} ({self.capture_rate(spec)} Hz)")
+        except Exception:
+            self.stop()
+            raise
+        print(f"🔀 {len(self.pipelines)} flujos con un Whisper compartido "
+              f"(lotes de hasta {self.scheduler.max_batch_size} segmentos)")
+
+    def wait(self, timeout):
+        """Esperar hasta `timeout` a que terminen todas las fuentes"""
+        for source in self.sources.values():
+            if not source.finished.wait(timeout):
+                return False
+        return bool(self.sources)
+
+    def stop(self, drain=False, timeout=30.0):
+        """Detener todos los flujos a la vez (cada drenado en su hilo, con el mismo plazo)"""
+        threads = [threading.Thread(target=pipeline.stop, args=(drain, timeout), daemon=True)
+                   for pipeline in self.pipelines.values()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout + 5)
+        self.sources = {}
+
+    def close(self):
+        self.scheduler.close()
+
+    def print_stats(self):
+        for name, pipeline in self.pipelines.items():
+            print(f"── Flujo '{name}' ──")
+            pipeline.print_stats()
+        print("── Compartido ──")
+        next(iter(self.pipelines.values())).print_shared_stats()
+        stats = self.scheduler.stats()
+        print(f"🔀 Whisper compartido: {stats['batches']} trabajos, {stats['avg_batch_size']:.1f} segmentos por lote")
@@ -0,0 +1,609 @@
+"""
+Pipeline híbrido sin interfaz: captura → VAD → Whisper → traducción
+
+Es el núcleo de main_hybrid.py sin tkinter ni pystray, para poder correr en
+servidores Linux (headless.py). Los resultados se publican como eventos a
+los suscriptores registrados con subscribe(); la GUI es uno más:
+
+- {'type': 'partial', 'committed', 'partial'}: hipótesis en curso (streaming)
+- {'type': 'segment', 'seq', 'text', 'translation', 'skipped', 'start',
+  'end', 'avg_logprob', 'no_speech_prob', 'model', 'trace'}: segmento
+  traducido, en orden; translation es None si se omitió. El suscriptor que
+  lo muestra llama a metrics.finish(trace).
+- {'type': 'context', 'text', 'translation', 'duration_minutes',
+  'segments'}: transcripción contextual de cada período
+
+Con stream_id (varias fuentes a la vez, multi_stream.py) cada evento lleva
+además 'source': el nombre del flujo que lo produjo.
+
+Los suscriptores se llaman desde los hilos del pipeline: deben ser rápidos
+(la GUI los pasa al hilo de Tk con root.after).
+"""
+
+import os
+import queue
+import threading
+import time
+
+import config
+import metrics
+from audio_store import AudioStore
+from backpressure import create_queue, text_bytes
+from context_builder import IncrementalContext, result_confidence
+from features import MelFeatureRing
+from inference_workers import InferenceError
+from metrics import CaptureClock, SegmentTrace
+from resampler import StreamingResampler
+from ring_buffer import AudioRingBuffer, BufferOverrun
+from streaming import StreamingTranscriber
+from translation_batch import drain_batch
+from translation_workers import OrderedTranslationPool
+from vad import VoiceSegmenter
+
+DISPATCH_INTERVAL = 0.05  # Cada cuánto se revisan las ventanas (segundos)
+
+
+def segment_seconds(item):
+    """Coste de un enunciado en la cola de tiempo real: segundos de audio"""
+    if not item:
+        return 0
+    start_pos, end_pos = item[1]
+    return (end_pos - start_pos) / config.SAMPLE_RATE
+
+
+def merge_segments(previous, item):
+    """Unir dos enunciados contiguos en una sola decodificación; None si no se puede"""
+    if not previous or not item:
+        return None
+    _, (start_pos, previous_end), previous_forced, previous_trace = previous
+    _, (next_start, end_pos), forced, trace = item
+    gap = (next_start - previous_end) / config.SAMPLE_RATE
+    span = (end_pos - start_pos) / config.SAMPLE_RATE
+    if gap > config.BACKPRESSURE_CONFIG['realtime']['merge_gap_seconds'] or \
+            span > config.CONTEXT_CONFIG['max_span_seconds']:
+        return None
+    # Traza nueva: si el lote unido no cabe, la cola vuelve a los dos elementos tal cual
+    merged = trace.follow(**dict(trace, start=start_pos)).absorb(previous_trace)
+    # Forzado solo si ambos lo eran: una pausa natural en cualquiera de los dos cierra la frase
+    return 'realtime', (start_pos, end_pos), previous_forced and forced, merged
+
+
+def merge_periods(previous, item):
+    """Dos cierres de período pendientes → un período más largo"""
+    if not previous or not item:
+        return None
+    return 'context', previous[1], item[2]
+
+
+class HybridPipeline:
+    """Tiempo real por enunciado (o streaming) más contexto periódico, sin GUI"""
+
+    def __init__(self, transcription_pool, model_loader, capture_rate=config.CAPTURE_SAMPLE_RATE,
+                 block_size=1024, stream_id=None):
+        self.transcription_pool = transcription_pool
+        self.stream_id = stream_id
+        self.log_prefix = f"[{stream_id}] " if stream_id is not None else ""
+        self.model_loader = model_loader
+        self.capture_rate = capture_rate
+        self.streaming = config.STREAMING_CONFIG['enabled']
+
+        # Colas acotadas por coste con su política de backpressure (BACKPRESSURE_CONFIG)
+        self.realtime_queue = create_queue('realtime', size_of=segment_seconds, merge=merge_segments,
+                                           stream=stream_id)
+        self.translation_queue = create_queue('translation', size_of=lambda trace: text_bytes(trace['text']),
+                                              stream=stream_id)
+        self.context_queue = create_queue('context', merge=merge_periods, stream=stream_id)
+        # El audio sin transcribir cuenta como retraso para el control de calidad de Whisper
+        transcription_pool.add_lag_source(lambda: self.realtime_queue.load)
+        self.stop_flag = threading.Event()
+        self.capture_done = threading.Event()
+
+        # Buffer circular único: solo necesita cubrir el horizonte de re-decodificación,
+        # el contexto de 15 minutos se arma con los segmentos ya transcritos
+        self.audio_ring = AudioRingBuffer.for_duration(config.CONTEXT_CONFIG['redecode_horizon_seconds'],
+                                                       config.SAMPLE_RATE)
+        # Etapa de captura → 16 kHz mono: todo lo que va después trabaja a SAMPLE_RATE
+        self.capture_resampler = StreamingResampler(capture_rate, config.SAMPLE_RATE, max_block=block_size)
+        self.capture_clock = CaptureClock()
+        # Lo que sale del buffer sigue en disco para re-decodificar más atrás y exportar (audio_store.py)
+        self.audio_store = None
+        if config.SPILL_CONFIG['enabled']:
+            self.audio_store = AudioStore(os.path.join(config.SPILL_CONFIG['path'], stream_id or 'audio'))
+        # Log-mel de las ventanas que van en lote (features.py); con streaming no hay lotes
+        self.features = None
+        if config.WHISPER_CONFIG['feature_cache'] and config.WHISPER_CONFIG['batch_decoding'] and not self.streaming:
+            self.features = MelFeatureRing(self.audio_ring)
+        self.voice_segmenter = VoiceSegmenter(self.audio_ring)
+        self.incremental_context = IncrementalContext()
+        self.streamer = StreamingTranscriber(self.audio_ring, self.streaming_decode)
+
+        self.subscribers = []
+        self.stream = None
+        self.translation_pool = None
+        self._threads = {}
+        self.last_context_process = 0
+        self.context_start_time = 0
+        self.translations_requested = 0
+        self.translations_delivered = 0
+        self.last_partial = None
+        self.running = False
+
+    def subscribe(self, fn):
+        """Registrar fn(evento); devuelve fn (sirve como decorador)"""
+        self.subscribers.append(fn)
+        return fn
+
+    def _publish(self, event):
+        if self.stream_id is not None:
+            event['source'] = self.stream_id
+        for fn in list(self.subscribers):
+            try:
+                fn(event)
+            except Exception as e:
+                print(f"Error en suscriptor de resultados: {e}")
+
+    def audio_callback(self, indata, frames, time_info, status):
+        """Callback de audio: re-muestrea y copia el bloque al buffer circular"""
+        if self.stop_flag.is_set() or self.capture_done.is_set():
+            return
+
+        if status:
+            print(f"Audio callback status: {status}")
+            if status.input_overflow:
+                metrics.inc('input_overflows_total')
+
+        # Re-muestrear a 16 kHz y una sola copia al buffer, sin locks
+        audio_data = self.capture_resampler.process(indata[:, 0] if indata.ndim > 1 else indata)
+        if len(audio_data) == 0:
+            return
+        self.audio_ring.write(audio_data)
+        self.capture_clock.record(self.audio_ring.write_pos, time_info, frames, self.capture_rate)
+
+    def start(self, stream):
+        """Arrancar los hilos y la fuente de audio (creada con callback=self.audio_callback)"""
+        if self.running:
+            return
+        self.stop_flag.clear()
+        self.capture_done.clear()
+
+        current_time = time.time()
+        self.last_context_process = current_time
+        self.context_start_time = current_time
+        self.translations_requested = 0
+        self.translations_delivered = 0
+        self.last_partial = None
+
+        # El stream todavía no arrancó: se puede reiniciar el buffer sin carreras
+        self.capture_resampler.reset()
+        self.audio_ring.reset()
+        if self.features is not None:
+            self.features.reset()
+        if self.audio_store is not None:
+            try:
+                self.audio_store.reset()
+            except OSError as e:
+                print(f"⚠️ {self.log_prefix}Audio en disco desactivado: {e}")
+                self.audio_store = None
+        self.capture_clock.reset()
+        self.voice_segmenter.reset()
+        self.incremental_context.reset()
+        self.streamer.reset()
+        for pipeline_queue in (self.realtime_queue, self.translation_queue, self.context_queue):
+            pipeline_queue.clear()
+
+        self._threads = {
+            'dispatcher': threading.Thread(target=self.window_dispatcher, daemon=True),
+            'realtime': threading.Thread(
+                target=self.streaming_processor if self.streaming else self.realtime_processor, daemon=True),
+            'context': threading.Thread(target=self.context_processor, daemon=True)
+        }
+        for thread in self._threads.values():
+            thread.start()
+
+        # Traducción concurrente con entrega en orden
+        self.translation_pool = OrderedTranslationPool(self.model_loader.batch_translator, self.translation_queue,
+                                                       self.on_realtime_translation, self.stop_flag,
+                                                       text_of=lambda trace: trace['text'])
+        self.translation_pool.start()
+
+        self.stream = stream
+        stream.start()
+        self.running = True
+
+        if self.streaming:
+            print(f"⚡ Tiempo real: streaming (pasada cada {config.STREAMING_CONFIG['step_ms']}ms, confirmación por acuerdo)")
+        else:
+            print(f"⚡ Tiempo real: por enunciado (máx. {config.VAD_CONFIG['max_segment_seconds']}s)")
+        print(f"🧠 Contexto: cada {config.CONTEXT_INTERVAL_MINUTES} minutos")
+        print(f"🔇 Pausa: {config.VAD_CONFIG['hangover_ms']}ms de silencio cierra el enunciado")
+
+    def stop(self, drain=False, timeout=30.0):
+        """Detener; con drain=True se procesa y traduce todo lo capturado antes de salir"""
+        if not self.running:
+            return
+        self.running = False
+        if not drain:
+            self.stop_flag.set()
+        self._close_stream()
+        if drain:
+            self._drain(time.monotonic() + timeout)
+            self.stop_flag.set()
+        if self.translation_pool is not None:
+            self.translation_pool.join(2)
+
+    def _close_stream(self):
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception as e:
+                print(f"Error deteniendo la fuente de audio: {e}")
+            self.stream = None
+
+    def _drain(self, deadline):
+        """Cerrar el último enunciado, esperar transcripciones y traducciones y cerrar el período"""
+        self.capture_done.set()
+
+        def remaining():
+            return max(0.0, deadline - time.monotonic())
+
+        # El despachador hace una última pasada del VAD y cierra el enunciado abierto
+        self._threads['dispatcher'].join(remaining())
+        self.realtime_queue.put_control(None)
+        self._threads['realtime'].join(remaining())
+
+        while self.translations_delivered < self.translations_requested and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        # Contexto del período en curso (aunque no hayan pasado 15 minutos)
+        self.context_queue.put(('context', self.context_start_time, time.time()), block=True, timeout=remaining())
+        self.context_queue.put_control(None)
+        self._threads['context'].join(remaining())
+
+        pending = self.translations_requested - self.translations_delivered
+        if pending > 0 or time.monotonic() >= deadline:
+            print(f"⚠️ Drenado incompleto: plazo vencido ({pending} traducciones pendientes)")
+
+    def window_dispatcher(self):
+        """Corta enunciados (VAD) y marca el cierre de cada período de contexto"""
+        context_interval_seconds = config.CONTEXT_INTERVAL_MINUTES * 60
+
+        while not self.stop_flag.is_set():
+            final = self.capture_done.is_set()
+            if not final:
+                time.sleep(DISPATCH_INTERVAL)
+
+            try:
+                current_time = time.time()
+
+                # Enunciados cerrados desde la última revisión (el silencio se descarta)
+                segments = self.voice_segmenter.process()
+                if final:
+                    segments += self.voice_segmenter.flush()
+                if self.audio_store is not None:
+                    self._spill()
+                for start_pos, end_pos, forced in segments:
+                    trace = SegmentTrace(self.capture_clock.time_at(end_pos), start=start_pos,
+                                         end=end_pos).mark('closed')
+                    # Enviar solo las posiciones: el procesador lee una vista sin copia.
+                    # Si Whisper no da abasto decide la política de la cola (merge por defecto)
+                    self.realtime_queue.put(('realtime', (start_pos, end_pos), forced, trace),
+                                            block=final, timeout=5)
+
+                # Cerrar el período de contexto cada 15 minutos
+                if current_time - self.last_context_process >= context_interval_seconds:
+                    # Guardar tiempo de inicio para referencia
+                    context_period = self.context_start_time if self.context_start_time > 0 else self.last_context_process
+                    self.last_context_process = current_time
+                    self.context_start_time = current_time
+
+                    self.context_queue.put(('context', context_period, current_time))
+
+            except Exception as e:
+                print(f"Error en despachador de ventanas: {e}")
+
+            if final:
+                break
+
+        if self.audio_store is not None:
+            self.audio_store.close()
+
+    def _spill(self):
+        """Volcar a disco el audio nuevo del buffer circular (lo que ya se sobrescribió queda en silencio)"""
+        if self.audio_store.write_pos < self.audio_ring.oldest_pos:
+            metrics.inc('ring_overruns_total', stage='spill')
+            self.audio_store.fill_to(self.audio_ring.oldest_pos)
+        for part in self.audio_ring.views(self.audio_store.write_pos, self.audio_ring.write_pos):
+            self.audio_store.write(part)
+
+    def _request_translation(self, trace):
+        """Encolar un segmento transcrito para traducir (se agrupa con los demás pendientes)"""
+        if self.translation_queue.put(trace, block=self.capture_done.is_set(), timeout=5):
+            self.translations_requested += 1
+        else:
+            print(f"⚠️ Cola de traducción llena, segmento descartado: {trace['text'][:30]}")
+
+    def realtime_processor(self):
+        """Procesa audio en tiempo real (sin contexto); los enunciados ya en cola van juntos en un lote"""
+        max_batch = config.INFERENCE_CONFIG['batch']['max_batch_size']
+        while not self.stop_flag.is_set():
+            try:
+                # Sin esperar a que lleguen más: solo lo acumulado (p. ej. al ponerse al día tras un atasco)
+                batch = drain_batch(self.realtime_queue, max_batch, 0, timeout=1)
+                items = [item for item in batch if item is not None and item[1][1] > item[1][0]]
+                if items:
+                    self.transcribe_realtime(items)
+                if batch and batch[-1] is None:
+                    break
+
+            except Exception as e:
+                print(f"Error en procesador tiempo real: {e}")
+
+    def transcribe_realtime(self, items):
+        """Transcribir uno o varios enunciados (un trabajo de Whisper) y pasarlos a traducción"""
+        windows = []
+        for item in items:
+            _, (start_pos, end_pos), _, _ = item
+            try:
+                # Vista sin copia sobre el buffer circular
+                windows.append((item, self.audio_ring.read(start_pos, end_pos)))
+            except BufferOverrun as e:
+                metrics.inc('ring_overruns_total', stage='realtime')
+                print(f"⚠️ Ventana de tiempo real perdida: {e}")
+        if not windows:
+            return
+
+        seconds = sum(len(audio_data) for _, audio_data in windows) / config.SAMPLE_RATE
+        count = f", {len(windows)} enunciados" if len(windows) > 1 else ""
+        print(f"🎤 {self.log_prefix}Procesando tiempo real... ({seconds:.1f}s{count})")
+
+        # Transcribir audio directamente desde memoria
+        options = {'language': "en", 'task': "transcribe", 'fp16': False, 'verbose': False}
+        for (_, _, _, trace), _ in windows:
+            trace.mark('transcribe_start')
+        if len(windows) == 1:
+            results = [self.transcription_pool.transcribe(windows[0][1], config.SAMPLE_RATE, tag="realtime",
+                                                          **options)]
+        else:
+            # Solo un lote usa el log-mel de features.py: un enunciado suelto va por transcribe()
+            results = self.transcription_pool.submit_batch(
+                [(audio_data, config.SAMPLE_RATE, "realtime", self._mel_options(start_pos, end_pos, options))
+                 for (_, (start_pos, end_pos), _, _), audio_data in windows]).result()
+
+        for ((_, (start_pos, end_pos), forced, trace), _), result in zip(windows, results):
+            text = result["text"].strip()
+            trace.mark('transcribe_end')
+
+            # Guardar el segmento para el contexto incremental
+            avg_logprob, no_speech_prob = result_confidence(result)
+            self.incremental_context.add_segment(start_pos, end_pos, text, avg_logprob,
+                                                 no_speech_prob, forced=forced)
+
+            if text:
+                print(f"📝 {self.log_prefix}Transcripción RT: {text}")
+                trace.update(text=text, avg_logprob=avg_logprob, no_speech_prob=no_speech_prob,
+                             model=result.get('model'))
+                self._request_translation(trace)
+
+    def streaming_decode(self, audio, prompt):
+        """Pasada de streaming: timestamps por palabra y el texto confirmado como prompt"""
+        return self.transcription_pool.transcribe(
+            audio,
+            config.SAMPLE_RATE,
+            tag="streaming",
+            language="en",
+            task="transcribe",
+            fp16=False,
+            verbose=False,
+            word_timestamps=True,
+            initial_prompt=prompt or None,
+            condition_on_previous_text=False
+        )
+
+    def publish_sentences(self, sentences):
+        """Frases confirmadas: al contexto incremental y a traducción; parcial a los suscriptores"""
+        for start_pos, end_pos, text in sentences:
+            avg_logprob, no_speech_prob = self.streamer.confidence()
+            self.incremental_context.add_segment(start_pos, end_pos, text, avg_logprob, no_speech_prob)
+            print(f"📝 {self.log_prefix}Confirmado: {text}")
+            # La frase quedó confirmada al terminar esta pasada
+            self._request_translation(SegmentTrace(
+                self.capture_clock.time_at(end_pos), text=text, start=start_pos, end=end_pos,
+                avg_logprob=avg_logprob, no_speech_prob=no_speech_prob,
+                model=(self.streamer.last_result or {}).get('model')).mark('transcribe_end'))
+        display = self.streamer.display()
+        if display != self.last_partial:
+            self.last_partial = display
+            self._publish({'type': 'partial', 'committed': display[0], 'partial': display[1]})
+
+    def streaming_processor(self):
+        """Re-decodifica el enunciado en curso y confirma las palabras en que coinciden dos pasadas"""
+        step_seconds = config.STREAMING_CONFIG['step_ms'] / 1000
+        while not self.stop_flag.is_set():
+            try:
+                # Cierres de enunciado del VAD; los cortes forzados no cierran (el streaming recorta solo)
+                try:
+                    queue_item = self.realtime_queue.get(timeout=step_seconds)
+                except queue.Empty:
+                    queue_item = ()
+
+                if queue_item is None:
+                    # Drenado: confirmar lo que quede del enunciado en curso
+                    self.publish_sentences(self.streamer.finish(self.audio_ring.write_pos))
+                    break
+
+                if queue_item:
+                    process_type, (start_pos, end_pos), forced, _ = queue_item
+                    self.streamer.begin(start_pos)
+                    if not forced:
+                        self.publish_sentences(self.streamer.finish(end_pos))
+                    continue
+
+                if self.voice_segmenter.in_speech:
+                    self.streamer.begin(self.voice_segmenter.segment_start)
+                end_pos = self.audio_ring.write_pos
+                if self.streamer.due(end_pos):
+                    self.publish_sentences(self.streamer.step(end_pos))
+
+            except BufferOverrun as e:
+                metrics.inc('ring_overruns_total', stage='streaming')
+                print(f"⚠️ Audio de streaming perdido: {e}")
+                self.streamer.abandon()
+            except Exception as e:
+                print(f"Error en procesador de streaming: {e}")
+
+    def on_realtime_translation(self, seq, trace, translated, skipped):
+        """Recibe las traducciones de tiempo real en orden de secuencia"""
+        if translated is None:
+            motivo = "plazo vencido" if skipped else "error"
+            print(f"⏭️ {self.log_prefix}Traducción RT #{seq} omitida ({motivo})")
+        else:
+            print(f"🔄 {self.log_prefix}Traducción RT #{seq}: {translated}")
+
+        self._publish({
+            'type': 'segment',
+            'seq': seq,
+            'text': trace['text'],
+            'translation': translated,
+            'skipped': translated is None,
+            'start': trace.get('start', 0) / config.SAMPLE_RATE,
+            'end': trace.get('end', 0) / config.SAMPLE_RATE,
+            'avg_logprob': trace.get('avg_logprob'),
+            'no_speech_prob': trace.get('no_speech_prob'),
+            'model': trace.get('model'),
+            'trace': trace
+        })
+        self.translations_delivered += 1
+
+    def _mel_options(self, start_pos, end_pos, options):
+        """Opciones con el log-mel ya calculado de la ventana (features.py), si sigue en el anillo"""
+        if self.features is None:
+            return options
+        try:
+            return dict(options, mel=self.features.window(start_pos, end_pos))
+        except BufferOverrun:
+            return options
+
+    def _read_span(self, start_pos, end_pos):
+        """Audio de [start_pos, end_pos): del buffer circular o, si ya se sobrescribió, del disco"""
+        try:
+            return self.audio_ring.read(start_pos, end_pos)
+        except BufferOverrun:
+            if self.audio_store is None or end_pos > self.audio_store.write_pos:
+                raise
+            return self.audio_store.read(start_pos, end_pos)
+
+    def redecode_span(self):
+        """Re-decodificar un tramo dudoso del contexto incremental; False si no hay ninguno"""
+        span = self.incremental_context.next_redecode()
+        if span is None:
+            return False
+
+        span_id, start_pos, end_pos, prompt = span
+        try:
+            audio_data = self._read_span(start_pos, end_pos)
+        except BufferOverrun:
+            # Fuera del horizonte (y de lo guardado en disco): se queda el texto de tiempo real
+            self.incremental_context.apply_redecode(span_id)
+            return True
+
+        print(f"🔁 Re-decodificando tramo ({(end_pos - start_pos)/config.SAMPLE_RATE:.1f}s)")
+        try:
+            result = self.transcription_pool.transcribe(
+                audio_data,
+                config.SAMPLE_RATE,
+                tag="context",
+                language="en",
+                task="transcribe",
+                fp16=False,
+                verbose=False,
+                initial_prompt=prompt or None,
+                condition_on_previous_text=False
+            )
+        except InferenceError as e:
+            # El worker falló o se reinició: se queda el texto de tiempo real
+            print(f"⚠️ Re-decodificación descartada: {e}")
+            self.incremental_context.apply_redecode(span_id)
+            return True
+        avg_logprob, _ = result_confidence(result)
+        self.incremental_context.apply_redecode(span_id, result["text"], avg_logprob)
+        return True
+
+    def context_processor(self):
+        """Arma el contexto de cada período con los segmentos de tiempo real"""
+        while not self.stop_flag.is_set():
+            try:
+                # Re-decodificar tramos dudosos mientras no cierre el período
+                try:
+                    queue_item = self.context_queue.get_nowait()
+                except queue.Empty:
+                    if not self.redecode_span():
+                        time.sleep(0.2)
+                    continue
+
+                if queue_item is None:
+                    break
+
+                process_type, start_time, end_time = queue_item
+                duration_minutes = (end_time - start_time) / 60
+
+                # Terminar lo pendiente antes de cerrar el período
+                while self.redecode_span():
+                    pass
+
+                full_text, segment_count = self.incremental_context.flush_period()
+
+                print(f"\n🧠 {self.log_prefix}CONTEXTO DEL PERÍODO ({duration_minutes:.1f} minutos, {segment_count} segmentos, "
+                      f"{self.incremental_context.improved}/{self.incremental_context.redecoded} tramos corregidos)")
+
+                if full_text:
+                    print(f"📚 Transcripción contextual: {full_text[:200]}...")
+
+                    # Traducir con contexto completo
+                    try:
+                        contextual_translation = self.model_loader.translator.translate(full_text)
+                        print(f"🎯 Traducción contextual: {contextual_translation[:200]}...")
+
+                        self._publish({'type': 'context', 'text': full_text, 'translation': contextual_translation,
+                                       'duration_minutes': duration_minutes, 'segments': segment_count})
+
+                    except Exception as e:
+                        print(f"Error en traducción contextual: {e}")
+
+            except Exception as e:
+                print(f"Error en procesador contextual: {e}")
+
+    def print_stats(self):
+        """Resumen al detener"""
+        print(f"🔇 Audio con voz enviado a Whisper: {self.voice_segmenter.speech_ratio():.0%}")
+        if self.translation_pool is not None:
+            pool_stats = self.translation_pool.stats()
+            print(f"🌐 Traducciones: {pool_stats['delivered']} entregadas, {pool_stats['skipped']} omitidas "
+                  f"({pool_stats['workers']} workers)")
+        for pipeline_queue in (self.realtime_queue, self.translation_queue, self.context_queue):
+            queue_stats = pipeline_queue.stats()
+            if queue_stats['dropped'] or queue_stats['merged']:
+                print(f"🚦 Cola {queue_stats['queue']} ({queue_stats['policy']}): {queue_stats['dropped']} descartes, "
+                      f"{queue_stats['merged']} uniones")
+        store = self.audio_store
+        if store is not None and store.write_pos:
+            print(f"💽 Audio en disco: {store.seconds / 60:.1f} min ({store.disk_bytes / 1e6:.1f} MB) en {store.path}")
+        if self.stream_id is None:
+            self.print_shared_stats()
+
+    def print_shared_stats(self):
+        """Lo que comparten todos los flujos: Whisper, traductor y latencias (multi_stream.py lo imprime una vez)"""
+        inference_stats = self.transcription_pool.stats()
+        print(f"🧵 Whisper: {inference_stats['completed']} transcripciones, {inference_stats['failed']} fallidas, "
+              f"{inference_stats['restarts']} reinicios de workers")
+        if inference_stats['quality'] is not None and inference_stats['quality']['switches']:
+            print(f"🎚️ Calidad de Whisper: {inference_stats['quality']['level']} "
+                  f"({inference_stats['quality']['switches']} cambios)")
+        if self.model_loader.translator is not None:
+            cache_stats = self.model_loader.translator.stats()
+            print(f"💾 Caché de traducción: {cache_stats['memory_hits'] + cache_stats['disk_hits']} aciertos, "
+                  f"{cache_stats['misses']} fallos ({cache_stats['hit_rate']:.0%})")
+            backend_stats = self.model_loader.translator.translator.stats()
+            print(f"🌍 Traductor {backend_stats['backend']}: {backend_stats['avg_latency_ms']:.0f} ms/petición, "
+                  f"{backend_stats['items_per_second']:.1f} segmentos/s")
+        metrics.print_latency_summary()
@@ -0,0 +1,160 @@
+"""
+Control adaptativo de la calidad de decodificación de Whisper
+
+Un mismo WHISPER_CONFIG no sirve para todas las máquinas: en un equipo
+cargado "small" con beam search no da abasto y en uno libre "base" deja
+precisión sin aprovechar. QualityController mide continuamente el RTF de
+cada decodificación y el retraso acumulado (espera en el pool + audio aún
+sin transcribir en las colas del pipeline) y mueve una escalera de niveles,
+del más caro al más barato:
+
+1. el modelo configurado con sus opciones (p. ej. beam_size 5)
+2. búsqueda voraz (beam_size 1; solo faster-whisper, openai ya es voraz)
+3. sin condition_on_previous_text
+4. cada modelo de WHISPER_CONFIG['fallback_models'], precargado en los workers
+
+Baja un nivel cuando el retraso supera el presupuesto o el RTF suavizado
+pasa de max_rtf; sube uno solo tras up_hold_seconds de holgura sostenida.
+Si tras subir hay que volver a bajar enseguida, la espera para el siguiente
+intento se duplica (histéresis). Cada cambio se imprime y se exporta en
+metrics.
+"""
+
+import threading
+import time
+
+import config
+import metrics
+
+
+class QualityLevel:
+    """Un escalón: modelo y opciones que se imponen a cada decodificación"""
+
+    def __init__(self, name, model_size, options):
+        self.name = name
+        self.model_size = model_size
+        self.options = options
+
+
+def build_levels(backend, model_size, fallback_models, beam_size):
+    """Escalera de niveles del más caro al más barato según WHISPER_CONFIG"""
+    levels = [QualityLevel(f"{model_size}", model_size, {})]
+    cheap = {}
+    if backend == 'faster-whisper' and beam_size > 1:
+        cheap['beam_size'] = 1
+        levels.append(QualityLevel(f"{model_size} voraz", model_size, dict(cheap)))
+    cheap['condition_on_previous_text'] = False
+    levels.append(QualityLevel(f"{model_size} sin contexto", model_size, dict(cheap)))
+    for fallback in fallback_models:
+        if fallback != model_size:
+            levels.append(QualityLevel(f"{fallback} sin contexto", fallback, dict(cheap)))
+    return levels
+
+
+class QualityController:
+    """Elige el nivel de calidad según el RTF y el retraso medidos"""
+
+    def __init__(self, backend=None, model_size=None, **overrides):
+        whisper_opts = config.WHISPER_CONFIG
+        opts = dict(whisper_opts['adaptive'])
+        opts.update(overrides)
+        self.model_size = model_size or whisper_opts['model_size']
+        self.levels = build_levels(backend or whisper_opts['backend'], self.model_size,
+                                   whisper_opts['fallback_models'], whisper_opts['beam_size'])
+        self.max_lag = opts['max_lag_seconds']
+        self.max_rtf = opts['max_rtf']
+        self.headroom_rtf = opts['headroom_rtf']
+        self.base_up_hold = opts['up_hold_seconds']
+        self.up_hold = self.base_up_hold
+        self.cooldown = opts['cooldown_seconds']
+        self.smoothing = opts['smoothing']
+        self.level = 0
+        self.rtf = None
+        self.lag = 0.0
+        self.switches = 0
+        self._lag_sources = []
+        self._lock = threading.Lock()
+        self._last_switch = time.monotonic()
+        self._last_up = None
+        self._headroom_since = None
+        metrics.register('whisper_quality_level', lambda: self.level)
+
+    def model_sizes(self):
+        """Modelos que cada worker debe tener cargados (el principal primero)"""
+        sizes = []
+        for level in self.levels:
+            if level.model_size not in sizes:
+                sizes.append(level.model_size)
+        return sizes
+
+    def add_lag_source(self, fn):
+        """fn() -> segundos de audio esperando antes del pool (colas del pipeline)"""
+        self._lag_sources.append(fn)
+
+    def apply(self, options):
+        """Opciones de un trabajo con las del nivel actual impuestas"""
+        level = self.levels[self.level]
+        if not level.options and level.model_size == self.model_size:
+            return options
+        options = {**options, **level.options}
+        if level.model_size != self.model_size:
+            options['model_size'] = level.model_size
+        return options
+
+    def _pending_audio(self):
+        pending = 0.0
+        for fn in self._lag_sources:
+            try:
+                pending = max(pending, fn())
+            except Exception as e:
+                print(f"Error leyendo retraso del pipeline: {e}")
+        return pending
+
+    def observe(self, rtf, queue_wait):
+        """Registrar una decodificación terminada y cambiar de nivel si hace falta"""
+        pending = self._pending_audio()
+        with self._lock:
+            self.rtf = rtf if self.rtf is None else self.rtf + self.smoothing * (rtf - self.rtf)
+            self.lag = queue_wait + pending
+            now = time.monotonic()
+            if now - self._last_switch < self.cooldown:
+                return
+            if self.lag > self.max_lag or self.rtf > self.max_rtf:
+                self._headroom_since = None
+                if self.level + 1 < len(self.levels):
+                    if self._last_up is not None and now - self._last_up < self.up_hold:
+                        # Rebote: el nivel superior no se sostiene, esperar más antes de reintentar
+                        self.up_hold = min(2 * self.up_hold, 16 * self.base_up_hold)
+                        self._last_up = None
+                    self._switch(self.level + 1, now)
+            elif self.lag < self.max_lag / 4 and self.rtf < self.headroom_rtf:
+                if self._headroom_since is None:
+                    self._headroom_since = now
+                elif self.level > 0 and now - self._headroom_since >= self.up_hold:
+                    self._headroom_since = None
+                    self._last_up = now
+                    self._switch(self.level - 1, now)
+            else:
+                self._headroom_since = None
+                if self._last_up is not None and now - self._last_up > 4 * self.up_hold:
+                    # Estable tras subir: la histéresis vuelve a su valor base
+                    self.up_hold = self.base_up_hold
+                    self._last_up = None
+
+    def _switch(self, level, now):
+        previous = self.levels[self.level]
+        direction = 'down' if level > self.level else 'up'
+        self.level = level
+        self._last_switch = now
+        self.switches += 1
+        metrics.inc('whisper_quality_switches_total', direction=direction)
+        icon = "📉" if direction == 'down' else "📈"
+        print(f"{icon} Calidad de Whisper: {previous.name} → {self.levels[level].name} "
+              f"(retraso {self.lag:.1f}s, RTF {self.rtf:.2f})")
+        # El RTF del nivel nuevo se mide desde cero
+        self.rtf = None
+
+    def stats(self):
+        with self._lock:
+            return {'level': self.levels[self.level].name, 'switches': self.switches,
+                    'rtf': self.rtf, 'lag': self.lag}
@@ -0,0 +1,161 @@
+"""
+Re-muestreo polifásico en streaming (captura → 16 kHz mono float32)
+
+Se coloca entre el callback de captura y el buffer circular: cada bloque se
+convierte a mono y se re-muestrea conservando el estado (historia del filtro
+y fase) entre bloques, así que no hay discontinuidades en los bordes de las
+ventanas. Los bancos de filtros se calculan una sola vez por par de
+frecuencias y quedan en caché. El centro del filtro cae en un múltiplo
+exacto del paso de salida: el retardo es un número entero de muestras y
+resample() lo compensa sin desfase fraccionario.
+"""
+
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+TAPS_PER_PHASE = 96   # Coeficientes por fase del filtro polifásico
+KAISER_BETA = 8.0     # ~80 dB de atenuación en la banda de rechazo
+ROLLOFF = 0.9         # Corte relativo a la Nyquist de la frecuencia menor
+ONESHOT_BLOCK = 8192  # Tamaño de bloque para re-muestrear arrays completos
+
+
+def filter_center(n_taps, down):
+    """Centro del filtro (en muestras sobremuestreadas): el múltiplo de `down` más cercano por debajo del medio"""
+    return (n_taps - 1) // 2 // down * down
+
+
+@lru_cache(maxsize=8)
+def polyphase_bank(fs_in, fs_out, taps_per_phase=TAPS_PER_PHASE, beta=KAISER_BETA):
+    """Banco de filtros (up, taps) para re-muestrear fs_in → fs_out, en caché"""
+    g = gcd(fs_in, fs_out)
+    up, down = fs_out // g, fs_in // g
+    n_taps = taps_per_phase * up
+
+    # Filtro anti-aliasing (sinc con ventana Kaiser) a la frecuencia sobremuestreada, simétrico
+    # alrededor de `center`; los coeficientes que sobran al final quedan en cero
+    cutoff = ROLLOFF * 0.5 * min(fs_in, fs_out) / (fs_in * up)
+    center = filter_center(n_taps, down)
+    n = np.arange(2 * center + 1) - center
+    h = np.zeros(n_taps)
+    h[:2 * center + 1] = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(2 * center + 1, beta)
+    h *= up / h.sum()
+
+    # bank[p, j] = h[p + j*up]
+    bank = h.reshape(taps_per_phase, up).T.astype(np.float32)
+    bank.setflags(write=False)
+    return bank, up, down
+
+
+class StreamingResampler:
+    """Re-muestreador con estado que procesa bloque a bloque"""
+
+    def __init__(self, fs_in, fs_out, max_block=4096):
+        self.fs_in = int(fs_in)
+        self.fs_out = int(fs_out)
+        self.passthrough = self.fs_in == self.fs_out
+        if not self.passthrough:
+            self.bank, self.up, self.down = polyphase_bank(self.fs_in, self.fs_out)
+            self.taps = self.bank.shape[1]
+        else:
+            self.up = self.down = 1
+            self.taps = 1
+        self._mono = None
+        self._allocate(max_block)
+        self.reset()
+
+    @property
+    def delay(self):
+        """Retardo del filtro en muestras de salida (entero)"""
+        if self.passthrough:
+            return 0
+        return filter_center(self.taps * self.up, self.down) // self.down
+
+    def reset(self):
+        """Olvidar la historia del filtro (nuevo stream)"""
+        self._ext[:self.taps - 1] = 0
+        self.n_in = 0
+        self.n_out = 0
+
+    def _allocate(self, max_block):
+        """Preasignar todos los búferes de trabajo para bloques de hasta `max_block`"""
+        self.max_block = int(max_block)
+        self._ext = np.zeros(self.taps - 1 + self.max_block, dtype=np.float32)
+        max_out = self.max_block * self.up // self.down + 2
+        self._n = np.arange(max_out, dtype=np.int64)
+        self._t = np.empty(max_out, dtype=np.int64)
+        self._k = np.empty(max_out, dtype=np.int64)
+        self._p = np.empty(max_out, dtype=np.int64)
+        self._idx = np.empty((max_out, self.taps), dtype=np.int64)
+        self._x = np.empty((max_out, self.taps), dtype=np.float32)
+        self._c = np.empty((max_out, self.taps), dtype=np.float32)
+        self._out = np.empty(max_out, dtype=np.float32)
+        self._offsets = np.arange(self.taps, dtype=np.int64)
+
+    def _to_mono(self, block):
+        if block.ndim == 1:
+            return block
+        if block.shape[1] == 1:
+            return block[:, 0]
+        if self._mono is None or len(self._mono) < len(block):
+            self._mono = np.empty(max(len(block), self.max_block), dtype=np.float32)
+        return np.mean(block, axis=1, out=self._mono[:len(block)])
+
+    def process(self, block):
+        """Re-muestrear un bloque; devuelve una vista válida hasta la siguiente llamada"""
+        x = self._to_mono(block)
+        if self.passthrough:
+            return x
+        b = len(x)
+        if b > self.max_block:
+            # Solo ocurre si el driver entrega un bloque mayor al previsto
+            history = self._ext[:self.taps - 1].copy()
+            self._allocate(b)
+            self._ext[:self.taps - 1] = history
+
+        hist = self.taps - 1
+        self._ext[hist:hist + b] = x
+
+        # Salidas cuya muestra de entrada más reciente ya está disponible
+        n_end = -(-(self.n_in + b) * self.up // self.down)
+        count = n_end - self.n_out
+        if count > 0:
+            t = np.add(self._n[:count], self.n_out, out=self._t[:count])
+            np.multiply(t, self.down, out=t)
+            k = np.floor_divide(t, self.up, out=self._k[:count])
+            p = np.remainder(t, self.up, out=self._p[:count])
+            # Índice local en el búfer extendido (historia + bloque actual)
+            np.add(k, hist - self.n_in, out=k)
+            idx = np.subtract.outer(k, self._offsets, out=self._idx[:count])
+            xs = np.take(self._ext, idx, out=self._x[:count])
+            cs = np.take(self.bank, p, axis=0, out=self._c[:count])
+            out = np.einsum('ij,ij->i', xs, cs, out=self._out[:count])
+        else:
+            out = self._out[:0]
+
+        # Conservar las últimas muestras como historia del filtro
+        self._ext[:hist] = self._ext[b:b + hist]
+        self.n_in += b
+        self.n_out = max(n_end, self.n_out)
+        return out
+
+
+def resample(audio, fs_in, fs_out):
+    """Re-muestrear un array completo (compensa el retardo del filtro)"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if fs_in == fs_out:
+        return audio
+    resampler = StreamingResampler(fs_in, fs_out, max_block=ONESHOT_BLOCK)
+    expected = int(len(audio) * fs_out / fs_in)
+    delay = resampler.delay
+    # Empujar ceros para vaciar la cola del filtro
+    pad = int(np.ceil((delay + 1) * fs_in / fs_out)) + resampler.taps
+    padded = np.concatenate([audio, np.zeros(pad, dtype=np.float32)])
+    out = np.empty(len(padded) * fs_out // fs_in + 2, dtype=np.float32)
+    n = 0
+    for i in range(0, len(padded), ONESHOT_BLOCK):
+        chunk = resampler.process(padded[i:i + ONESHOT_BLOCK])
+        out[n:n + len(chunk)] = chunk
+        n += len(chunk)
+    return out[delay:min(n, delay + expected)]
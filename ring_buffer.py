@@ -0,0 +1,132 @@
+"""
+Buffer circular de audio preasignado (un escritor, varios lectores)
+
+El callback de PortAudio escribe cada bloque con una sola copia en un array
+float32 de capacidad fija, sin locks ni asignaciones. Los consumidores
+(ventana de tiempo real, contexto, ventanas con overlap) leen por posición
+absoluta de muestra y obtienen vistas sin copia siempre que el rango no
+cruce el final del array.
+"""
+
+import numpy as np
+
+
+class BufferOverrun(Exception):
+    """El rango pedido ya fue sobrescrito por el escritor"""
+
+
+class AudioRingBuffer:
+    """Buffer circular float32 mono con posiciones absolutas de muestra"""
+
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        # Total de muestras escritas desde el inicio (solo lo modifica el escritor).
+        # Con el GIL la lectura/escritura de un int es atómica.
+        self.write_pos = 0
+
+    @classmethod
+    def for_duration(cls, seconds, sample_rate, block_size=None):
+        """Crear un buffer para `seconds` de audio (múltiplo de `block_size` si se indica)"""
+        capacity = int(seconds * sample_rate)
+        if block_size:
+            # Capacidad múltiplo del bloque: un bloque nunca se parte al dar la vuelta
+            capacity = -(-capacity // block_size) * block_size
+        return cls(capacity)
+
+    @property
+    def oldest_pos(self):
+        """Primera posición absoluta todavía disponible"""
+        return max(0, self.write_pos - self.capacity)
+
+    def reset(self):
+        """Olvidar el contenido (no libera memoria)"""
+        self.write_pos = 0
+
+    def write(self, block):
+        """Escribir un bloque (lado del callback: sin locks ni asignaciones)"""
+        n = len(block)
+        if n == 0:
+            return
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            self.write_pos += n - self.capacity
+            n = self.capacity
+
+        start = self.write_pos % self.capacity
+        end = start + n
+        if end <= self.capacity:
+            self._data[start:end] = block
+        else:
+            first = self.capacity - start
+            self._data[start:] = block[:first]
+            self._data[:n - first] = block[first:]
+        # Publicar la nueva posición solo después de copiar los datos
+        self.write_pos += n
+
+    def views(self, start, stop):
+        """Devolver una o dos vistas sin copia del rango [start, stop)"""
+        self._check_range(start, stop)
+        if stop <= start:
+            return (self._data[:0],)
+        a = start % self.capacity
+        b = a + (stop - start)
+        if b <= self.capacity:
+            return (self._data[a:b],)
+        return (self._data[a:], self._data[:b - self.capacity])
+
+    def read(self, start, stop, copy=False):
+        """Leer [start, stop) como array contiguo (vista si no cruza el final del buffer)"""
+        parts = self.views(start, stop)
+        if len(parts) == 1:
+            out = parts[0].copy() if copy else parts[0]
+        else:
+            out = np.concatenate(parts)
+        # Validación tipo seqlock: si el escritor nos alcanzó mientras leíamos, los datos no valen
+        self._check_range(start, stop)
+        return out
+
+    def latest(self, n):
+        """Posiciones (start, stop) de las últimas `n` muestras disponibles"""
+        stop = self.write_pos
+        return max(self.oldest_pos, stop - int(n)), stop
+
+    def _check_range(self, start, stop):
+        if start < self.oldest_pos:
+            raise BufferOverrun(f"Posición {start} sobrescrita (más antigua disponible: {self.oldest_pos})")
+        if stop > self.write_pos:
+            raise ValueError(f"Posición {stop} todavía no escrita (escrito hasta {self.write_pos})")
+
+
+class RingReader:
+    """Cursor de lectura independiente sobre un AudioRingBuffer"""
+
+    def __init__(self, ring, start=None):
+        self.ring = ring
+        self.cursor = ring.write_pos if start is None else start
+
+    def available(self):
+        """Muestras escritas aún no consumidas por este lector"""
+        return self.ring.write_pos - self.cursor
+
+    def skip_overrun(self):
+        """Saltar lo que ya fue sobrescrito; devuelve las muestras perdidas"""
+        lost = self.ring.oldest_pos - self.cursor
+        if lost > 0:
+            self.cursor += lost
+            return lost
+        return 0
+
+    def peek(self, n, copy=False):
+        """Leer `n` muestras desde el cursor sin avanzar"""
+        return self.ring.read(self.cursor, self.cursor + n, copy=copy)
+
+    def advance(self, n):
+        """Avanzar el cursor `n` muestras"""
+        self.cursor += n
+
+    def read(self, n, copy=False):
+        """Leer `n` muestras y avanzar"""
+        data = self.peek(n, copy=copy)
+        self.cursor += n
+        return data
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Persistencia de sesiones: transcripción y traducción en SQLite, sin bloquear
+
+Hasta ahora la transcripción vivía solo en listas recortadas y en el widget
+de Tk: al salir se perdía todo. SessionStore guarda cada segmento (hora,
+posición en el audio, texto, traducción, confianza y modelo de Whisper
+usado y, con varias fuentes a la vez, el flujo de origen) en una base SQLite
+de solo inserción:
+
+- record_segment() solo encola: el camino caliente nunca espera al disco.
+  Un hilo escritor agrupa lo pendiente en una transacción cada
+  commit_interval_seconds (o batch_size segmentos)
+- Modo WAL con synchronous=NORMAL: cada commit es atómico y la base queda
+  consistente tras un cierre abrupto; el WAL se lleva a disco (checkpoint,
+  con fsync) cada fsync_interval_seconds y al cerrar
+- Al arrancar, las sesiones que quedaron abiertas por un cierre inesperado
+  se marcan como 'recovered' con lo que alcanzó a escribirse
+
+Búsqueda: un índice FTS5 (segments_fts) sobre texto y traducción se
+actualiza con un trigger en la misma transacción que inserta cada segmento;
+search() devuelve los segmentos que coinciden con su sesión y su posición en
+el audio en milisegundos. Sin FTS5 en el SQLite instalado se recurre a LIKE.
+
+Listado, exportación (jsonl, txt o srt) y búsqueda desde la línea de comandos:
+  python session_store.py --list
+  python session_store.py --export last --format srt --output sesion.srt
+  python session_store.py --search "budget"
+
+El JSONL exportado lleva 'text' y 'translation': sirve como prewarm_files
+de la caché de traducción.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL,
+    source TEXT,
+    model TEXT,
+    status TEXT NOT NULL,
+    heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    kind TEXT NOT NULL,
+    created REAL NOT NULL,
+    start REAL,
+    end REAL,
+    text TEXT NOT NULL,
+    translation TEXT,
+    avg_logprob REAL,
+    no_speech_prob REAL,
+    model TEXT,
+    stream TEXT
+);
+CREATE INDEX IF NOT EXISTS segments_session ON segments(session_id, id);
+"""
+
+# Índice de texto completo sobre segments (contenido externo: no duplica el texto).
+# remove_diacritics: "politica" encuentra "política"
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, translation, content='segments', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_fts_insert AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts(rowid, text, translation) VALUES (new.id, new.text, new.translation);
+END;
+"""
+
+SEGMENT_FIELDS = ('session_id', 'kind', 'created', 'start', 'end', 'text', 'translation', 'avg_logprob',
+                  'no_speech_prob', 'model', 'stream')
+EXPORT_FORMATS = ('jsonl', 'txt', 'srt')
+
+_session_numbers = itertools.count(1)
+
+
+def connect(path):
+    """Conexión con el esquema creado y el modo WAL activado"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Bases anteriores a la captura de varios flujos
+    if 'stream' not in [row[1] for row in conn.execute("PRAGMA table_info(segments)")]:
+        conn.execute("ALTER TABLE segments ADD COLUMN stream TEXT")
+    conn.commit()
+    _ensure_search_index(conn)
+    return conn
+
+
+def _has_search_index(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name='segments_fts'").fetchone() is not None
+
+
+def _ensure_search_index(conn):
+    """Crear el índice FTS5 (e indexar lo ya guardado si la base es anterior); False si no hay FTS5"""
+    if _has_search_index(conn):
+        return True
+    try:
+        conn.executescript(SEARCH_SCHEMA)
+        conn.execute("INSERT INTO segments_fts(segments_fts) VALUES('rebuild')")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ SQLite sin FTS5 ({e}): la búsqueda recorrerá los segmentos")
+        return False
+    return True
+
+
+def recover_sessions(conn, stale_after):
+    """Cerrar las sesiones abiertas cuyo escritor dejó de latir; devuelve [(id, segmentos)]
+
+    Cada escritor actualiza `heartbeat` de su sesión en cada checkpoint: una
+    sesión activa sin latido reciente es de un proceso que terminó sin cerrarla
+    (y no de otra instancia en marcha).
+    """
+    rows = conn.execute("""
+        SELECT s.id, s.started, MAX(g.created), COUNT(g.id)
+        FROM sessions s LEFT JOIN segments g ON g.session_id = s.id
+        WHERE s.status = 'active' AND COALESCE(s.heartbeat, s.started) < ? GROUP BY s.id
+    """, (time.time() - stale_after,)).fetchall()
+    for session_id, started, last_segment, _ in rows:
+        conn.execute("UPDATE sessions SET status='recovered', ended=? WHERE id=?",
+                     (last_segment or started, session_id))
+    conn.commit()
+    return [(session_id, count) for session_id, _, _, count in rows]
+
+
+class SessionStore:
+    """Escritor en segundo plano de las sesiones de transcripción"""
+
+    def __init__(self, path=None, commit_interval_seconds=None, fsync_interval_seconds=None, batch_size=None):
+        opts = config.SESSION_CONFIG
+        self.path = path or opts['path']
+        self.commit_interval = commit_interval_seconds or opts['commit_interval_seconds']
+        self.fsync_interval = fsync_interval_seconds or opts['fsync_interval_seconds']
+        self.batch_size = batch_size or opts['batch_size']
+        self.session_id = None
+        self.started = None
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._reader = None
+        self._reader_lock = threading.Lock()
+        self.error = None
+        self.written = 0
+        self.recovered = []
+
+    def start(self):
+        """Abrir la base en el hilo escritor (recupera sesiones interrumpidas)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="session-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def begin_session(self, source=None, model=None):
+        """Abrir una sesión nueva (cierra la anterior); devuelve su id"""
+        if self.session_id is not None:
+            self.end_session()
+        self.started = time.time()
+        # Único aunque varias instancias (o sesiones seguidas) empiecen en el mismo segundo
+        self.session_id = (time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started)) +
+                           f"-{os.getpid()}-{next(_session_numbers)}")
+        self._queue.put(('begin', (self.session_id, self.started, source, model)))
+        return self.session_id
+
+    def end_session(self):
+        if self.session_id is not None:
+            self._queue.put(('end', (self.session_id, time.time())))
+            self.session_id = None
+
+    def record_segment(self, text, translation=None, kind='segment', start=None, end=None, avg_logprob=None,
+                       no_speech_prob=None, model=None, created=None, stream=None):
+        """Encolar un segmento de la sesión actual (no bloquea; sin sesión abierta se ignora)"""
+        if self.session_id is None or not text:
+            return
+        self._queue.put(('segment', (self.session_id, kind, created or time.time(), start, end, text,
+                                     translation, avg_logprob, no_speech_prob, model, stream)))
+
+    def on_event(self, event):
+        """Suscriptor del pipeline (pipeline.subscribe): guarda segmentos y contextos"""
+        if event['type'] == 'segment':
+            self.record_segment(event['text'], event['translation'], start=event['start'], end=event['end'],
+                                avg_logprob=event.get('avg_logprob'), no_speech_prob=event.get('no_speech_prob'),
+                                model=event.get('model'), stream=event.get('source'))
+        elif event['type'] == 'context':
+            self.record_segment(event['text'], event['translation'], kind='context', stream=event.get('source'))
+
+    def _writer(self):
+        try:
+            conn = connect(self.path)
+            self.recovered = recover_sessions(conn, stale_after=3 * self.fsync_interval + self.commit_interval)
+            for session_id, count in self.recovered:
+                print(f"♻️ Sesión {session_id} interrumpida: recuperados {count} segmentos")
+        except Exception as e:
+            self.error = e
+            print(f"❌ Error abriendo el almacén de sesiones: {e}")
+            return
+
+        pending = []
+        last_commit = last_sync = time.monotonic()
+        running = True
+        while running:
+            try:
+                kind, payload = self._queue.get(timeout=self.commit_interval)
+                if kind is None:
+                    running = False
+                else:
+                    pending.append((kind, payload))
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            if pending and (not running or len(pending) >= self.batch_size or
+                            now - last_commit >= self.commit_interval):
+                self._commit(conn, pending)
+                pending = []
+                last_commit = now
+            if not running or now - last_sync >= self.fsync_interval:
+                try:
+                    with conn:
+                        conn.execute("UPDATE sessions SET heartbeat=? WHERE status='active' AND id=?",
+                                     (time.time(), self.session_id))
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)" if running else "PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    print(f"⚠️ Checkpoint de sesiones fallido: {e}")
+                last_sync = now
+        conn.close()
+
+    def _commit(self, conn, pending):
+        """Escribir un lote en una sola transacción"""
+        try:
+            with conn:
+                for kind, payload in pending:
+                    if kind == 'segment':
+                        conn.execute(f"INSERT INTO segments ({', '.join(SEGMENT_FIELDS)}) "
+                                     f"VALUES ({', '.join('?' * len(SEGMENT_FIELDS))})", payload)
+                    elif kind == 'begin':
+                        conn.execute("INSERT OR IGNORE INTO sessions (id, started, source, model, status, heartbeat) "
+                                     "VALUES (?, ?, ?, ?, 'active', ?)", payload + (payload[1],))
+                    elif kind == 'end':
+                        conn.execute("UPDATE sessions SET status='closed', ended=? WHERE id=?",
+                                     (payload[1], payload[0]))
+            self.written += sum(1 for kind, _ in pending if kind == 'segment')
+        except sqlite3.Error as e:
+            print(f"Error guardando la sesión ({len(pending)} registros perdidos): {e}")
+
+    def close(self, timeout=5.0):
+        """Cerrar la sesión abierta, escribir lo pendiente y hacer checkpoint"""
+        self.end_session()
+        if self._thread is not None:
+            self._queue.put((None, None))
+            self._thread.join(timeout)
+            self._thread = None
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def search(self, query, **options):
+        """search() sobre la base de este almacén (conexión de lectura propia, fuera del escritor)"""
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = connect(self.path)
+            return search(self._reader, query, **options)
+
+    def stats(self):
+        return {'session': self.session_id, 'written': self.written, 'pending': self._queue.qsize()}
+
+
+def list_sessions(conn):
+    return conn.execute("""
+        SELECT s.id, s.started, s.ended, s.status, s.source, s.model, COUNT(g.id)
+        FROM sessions s LEFT JOIN segments g ON g.session_id = s.id
+        GROUP BY s.id ORDER BY s.started
+    """).fetchall()
+
+
+def session_segments(conn, session_id):
+    """Segmentos de una sesión en orden de escritura, como dicts"""
+    rows = conn.execute(f"SELECT {', '.join(SEGMENT_FIELDS)} FROM segments WHERE session_id=? ORDER BY id",
+                        (session_id,))
+    return [dict(zip(SEGMENT_FIELDS, row)) for row in rows]
+
+
+def match_query(text):
+    """Consulta FTS5 a partir de lo que escribe el usuario
+
+    Cada palabra (o "frase entre comillas") se busca literal y todas deben
+    aparecer; `presup*` busca por prefijo. Así la puntuación no rompe la
+    sintaxis de FTS5.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', text):
+        if phrase:
+            terms.append('"' + phrase + '"')
+            continue
+        prefix = word.endswith('*')
+        word = " ".join(re.findall(r'\w+', word))
+        if word:
+            terms.append('"' + word + '"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+
+def search(conn, query, session_id=None, limit=50, order='time'):
+    """Segmentos que contienen `query` en el texto o la traducción
+
+    Devuelve dicts con session_id, segment_id, kind, created, start_ms,
+    end_ms (posición en el audio de la sesión; None en los resúmenes de
+    contexto), stream, text, translation y snippet (coincidencias entre [ ]).
+    order='time' ordena por sesión y posición; 'rank', por relevancia (bm25).
+    """
+    columns = "g.id, g.session_id, g.kind, g.created, g.start, g.end, g.stream, g.text, g.translation"
+    params = []
+    if _has_search_index(conn):
+        expression = match_query(query)
+        if not expression:
+            return []
+        sql = (f"SELECT {columns}, snippet(segments_fts, -1, '[', ']', '…', 12) "
+               "FROM segments_fts JOIN segments g ON g.id = segments_fts.rowid WHERE segments_fts MATCH ?")
+        params.append(expression)
+    else:
+        sql = f"SELECT {columns}, NULL FROM segments g WHERE (g.text LIKE ? OR g.translation LIKE ?)"
+        params += [f"%{query}%"] * 2
+    if session_id is not None:
+        sql += " AND g.session_id = ?"
+        params.append(session_id)
+    sql += " ORDER BY rank" if order == 'rank' and _has_search_index(conn) else " ORDER BY g.id"
+    sql += " LIMIT ?"
+    params.append(limit)
+
+    results = []
+    for row in conn.execute(sql, params):
+        segment_id, session, kind, created, start, end, stream, text, translation, snippet = row
+        results.append({
+            'session_id': session,
+            'segment_id': segment_id,
+            'kind': kind,
+            'created': created,
+            'start_ms': None if start is None else int(round(start * 1000)),
+            'end_ms': None if end is None else int(round(end * 1000)),
+            'stream': stream,
+            'text': text,
+            'translation': translation,
+            'snippet': snippet or text
+        })
+    return results
+
+
+def format_offset(millis, separator="."):
+    """Milisegundos → HH:MM:SS.mmm (con separator=',' el formato de SRT)"""
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    seconds, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}"
+
+
+def _stream_prefix(segment):
+    return f"[{segment['stream']}] " if segment['stream'] else ""
+
+
+def _srt_time(seconds):
+    return format_offset(int(round(seconds * 1000)), ",")
+
+
+def export_session(conn, session_id, output, fmt='jsonl'):
+    """Escribir la sesión en `output` (archivo abierto); devuelve los segmentos exportados"""
+    segments = session_segments(conn, session_id)
+    if fmt == 'jsonl':
+        for segment in segments:
+            output.write(json.dumps(segment, ensure_ascii=False) + "\n")
+    elif fmt == 'txt':
+        for segment in segments:
+            stamp = time.strftime("%H:%M:%S", time.localtime(segment['created']))
+            output.write(f"[{stamp}] {_stream_prefix(segment)}{segment['text']}\n")
+            if segment['translation']:
+                output.write(f"           {segment['translation']}\n")
+    elif fmt == 'srt':
+        # Solo los segmentos con posición en el audio (no los resúmenes de contexto)
+        timed = [s for s in segments if s['start'] is not None and s['end'] is not None]
+        for index, segment in enumerate(timed, 1):
+            output.write(f"{index}\n{_srt_time(segment['start'])} --> {_srt_time(segment['end'])}\n"
+                         f"{_stream_prefix(segment)}{segment['translation'] or segment['text']}\n\n")
+        segments = timed
+    else:
+        raise ValueError(f"Formato de exportación desconocido: '{fmt}' (disponibles: {', '.join(EXPORT_FORMATS)})")
+    return len(segments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=config.SESSION_CONFIG['path'], help="base de datos de sesiones")
+    parser.add_argument('--list', action='store_true', help="listar las sesiones guardadas")
+    parser.add_argument('--export', metavar='ID', help="id de la sesión a exportar ('last' = la más reciente)")
+    parser.add_argument('--format', default='jsonl', choices=EXPORT_FORMATS)
+    parser.add_argument('--output', default='-', help="archivo de salida o '-' para stdout")
+    parser.add_argument('--search', metavar='TEXTO', help="buscar en textos y traducciones de todas las sesiones")
+    parser.add_argument('--session', help="limitar la búsqueda a una sesión ('last' = la más reciente)")
+    parser.add_argument('--limit', type=int, default=50, help="máximo de resultados de la búsqueda")
+    parser.add_argument('--rank', action='store_true', help="ordenar por relevancia en vez de por tiempo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ No existe {args.db}", file=sys.stderr)
+        return 1
+    conn = connect(args.db)
+    # Solo se cierran sesiones sin latido: la aplicación puede estar escribiendo la actual
+    opts = config.SESSION_CONFIG
+    stale_after = 3 * opts['fsync_interval_seconds'] + opts['commit_interval_seconds']
+    for session_id, count in recover_sessions(conn, stale_after):
+        print(f"♻️ Sesión {session_id} interrumpida: recuperados {count} segmentos", file=sys.stderr)
+    sessions = list_sessions(conn)
+
+    if args.search:
+        session_id = sessions[-1][0] if args.session == 'last' and sessions else args.session
+        results = search(conn, args.search, session_id=session_id, limit=args.limit,
+                         order='rank' if args.rank else 'time')
+        for result in results:
+            offset = format_offset(result['start_ms']) if result['start_ms'] is not None else "contexto".ljust(12)
+            print(f"{result['session_id']}  {offset}  {_stream_prefix(result)}{result['snippet']}")
+            if result['translation']:
+                print(f"{'':{len(result['session_id']) + 16}}→ {result['translation']}")
+        print(f"🔍 {len(results)} resultados para '{args.search}'", file=sys.stderr)
+        return 0
+
+    if args.list or not args.export:
+        for session_id, started, ended, status, source, model, count in sessions:
+            duration = f"{(ended - started) / 60:.1f} min" if ended else "en curso"
+            print(f"{session_id}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(started))}  {duration:>10}  "
+                  f"{count:5d} segmentos  {status:<9}  {source or ''} {model or ''}")
+        return 0
+
+    session_id = sessions[-1][0] if args.export == 'last' and sessions else args.export
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        count = export_session(conn, session_id, output, args.format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"📤 Sesión {session_id}: {count} segmentos exportados ({args.format})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
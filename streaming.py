@@ -0,0 +1,187 @@
+"""
+Transcripción en streaming con confirmación por acuerdo (LocalAgreement-2)
+
+Cada pocos cientos de ms se vuelve a decodificar el audio acumulado del
+enunciado en curso. Las palabras que coinciden como prefijo en dos
+decodificaciones consecutivas se confirman; el resto es una hipótesis parcial
+que solo se muestra. El texto confirmado sirve de prompt para las pasadas
+siguientes y el audio ya confirmado se recorta del buffer, así el coste de
+cada pasada queda acotado. Solo el texto confirmado, agrupado en frases, pasa
+a traducción.
+"""
+
+import re
+
+import config
+from context_builder import result_confidence
+
+_NON_WORD = re.compile(r"[^\w']+")
+_SENTENCE_END = re.compile(r"[.?!…]['\"]?$")
+
+
+def normalize_word(word):
+    """Forma comparable de una palabra (sin mayúsculas ni puntuación)"""
+    return _NON_WORD.sub("", word.lower())
+
+
+class LocalAgreement:
+    """Confirma el prefijo común de hipótesis consecutivas; palabras = (start, end, texto)"""
+
+    def __init__(self, tolerance_samples=0, overlap_words=5):
+        self.tolerance = tolerance_samples
+        self.overlap_words = overlap_words
+        self.reset()
+
+    def reset(self):
+        self.previous = []        # Parte no confirmada de la hipótesis anterior
+        self.committed_tail = []  # Últimas palabras confirmadas (para quitar solapes)
+        self.committed_end = 0
+
+    def _fresh(self, words):
+        """Quitar de una hipótesis lo que ya está confirmado"""
+        words = [w for w in words if w[0] >= self.committed_end - self.tolerance]
+        # El audio del borde puede re-transcribirse: quitar el n-grama repetido
+        tail = [normalize_word(w[2]) for w in self.committed_tail]
+        for n in range(min(len(tail), len(words)), 0, -1):
+            if tail[-n:] == [normalize_word(w[2]) for w in words[:n]]:
+                return words[n:]
+        return words
+
+    def insert(self, words):
+        """Registrar una hipótesis nueva; devuelve (confirmadas, parciales)"""
+        words = self._fresh(words)
+        committed = []
+        while words and self.previous and normalize_word(words[0][2]) == normalize_word(self.previous[0][2]):
+            committed.append(words.pop(0))
+            self.previous.pop(0)
+        self.previous = words
+        self._commit(committed)
+        return committed, list(words)
+
+    def flush(self, words=None):
+        """Confirmar todo lo pendiente (fin de enunciado); `words` es la última hipótesis si la hay"""
+        rest = self._fresh(words) if words is not None else self.previous
+        self.previous = []
+        self._commit(rest)
+        return rest
+
+    def _commit(self, words):
+        if words:
+            self.committed_tail = (self.committed_tail + words)[-self.overlap_words:]
+            self.committed_end = words[-1][1]
+
+
+class StreamingTranscriber:
+    """Re-decodifica el enunciado en curso y emite frases confirmadas"""
+
+    def __init__(self, ring, transcribe, sample_rate=config.SAMPLE_RATE, **overrides):
+        opts = dict(config.STREAMING_CONFIG)
+        opts.update(overrides)
+        self.ring = ring
+        self.transcribe = transcribe  # transcribe(audio, prompt) -> resultado de Whisper con 'words'
+        self.sample_rate = sample_rate
+        self.step_samples = int(sample_rate * opts['step_ms'] / 1000)
+        self.min_audio = int(sample_rate * opts['min_audio_ms'] / 1000)
+        self.trim_after = int(sample_rate * opts['trim_seconds'])
+        self.max_buffer = int(sample_rate * opts['max_buffer_seconds'])
+        self.prompt_chars = config.CONTEXT_CONFIG['prompt_chars']
+        self.agreement = LocalAgreement(tolerance_samples=int(0.1 * sample_rate))
+        self.reset()
+
+    def reset(self):
+        """Olvidar todo (nueva sesión)"""
+        self.agreement.reset()
+        self.buffer_start = None
+        self.last_decode_end = 0
+        self.prompt_text = ""
+        self.sentence = []   # Palabras confirmadas de la frase en curso
+        self.partial = []    # Hipótesis sin confirmar
+        self.last_result = None
+        self.decodes = 0
+        self.forced_commits = 0
+
+    @property
+    def active(self):
+        return self.buffer_start is not None
+
+    def begin(self, start_pos):
+        """Empezar un enunciado en `start_pos` (sin efecto si ya hay uno en curso)"""
+        if self.buffer_start is None:
+            self.buffer_start = max(start_pos, self.agreement.committed_end)
+            self.last_decode_end = self.buffer_start
+
+    def due(self, end_pos):
+        """¿Toca una nueva pasada?"""
+        return (self.active and end_pos - self.last_decode_end >= self.step_samples and
+                end_pos - self.buffer_start >= self.min_audio)
+
+    def _decode(self, end_pos):
+        audio = self.ring.read(self.buffer_start, end_pos)
+        result = self.transcribe(audio, self.prompt_text.strip())
+        self.last_result = result
+        self.last_decode_end = end_pos
+        self.decodes += 1
+        words = []
+        for seg in result.get("segments") or []:
+            for w in seg.get("words") or []:
+                text = w['word'].strip()
+                if text:
+                    words.append((self.buffer_start + int(w['start'] * self.sample_rate),
+                                  self.buffer_start + int(w['end'] * self.sample_rate), text))
+        return words
+
+    def step(self, end_pos):
+        """Decodificar hasta `end_pos`; devuelve las frases completadas [(start, end, texto)]"""
+        committed, self.partial = self.agreement.insert(self._decode(end_pos))
+        sentences = self._collect(committed)
+
+        if end_pos - self.buffer_start > self.max_buffer:
+            # Sin acuerdo durante demasiado tiempo: confirmar la hipótesis y seguir
+            self.forced_commits += 1
+            sentences += self._collect(self.agreement.flush(), final=True)
+            self.partial = []
+            self.buffer_start = max(self.buffer_start, self.agreement.committed_end, end_pos - self.min_audio)
+        elif end_pos - self.buffer_start > self.trim_after and self.agreement.committed_end > self.buffer_start:
+            # Recortar el audio ya confirmado: cada pasada decodifica como mucho ~trim_seconds
+            self.buffer_start = self.agreement.committed_end
+        return sentences
+
+    def finish(self, end_pos):
+        """Fin de enunciado (pausa del VAD): última pasada y confirmar todo"""
+        if not self.active:
+            return []
+        words = self._decode(end_pos) if end_pos > self.buffer_start else None
+        sentences = self._collect(self.agreement.flush(words), final=True)
+        self.buffer_start = None
+        self.partial = []
+        return sentences
+
+    def abandon(self):
+        """El audio del enunciado ya salió del buffer: descartar la hipótesis sin confirmar"""
+        self.agreement.previous = []
+        self.buffer_start = None
+        self.partial = []
+
+    def _collect(self, committed, final=False):
+        """Agrupar palabras confirmadas en frases (para traducir con sentido)"""
+        sentences = []
+        for word in committed:
+            self.sentence.append(word)
+            self.prompt_text = (self.prompt_text + " " + word[2])[-self.prompt_chars:]
+            if _SENTENCE_END.search(word[2]):
+                sentences.append(self._close_sentence())
+        if final and self.sentence:
+            sentences.append(self._close_sentence())
+        return sentences
+
+    def _close_sentence(self):
+        words, self.sentence = self.sentence, []
+        return words[0][0], words[-1][1], " ".join(w[2] for w in words)
+
+    def confidence(self):
+        """(avg_logprob, no_speech_prob) de la última pasada"""
+        return result_confidence(self.last_result or {})
+
+    def display(self):
+        """(texto confirmado de la frase en curso, hipótesis parcial)"""
+        return " ".join(w[2] for w in self.sentence), " ".join(w[2] for w in self.partial)
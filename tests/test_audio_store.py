@@ -0,0 +1,100 @@
+import wave
+
+import numpy as np
+import pytest
+
+from audio_store import AudioStore, export_wav
+from ring_buffer import BufferOverrun
+
+
+def tone(samples, start=0):
+    return (0.5 * np.sin(np.arange(start, start + samples) * 0.01)).astype(np.float32)
+
+
+def new_store(tmp_path, dtype='int16', retention_seconds=3600):
+    # 10 muestras/s y segmentos de 1 s para ver los límites con números pequeños
+    store = AudioStore(str(tmp_path / 'audio'), sample_rate=10, dtype=dtype, segment_seconds=1,
+                       retention_seconds=retention_seconds)
+    store.reset()
+    return store
+
+
+def test_float32_round_trip_across_segments(tmp_path):
+    store = new_store(tmp_path, 'float32')
+    store.write(tone(7))
+    store.write(tone(18, 7))
+    assert store.write_pos == 25 and len(store.views(5, 25)) == 3
+    np.testing.assert_array_equal(store.read(5, 25), tone(25)[5:])
+    np.testing.assert_array_equal(store.read(12, 18), tone(25)[12:18])
+
+
+def test_int16_round_trip_within_quantization(tmp_path):
+    store = new_store(tmp_path, 'int16')
+    store.write(tone(25))
+    assert store.disk_bytes == 50
+    np.testing.assert_allclose(store.read(0, 25), tone(25), atol=1 / 32768)
+
+
+def test_unwritten_range_is_an_error(tmp_path):
+    store = new_store(tmp_path)
+    store.write(tone(5))
+    with pytest.raises(ValueError):
+        store.read(0, 6)
+
+
+def test_retention_evicts_whole_segments(tmp_path):
+    store = new_store(tmp_path, 'float32', retention_seconds=2)
+    store.write(tone(45))
+    # 45 muestras con 20 de retención: se borran los segmentos [0, 10) y [10, 20)
+    assert store.first_segment == 2 and store.oldest_pos == 20
+    assert store._segments() == [2, 3, 4]
+    np.testing.assert_array_equal(store.read(20, 45), tone(45)[20:])
+    with pytest.raises(BufferOverrun):
+        store.read(19, 25)
+
+
+def test_fill_to_pads_with_silence(tmp_path):
+    store = new_store(tmp_path, 'float32')
+    store.write(tone(3))
+    store.fill_to(12)
+    store.write(tone(2))
+    audio = store.read(0, 14)
+    np.testing.assert_array_equal(audio[3:12], 0.0)
+    np.testing.assert_array_equal(audio[12:], tone(2))
+
+
+def test_reopen_after_writer_stops(tmp_path):
+    store = new_store(tmp_path, 'int16', retention_seconds=1)
+    store.write(tone(27))
+    store.close()
+
+    reopened = AudioStore.open(store.path)
+    assert (reopened.dtype, reopened.segment_samples, reopened.sample_rate) == (np.dtype(np.int16), 10, 10)
+    assert (reopened.oldest_pos, reopened.write_pos) == (store.oldest_pos, 27)
+    np.testing.assert_array_equal(reopened.read(store.oldest_pos, 27), store.read(store.oldest_pos, 27))
+
+
+def test_reset_discards_previous_audio(tmp_path):
+    store = new_store(tmp_path)
+    store.write(tone(15))
+    store.reset()
+    assert store.write_pos == 0 and store._segments() == []
+
+
+def test_export_wav(tmp_path):
+    store = new_store(tmp_path, 'float32')
+    store.write(tone(25))
+    path = str(tmp_path / 'tramo.wav')
+    export_wav(store, 4, 23, path)
+    with wave.open(path, 'rb') as f:
+        assert (f.getnchannels(), f.getsampwidth(), f.getframerate(), f.getnframes()) == (1, 2, 10, 19)
+        frames = np.frombuffer(f.readframes(19), dtype='<i2')
+    np.testing.assert_allclose(frames / 32768.0, tone(25)[4:23], atol=1 / 32768)
+
+
+def test_zero_retention_is_not_the_default(tmp_path):
+    store = new_store(tmp_path, 'float32', retention_seconds=0)
+    store.write(tone(25))
+    # Solo queda el segmento en escritura
+    assert store.retention == 0 and store.oldest_pos == 20
+
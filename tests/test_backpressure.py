@@ -0,0 +1,112 @@
+import threading
+import time
+
+import config
+from backpressure import BoundedQueue
+from metrics import SegmentTrace
+from pipeline import merge_segments, segment_seconds
+
+
+def drain(q):
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+def test_drop_oldest_keeps_newest():
+    q = BoundedQueue('t_oldest', policy='drop_oldest', max_items=2)
+    for item in 'abc':
+        assert q.put(item)
+    assert drain(q) == ['b', 'c']
+    assert q.dropped == 1
+
+
+def test_drop_newest_rejects_incoming():
+    q = BoundedQueue('t_newest', policy='drop_newest', max_items=2)
+    assert q.put('a') and q.put('b')
+    assert not q.put('c')
+    assert drain(q) == ['a', 'b']
+    assert q.dropped == 1
+
+
+def test_blocking_put_waits_under_drop_newest():
+    q = BoundedQueue('t_newest_block', policy='drop_newest', max_items=1)
+    q.put('a')
+    threading.Timer(0.05, q.get).start()
+    started = time.monotonic()
+    assert q.put('b', block=True, timeout=2)
+    assert time.monotonic() - started >= 0.04
+    assert drain(q) == ['b']
+    assert q.dropped == 0
+
+
+def test_block_policy_times_out():
+    q = BoundedQueue('t_block', policy='block', max_items=1, timeout_seconds=0.05)
+    q.put('a')
+    assert not q.put('b')
+    assert drain(q) == ['a']
+
+
+def test_merge_by_cost():
+    q = BoundedQueue('t_merge', policy='merge', capacity=3, size_of=len, merge=lambda a, b: a + b)
+    assert q.put('ab')
+    assert q.put('cd')
+    assert q.merged == 1 and q.load == 4
+    assert drain(q) == ['abcd']
+
+
+def test_merge_falls_back_to_drop_oldest():
+    q = BoundedQueue('t_merge_drop', policy='merge', max_items=1, merge=lambda a, b: None)
+    q.put('a')
+    assert q.put('b')
+    assert drain(q) == ['b'] and q.dropped == 1
+
+
+def realtime_item(start, end, forced, captured):
+    trace = SegmentTrace(captured, start=start, end=end).mark('closed', captured + 0.5)
+    return 'realtime', (start, end), forced, trace
+
+
+def test_merge_segments_keeps_pause_and_earliest_marks(monkeypatch):
+    monkeypatch.setitem(config.BACKPRESSURE_CONFIG['realtime'], 'merge_gap_seconds', 1.0)
+    rate = config.SAMPLE_RATE
+    previous = realtime_item(0, 2 * rate, False, 10.0)
+    item = realtime_item(2 * rate, 4 * rate, True, 12.0)
+
+    kind, span, forced, trace = merge_segments(previous, item)
+
+    assert span == (0, 4 * rate)
+    assert forced is False
+    assert trace.marks['captured'] == 10.0 and trace.marks['closed'] == 10.5
+    assert trace['merged'] == 1 and trace['start'] == 0
+    # Las entradas no cambian
+    assert item[3]['start'] == 2 * rate and 'merged' not in item[3] and item[3].marks['captured'] == 12.0
+
+
+def test_merge_segments_stays_forced_when_both_forced(monkeypatch):
+    monkeypatch.setitem(config.BACKPRESSURE_CONFIG['realtime'], 'merge_gap_seconds', 1.0)
+    rate = config.SAMPLE_RATE
+    merged = merge_segments(realtime_item(0, rate, True, 1.0), realtime_item(rate, 2 * rate, True, 2.0))
+    assert merged[2] is True
+
+
+def test_merge_that_does_not_fit_keeps_original_item():
+    q = BoundedQueue('t_merge_full', policy='merge', capacity=30, max_items=10, size_of=segment_seconds,
+                     merge=merge_segments)
+    rate = config.SAMPLE_RATE
+    for n in range(6):
+        assert q.put(realtime_item(5 * n * rate, 5 * (n + 1) * rate, False, float(n)))
+    last = realtime_item(30 * rate, 34 * rate, False, 6.0)
+
+    # Unido al anterior serían 34 s: no cabe, se descarta el más antiguo y entra el nuevo tal cual
+    assert q.put(last)
+
+    items = drain(q)
+    assert q.merged == 0 and q.dropped == 1
+    assert [item[1] for item in items] == [(5 * n * rate, 5 * (n + 1) * rate) for n in range(1, 6)] + \
+        [(30 * rate, 34 * rate)]
+    _, _, _, trace = items[-1]
+    assert trace is last[3] and trace['start'] == 30 * rate and 'merged' not in trace
+    assert trace.marks['captured'] == 6.0
+    assert all('merged' not in item[3] for item in items)
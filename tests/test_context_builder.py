@@ -0,0 +1,59 @@
+from context_builder import IncrementalContext, result_confidence
+
+GOOD = (-0.2, 0.01)
+BAD = (-1.5, 0.01)
+
+
+def context():
+    return IncrementalContext(sample_rate=100, logprob_threshold=-0.8, no_speech_threshold=0.6, prompt_chars=20,
+                              max_span_seconds=10)
+
+
+def test_result_confidence_is_duration_weighted():
+    result = {'segments': [{'start': 0, 'end': 3, 'avg_logprob': -0.2, 'no_speech_prob': 0.0},
+                           {'start': 3, 'end': 4, 'avg_logprob': -1.0, 'no_speech_prob': 0.4}]}
+    avg_logprob, no_speech_prob = result_confidence(result)
+    assert abs(avg_logprob - (-0.4)) < 1e-9 and abs(no_speech_prob - 0.1) < 1e-9
+    assert result_confidence({'segments': []}) == (0.0, 0.0)
+
+
+def test_low_confidence_segment_is_redecoded_with_previous_text():
+    ctx = context()
+    ctx.add_segment(0, 100, "hello there", *GOOD)
+    ctx.add_segment(100, 200, "garbled", *BAD)
+
+    span_id, start, end, prompt = ctx.next_redecode()
+    assert (start, end, prompt) == (100, 200, "hello there")
+
+    ctx.apply_redecode(span_id, " general Kenobi", -0.3)
+    assert ctx.flush_period() == ("hello there general Kenobi", 2)
+    assert ctx.pending_count() == 0
+
+
+def test_worse_redecode_keeps_realtime_text():
+    ctx = context()
+    ctx.add_segment(0, 100, "garbled", *BAD)
+    span_id = ctx.next_redecode()[0]
+    ctx.apply_redecode(span_id, "worse", -2.0)
+    assert ctx.flush_period()[0] == "garbled"
+
+
+def test_forced_cuts_are_redecoded_together():
+    ctx = context()
+    ctx.add_segment(0, 100, "the quick bro", *GOOD, forced=True)
+    ctx.add_segment(100, 200, "wn fox", *GOOD, forced=False)
+
+    span_id, start, end, _ = ctx.next_redecode()
+    assert span_id == (0, 1) and (start, end) == (0, 200)
+    ctx.apply_redecode(span_id, "the quick brown fox", -0.5)
+    assert ctx.flush_period() == ("the quick brown fox", 2)
+
+
+def test_open_forced_chain_moves_to_next_period():
+    ctx = context()
+    ctx.add_segment(0, 100, "done", *GOOD)
+    ctx.add_segment(100, 200, "still talk", *GOOD, forced=True)
+
+    assert ctx.flush_period() == ("done", 1)
+    ctx.add_segment(200, 300, "ing", *GOOD)
+    assert ctx.next_redecode()[:3] == ((0, 1), 100, 300)
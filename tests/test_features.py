@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from features import MelFeatureRing, mel_filters
+from ring_buffer import AudioRingBuffer, BufferOverrun
+from transcriber import log_mel_batch
+
+
+def filled_ring(seconds, capacity_seconds=20):
+    ring = AudioRingBuffer(capacity_seconds * 16000)
+    audio = (np.random.default_rng(0).standard_normal(int(seconds * 16000)) * 0.1).astype(np.float32)
+    ring.write(audio)
+    return ring, audio
+
+
+def test_window_matches_whisper_log_mel_inside_the_window():
+    ring, audio = filled_ring(5)
+    features = MelFeatureRing(ring, n_mels=80)
+
+    mel = features.window(16000, 48000)
+
+    reference = log_mel_batch([audio[16000:48000]], mel_filters(80))[0][:, :mel.shape[1]]
+    assert mel.shape == (80, 200)
+    # Solo los bordes ven audio distinto (vecino real frente a reflexión)
+    np.testing.assert_allclose(mel[:, 2:-2], reference[:, 2:-2], atol=1e-4)
+
+
+def test_frames_are_computed_on_demand_and_once():
+    ring, _ = filled_ring(10)
+    features = MelFeatureRing(ring, n_mels=80)
+    assert features.computed == 0
+
+    features.window(0, 32000)
+    assert features.computed == 200
+    # Solapada con la anterior: solo las tramas nuevas
+    features.window(16000, 48000)
+    assert features.computed == 300
+    features.window(8000, 24000)
+    assert features.computed == 300
+
+
+def test_frames_without_all_their_audio_wait():
+    ring, _ = filled_ring(1)
+    features = MelFeatureRing(ring, n_mels=80)
+    mel = features.window(0, 16000)
+    # La última trama necesita 200 muestras después del final escrito
+    assert mel.shape == (80, 99) and features.computed == 99
+
+
+def test_overwritten_audio_is_an_overrun():
+    ring, _ = filled_ring(25, capacity_seconds=20)
+    features = MelFeatureRing(ring, n_mels=80)
+    with pytest.raises(BufferOverrun):
+        features.window(0, 16000)
+    assert features.window(10 * 16000, 12 * 16000).shape == (80, 200)
+
+
+def test_reset_forgets_frames():
+    ring, _ = filled_ring(2)
+    features = MelFeatureRing(ring, n_mels=80)
+    features.window(0, 16000)
+    features.reset()
+    features.window(0, 16000)
+    assert features.computed == 200
@@ -0,0 +1,85 @@
+import collections
+import sys
+import threading
+import types
+
+import numpy as np
+
+from inference_workers import TranscriptionPool, _spawn_without_main_script
+
+
+def test_submit_drops_precomputed_mel():
+    pool = TranscriptionPool.__new__(TranscriptionPool)
+    pool.quality = None
+    jobs = []
+    pool._enqueue = lambda arrays, tag, options: jobs.append((tag, options))
+    audio = np.zeros(16000, dtype=np.float32)
+
+    pool.submit(audio, tag='context', language='en', mel=np.zeros((80, 100), dtype=np.float32))
+    pool.submit(audio, tag='context', language='en')
+
+    assert jobs == [('context', {'language': 'en'}), ('context', {'language': 'en'})]
+
+
+class StubProcess:
+    exitcode = None
+
+    def is_alive(self):
+        return True
+
+
+class StubHandle:
+    def __init__(self, now, job_started):
+        self.disabled = False
+        self.process = StubProcess()
+        self.conn = object()
+        self.last_heartbeat = now
+        self.job_id = 1
+        self.job_started = job_started
+
+
+def health_pool(now, handle, pending=()):
+    pool = TranscriptionPool.__new__(TranscriptionPool)
+    pool._lock = threading.Lock()
+    pool._handles = [handle]
+    pool.heartbeat_timeout = 100.0
+    pool.job_timeout = 10.0
+    pool._jobs = {1: (None, None, False, now - 50.0, None)}
+    pool._jobs.update({job_id: (None, None, False, now - 50.0, None) for job_id in pending})
+    pool._pending = collections.deque(pending)
+    pool.restarted, pool.finished = [], []
+    pool._restart = lambda handle, reason: pool.restarted.append(reason)
+    pool._finish = lambda job_id, error=None: pool.finished.append(job_id)
+    return pool
+
+
+def test_hang_check_counts_from_dispatch_not_enqueue():
+    now = 1000.0
+    pool = health_pool(now, StubHandle(now, job_started=now - 1.0))
+    pool._check_health(now)
+    assert pool.restarted == []
+
+    pool = health_pool(now, StubHandle(now, job_started=now - 20.0))
+    pool._check_health(now)
+    assert pool.restarted == ["trabajo colgado"]
+
+
+def test_overdue_pending_jobs_use_enqueue_time():
+    now = 1000.0
+    pool = health_pool(now, StubHandle(now, job_started=now), pending=[2])
+    pool._check_health(now)
+    assert pool.restarted == [] and pool.finished == [2]
+
+
+def test_spawn_hides_main_file_and_spec():
+    main_module = sys.modules['__main__']
+    spec = types.SimpleNamespace(name='main_hybrid')
+    saved = main_module.__dict__.get('__spec__')
+    main_module.__spec__ = spec
+    try:
+        with _spawn_without_main_script():
+            assert main_module.__spec__ is None
+            assert not hasattr(main_module, '__file__')
+        assert main_module.__spec__ is spec
+    finally:
+        main_module.__spec__ = saved
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+from metrics import PREFIX, MetricsRegistry, SegmentTrace
+
+
+def lines_of(registry):
+    text = registry.render_prometheus()
+    assert text.endswith("\n")
+    return text.splitlines()
+
+
+def test_prometheus_exposition_format():
+    registry = MetricsRegistry()
+    registry.inc('queue_drops_total', queue='realtime')
+    registry.inc('queue_drops_total', 2, queue='realtime')
+    registry.register('queue_depth', lambda: np.int64(3), queue='translation')
+    registry.observe('whisper_rtf', 0.15)
+    registry.observe('whisper_rtf', 3.0)
+
+    lines = lines_of(registry)
+
+    depth = PREFIX + 'queue_depth'
+    assert lines[lines.index(f"# TYPE {depth} gauge") + 1] == f'{depth}{{queue="translation"}} 3.0'
+    assert f'{PREFIX}queue_drops_total{{queue="realtime"}} 3.0' in lines
+    assert f"# TYPE {PREFIX}whisper_rtf histogram" in lines
+    assert f'{PREFIX}whisper_rtf_bucket{{le="0.1"}} 0' in lines
+    assert f'{PREFIX}whisper_rtf_bucket{{le="0.2"}} 1' in lines
+    assert f'{PREFIX}whisper_rtf_bucket{{le="2.0"}} 1' in lines
+    assert f'{PREFIX}whisper_rtf_bucket{{le="+Inf"}} 2' in lines
+    assert f'{PREFIX}whisper_rtf_count 2' in lines
+    assert f'{PREFIX}whisper_rtf_sum 3.15' in lines
+    # Cada familia: HELP y TYPE antes de sus series
+    helps = [line for line in lines if line.startswith("# HELP")]
+    assert len(helps) == len([line for line in lines if line.startswith("# TYPE")]) == 3
+
+
+def test_unknown_metric_is_untyped():
+    registry = MetricsRegistry()
+    registry.set('custom_value', 1.5)
+    assert lines_of(registry) == [f"# HELP {PREFIX}custom_value custom_value",
+                                  f"# TYPE {PREFIX}custom_value untyped", f"{PREFIX}custom_value 1.5"]
+
+
+def test_bad_collectors_do_not_break_the_scrape(capsys):
+    registry = MetricsRegistry()
+    registry.register('queue_depth', lambda: None, queue='a')
+    registry.register('queue_depth', lambda: "lleno", queue='b')
+    registry.register('queue_depth', lambda: 1 / 0, queue='c')
+    registry.register('queue_depth', lambda: True, queue='d')
+    registry.set('custom_value', 2)
+
+    lines = lines_of(registry)
+    assert f'{PREFIX}queue_depth{{queue="d"}} 1.0' in lines
+    assert f'{PREFIX}custom_value 2.0' in lines
+    assert not any('queue="a"' in line or 'queue="b"' in line or 'queue="c"' in line for line in lines)
+    json.dumps(registry.snapshot())
+
+    # Se avisa una sola vez por serie
+    registry.render_prometheus()
+    assert capsys.readouterr().out.count("omitida") == 2
+
+
+def test_finish_records_stage_latencies():
+    registry = MetricsRegistry()
+    trace = SegmentTrace(10.0).mark('closed', 10.5).mark('transcribe_end', 11.0).mark('displayed', 12.0)
+    registry.finish(trace)
+    assert registry.summary('capture_to_display_seconds')['count'] == 1
+    assert registry.summary('capture_to_display_seconds')['mean'] == pytest.approx(2.0)
+    assert registry.summary('segment_stage_seconds', stage='closed')['mean'] == pytest.approx(0.5)
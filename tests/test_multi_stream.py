@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from inference_workers import InferenceError, InferenceScheduler
+from multi_stream import parse_stream_spec
+
+
+class StubPool:
+    """Lo que el planificador usa de TranscriptionPool; los trabajos terminan al llamar a finish()"""
+
+    worker_count = 1
+    slot_samples = 30 * 16000
+
+    def __init__(self):
+        self.jobs = []
+        self.submitted = threading.Condition()
+
+    def _job(self, kind, items):
+        future = Future()
+        with self.submitted:
+            self.jobs.append((kind, items, future))
+            self.submitted.notify_all()
+        return future
+
+    def submit(self, audio, sample_rate, tag, **options):
+        return self._job('single', [(audio, tag, options)])
+
+    def submit_batch(self, items):
+        return self._job('batch', [(audio, tag, options) for audio, _, tag, options in items])
+
+    def wait_jobs(self, count, timeout=2.0):
+        with self.submitted:
+            assert self.submitted.wait_for(lambda: len(self.jobs) >= count, timeout)
+        return self.jobs
+
+    def finish(self, index):
+        kind, items, future = self.jobs[index]
+        results = [{'text': tag} for _, tag, _ in items]
+        future.set_result(results[0] if kind == 'single' else results)
+
+
+def audio(seconds=1.0):
+    return np.zeros(int(seconds * 16000), dtype=np.float32)
+
+
+@pytest.fixture
+def pool():
+    return StubPool()
+
+
+def scheduler(pool, max_wait_ms=50, max_batch_size=4):
+    return InferenceScheduler(pool, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms).start()
+
+
+def test_streams_arriving_within_max_wait_share_a_batch(pool):
+    shared = scheduler(pool)
+    a = shared.stream('a').submit(audio(), tag='a1', language='en')
+    b = shared.stream('b').submit(audio(), tag='b1', language='en')
+
+    kind, items, _ = pool.wait_jobs(1)[0]
+    assert kind == 'batch' and [tag for _, tag, _ in items] == ['a1', 'b1']
+    pool.finish(0)
+    # Cada resultado vuelve a su flujo
+    assert a.result(1) == {'text': 'a1'} and b.result(1) == {'text': 'b1'}
+    assert shared.batches == 1 and shared.segments == 2
+    shared.close()
+
+
+def test_lone_segment_waits_max_wait_then_goes_alone(pool):
+    shared = scheduler(pool, max_wait_ms=100)
+    start = time.monotonic()
+    future = shared.stream('a').submit(audio(), tag='a1')
+    kind, _, _ = pool.wait_jobs(1)[0]
+    assert kind == 'single' and time.monotonic() - start >= 0.09
+    pool.finish(0)
+    assert future.result(1) == {'text': 'a1'}
+    shared.close()
+
+
+def test_busy_workers_accumulate_and_streams_take_turns(pool):
+    shared = scheduler(pool, max_wait_ms=0, max_batch_size=3)
+    first = shared.stream('a').submit(audio(), tag='a0')
+    pool.wait_jobs(1)
+
+    # Con el único worker ocupado todo se acumula; luego sale por turnos entre flujos
+    futures = [shared.stream('a').submit(audio(), tag=f'a{n}') for n in range(1, 4)]
+    futures.append(shared.stream('b').submit(audio(), tag='b1'))
+    time.sleep(0.05)
+    assert len(pool.jobs) == 1
+    pool.finish(0)
+
+    _, items, _ = pool.wait_jobs(2)[1]
+    assert [tag for _, tag, _ in items] == ['a1', 'b1', 'a2']
+    pool.finish(1)
+    _, items, _ = pool.wait_jobs(3)[2]
+    assert [tag for _, tag, _ in items] == ['a3']
+    pool.finish(2)
+    assert [future.result(1)['text'] for future in [first] + futures] == ['a0', 'a1', 'a2', 'a3', 'b1']
+    shared.close()
+
+
+def test_batch_respects_the_shared_block_size(pool):
+    pool.slot_samples = 16000 * 3
+    shared = scheduler(pool, max_wait_ms=20)
+    for name in 'abc':
+        shared.stream(name).submit(audio(2.0), tag=name)
+    # 2 s + 2 s no caben en un bloque de 3 s: un segmento por trabajo
+    assert [tag for _, tag, _ in pool.wait_jobs(1)[0][1]] == ['a']
+    pool.finish(0)
+    assert [tag for _, tag, _ in pool.wait_jobs(2)[1][1]] == ['b']
+    shared.close()
+
+
+def test_pool_error_reaches_every_stream(pool):
+    shared = scheduler(pool)
+    futures = [shared.stream(name).submit(audio(), tag=name) for name in 'ab']
+    pool.wait_jobs(1)[0][2].set_exception(InferenceError("worker caído"))
+    for future in futures:
+        with pytest.raises(InferenceError):
+            future.result(1)
+    shared.close()
+
+
+def test_close_fails_waiting_segments(pool):
+    shared = scheduler(pool, max_wait_ms=0)
+    shared.stream('a').submit(audio(), tag='a0')
+    pool.wait_jobs(1)
+    waiting = shared.stream('a').submit(audio(), tag='a1')
+    shared.close()
+    with pytest.raises(InferenceError):
+        waiting.result(1)
+    with pytest.raises(InferenceError):
+        shared.stream('a').submit(audio()).result(1)
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("device", {'name': 'device', 'source': 'device', 'device': None}),
+    ("device:14", {'name': 'device14', 'source': 'device', 'device': 14}),
+    ("micro=device:3", {'name': 'micro', 'source': 'device', 'device': 3}),
+    ("grabaciones/charla.wav", {'name': 'charla', 'source': 'grabaciones/charla.wav', 'device': None}),
+    ("sala=charla.wav", {'name': 'sala', 'source': 'charla.wav', 'device': None}),
+    ("-", {'name': 'stdin', 'source': '-', 'device': None}),
+])
+def test_parse_stream_spec(spec, expected):
+    assert parse_stream_spec(spec) == expected
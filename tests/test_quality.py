@@ -0,0 +1,135 @@
+import pytest
+
+import config
+import quality
+from quality import QualityController
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(quality, 'time', clock)
+    monkeypatch.setitem(config.WHISPER_CONFIG, 'fallback_models', ['base'])
+    monkeypatch.setitem(config.WHISPER_CONFIG, 'beam_size', 5)
+    return clock
+
+
+def controller(**overrides):
+    options = {'max_lag_seconds': 4.0, 'max_rtf': 0.9, 'headroom_rtf': 0.4, 'up_hold_seconds': 30,
+               'cooldown_seconds': 5, 'smoothing': 0.5}
+    options.update(overrides)
+    return QualityController(backend='faster-whisper', model_size='small', **options)
+
+
+def at(clock, quality_controller, when, rtf, queue_wait=0.0):
+    clock.now = when
+    quality_controller.observe(rtf, queue_wait)
+    return quality_controller.level
+
+
+def test_levels_from_expensive_to_cheap(clock):
+    control = controller()
+    assert [level.name for level in control.levels] == \
+        ['small', 'small voraz', 'small sin contexto', 'base sin contexto']
+    assert control.model_sizes() == ['small', 'base']
+    control.level = 3
+    assert control.apply({'language': 'en', 'beam_size': 5}) == \
+        {'language': 'en', 'beam_size': 1, 'condition_on_previous_text': False, 'model_size': 'base'}
+    control.level = 0
+    options = {'beam_size': 5}
+    assert control.apply(options) is options
+
+
+def test_rtf_is_smoothed(clock):
+    control = controller()
+    at(clock, control, 1, 0.2)
+    at(clock, control, 2, 0.6)
+    assert control.rtf == pytest.approx(0.4)
+
+
+def test_step_down_waits_for_cooldown(clock):
+    control = controller()
+    # Dentro del enfriamiento inicial no se cambia aunque el RTF sea alto
+    assert at(clock, control, 1, 2.0) == 0
+    assert at(clock, control, 6, 2.0) == 1
+    # El RTF del nivel nuevo se mide desde cero y el siguiente cambio espera otra vez
+    assert control.rtf is None
+    assert at(clock, control, 8, 2.0) == 1
+    assert at(clock, control, 12, 2.0) == 2
+    assert control.switches == 2
+
+
+def test_lag_alone_steps_down(clock):
+    control = controller()
+    control.add_lag_source(lambda: 3.0)
+    assert at(clock, control, 10, 0.1, queue_wait=0.5) == 0
+    assert at(clock, control, 11, 0.1, queue_wait=1.5) == 1
+    assert control.lag == pytest.approx(4.5)
+
+
+def test_never_below_cheapest_level(clock):
+    control = controller()
+    for step in range(10):
+        at(clock, control, 10 * (step + 1), 2.0)
+    assert control.level == len(control.levels) - 1
+
+
+def test_step_up_needs_sustained_headroom(clock):
+    control = controller()
+    at(clock, control, 10, 2.0)
+    assert control.level == 1
+
+    assert at(clock, control, 20, 0.1) == 1     # Empieza la holgura
+    assert at(clock, control, 49, 0.1) == 1
+    assert at(clock, control, 50, 0.1) == 0     # 30 s sostenidos
+
+    # Una medida sin holgura reinicia la espera
+    at(clock, control, 60, 2.0)
+    assert control.level == 1
+    at(clock, control, 70, 0.1)
+    at(clock, control, 90, 0.6)                 # Entre headroom_rtf y max_rtf
+    assert at(clock, control, 100, 0.1) == 1
+    assert at(clock, control, 129, 0.1) == 1
+    assert at(clock, control, 130, 0.1) == 0
+
+
+def test_rebound_doubles_up_hold_until_stable(clock):
+    control = controller()
+    at(clock, control, 10, 2.0)
+    at(clock, control, 20, 0.1)
+    assert at(clock, control, 50, 0.1) == 0
+
+    # Vuelve a bajar antes de up_hold: la próxima subida espera el doble
+    assert at(clock, control, 60, 2.0) == 1
+    assert control.up_hold == 60
+    at(clock, control, 70, 0.1)
+    assert at(clock, control, 100, 0.1) == 1
+    assert at(clock, control, 130, 0.1) == 0
+
+    # Sostenido más de 4 * up_hold tras subir: la espera vuelve a la base
+    at(clock, control, 200, 0.6)
+    assert control.up_hold == 60
+    at(clock, control, 371, 0.6)
+    assert control.up_hold == 30
+
+
+def test_up_hold_doubling_is_capped(clock):
+    control = controller(up_hold_seconds=2, cooldown_seconds=0)
+    now = 1
+    at(clock, control, now, 2.0)
+    for _ in range(8):
+        now += 1
+        at(clock, control, now, 0.1)        # Empieza la holgura
+        now += control.up_hold
+        assert at(clock, control, now, 0.1) == 0
+        now += 1
+        assert at(clock, control, now, 2.0) == 1    # Rebota enseguida
+    assert control.up_hold == 32
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from resampler import StreamingResampler, resample
+
+
+def tone(freq, fs, seconds=1.0):
+    return np.sin(2 * np.pi * freq * np.arange(int(fs * seconds)) / fs).astype(np.float32)
+
+
+def stream(audio, fs_in, fs_out, seed=0):
+    """Re-muestrear en bloques de tamaño variable, como llegan del callback de captura"""
+    resampler = StreamingResampler(fs_in, fs_out, max_block=2048)
+    rng = np.random.default_rng(seed)
+    out, pos = [], 0
+    while pos < len(audio):
+        size = int(rng.integers(1, 4096))  # A veces mayor que max_block: se reasigna
+        out.append(resampler.process(audio[pos:pos + size]).copy())
+        pos += size
+    return np.concatenate(out), resampler.delay
+
+
+@pytest.mark.parametrize('fs_in', [48000, 44100])
+def test_streaming_matches_one_shot(fs_in):
+    audio = (np.random.default_rng(1).standard_normal(fs_in) * 0.1).astype(np.float32)
+    streamed, delay = stream(audio, fs_in, 16000)
+    one_shot = resample(audio, fs_in, 16000)
+
+    assert delay == int(delay)
+    n = len(streamed) - delay
+    np.testing.assert_allclose(streamed[delay:], one_shot[:n], atol=1e-6)
+
+
+@pytest.mark.parametrize('fs_in', [48000, 44100])
+def test_one_shot_has_no_phase_shift(fs_in):
+    out = resample(tone(440, fs_in), fs_in, 16000)
+    expected = tone(440, 16000)[:len(out)]
+    assert len(out) == 16000
+    assert np.abs(out - expected)[200:-200].max() < 1e-3
+
+
+def test_stereo_block_is_downmixed():
+    resampler = StreamingResampler(16000, 16000)
+    block = np.stack([np.ones(4, np.float32), np.zeros(4, np.float32)], axis=1)
+    np.testing.assert_array_equal(resampler.process(block), np.full(4, 0.5, np.float32))
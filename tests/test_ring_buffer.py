@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from ring_buffer import AudioRingBuffer, BufferOverrun, RingReader
+
+
+def ramp(start, stop):
+    return np.arange(start, stop, dtype=np.float32)
+
+
+def test_read_returns_view_until_wraparound():
+    ring = AudioRingBuffer(10)
+    ring.write(ramp(0, 6))
+    view = ring.read(1, 5)
+    assert np.shares_memory(view, ring._data)
+    np.testing.assert_array_equal(view, ramp(1, 5))
+
+
+def test_read_across_wraparound():
+    ring = AudioRingBuffer(10)
+    ring.write(ramp(0, 8))
+    ring.write(ramp(8, 14))
+    assert ring.oldest_pos == 4
+    assert len(ring.views(6, 14)) == 2
+    np.testing.assert_array_equal(ring.read(6, 14), ramp(6, 14))
+
+
+def test_overrun_after_wraparound():
+    ring = AudioRingBuffer(10)
+    ring.write(ramp(0, 25))
+    with pytest.raises(BufferOverrun):
+        ring.read(14, 20)
+    np.testing.assert_array_equal(ring.read(15, 25), ramp(15, 25))
+
+
+def test_unwritten_range_is_an_error():
+    ring = AudioRingBuffer(10)
+    ring.write(ramp(0, 5))
+    with pytest.raises(ValueError):
+        ring.read(0, 6)
+
+
+def test_block_larger_than_capacity_keeps_tail():
+    ring = AudioRingBuffer(4)
+    ring.write(ramp(0, 10))
+    assert ring.write_pos == 10 and ring.oldest_pos == 6
+    np.testing.assert_array_equal(ring.read(6, 10), ramp(6, 10))
+
+
+def test_for_duration_rounds_to_block_size():
+    assert AudioRingBuffer.for_duration(1, 1000, block_size=300).capacity == 1200
+
+
+def test_reader_skips_overrun():
+    ring = AudioRingBuffer(10)
+    reader = RingReader(ring, start=0)
+    ring.write(ramp(0, 15))
+    assert reader.skip_overrun() == 5
+    np.testing.assert_array_equal(reader.read(3), ramp(5, 8))
+    assert reader.available() == 7
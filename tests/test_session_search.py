@@ -0,0 +1,64 @@
+import pytest
+
+import session_store
+from session_store import connect, match_query, search
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("budget review", '"budget" "review"'),
+    ('"next quarter" plan', '"next quarter" "plan"'),
+    ("presup*", '"presup"*'),
+    ("AND OR NOT NEAR", '"AND" "OR" "NOT" "NEAR"'),
+    ("c++ (draft) -v2: x^y", '"c" "draft" "v2" "x y"'),
+    ("¿qué? año", '"qué" "año"'),
+    ("*** ()", ""),
+])
+def test_match_query_quotes_every_term(text, expected):
+    assert match_query(text) == expected
+
+
+def populated(tmp_path):
+    conn = connect(str(tmp_path / 'sessions.sqlite3'))
+    conn.execute("INSERT INTO sessions (id, started, status) VALUES ('a', 0, 'closed'), ('b', 1, 'closed')")
+    rows = [
+        ('a', 'segment', 1.0, 2.0, "The budget review starts now", "Empieza la revisión del presupuesto"),
+        ('a', 'context', None, None, "Summary: budget and hiring", None),
+        ('b', 'segment', 0.5, 1.25, "NEAR the end (AND more)", "Cerca del final"),
+        ('b', 'segment', 3.0, 4.0, "budget budget budget", None),
+    ]
+    conn.executemany("INSERT INTO segments (session_id, kind, created, start, end, text, translation) "
+                     "VALUES (?, ?, 0, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def test_search_text_and_translation(tmp_path):
+    conn = populated(tmp_path)
+    assert [r['text'] for r in search(conn, "budget")] == \
+        ["The budget review starts now", "Summary: budget and hiring", "budget budget budget"]
+    [result] = search(conn, "presupuesto")
+    assert result['session_id'] == 'a' and (result['start_ms'], result['end_ms']) == (1000, 2000)
+    assert "[presupuesto]" in result['snippet']
+
+
+def test_search_operators_and_punctuation_are_literal(tmp_path):
+    conn = populated(tmp_path)
+    assert [r['session_id'] for r in search(conn, "NEAR (AND")] == ['b']
+    assert search(conn, '"budget review"')[0]['start_ms'] == 1000
+    assert search(conn, '"review budget"') == []
+    assert search(conn, "***") == []
+
+
+def test_search_prefix_filters_and_order(tmp_path):
+    conn = populated(tmp_path)
+    assert [r['text'] for r in search(conn, "presup*")] == ["The budget review starts now"]
+    assert [r['session_id'] for r in search(conn, "budget", session_id='b')] == ['b']
+    assert len(search(conn, "budget", limit=1)) == 1
+    assert search(conn, "budget", order='rank')[0]['text'] == "budget budget budget"
+
+
+def test_search_without_fts_falls_back_to_like(tmp_path, monkeypatch):
+    conn = populated(tmp_path)
+    monkeypatch.setattr(session_store, '_has_search_index', lambda conn: False)
+    [result] = search(conn, "(AND")
+    assert result['text'] == "NEAR the end (AND more)" and result['snippet'] == result['text']
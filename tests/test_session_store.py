@@ -0,0 +1,77 @@
+import io
+import json
+import time
+
+import pytest
+
+from session_store import SessionStore, connect, export_session, list_sessions, recover_sessions, session_segments
+
+
+def recorded_store(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.sqlite3'), commit_interval_seconds=0.05,
+                         fsync_interval_seconds=0.1, batch_size=10).start()
+    session_id = store.begin_session(source='mic', model='base')
+    store.record_segment("hello there", "hola", start=1.0, end=2.5, avg_logprob=-0.2)
+    store.record_segment("resumen", kind='context')
+    store.record_segment("", "ignorado")
+    store.record_segment("second line", start=3.0, end=4.0, stream='b')
+    store.close()
+    return store, session_id
+
+
+def test_recorded_session_is_closed_with_its_segments(tmp_path):
+    store, session_id = recorded_store(tmp_path)
+    assert store.error is None and store.written == 3
+    conn = connect(store.path)
+    [(sid, started, ended, status, source, model, count)] = list_sessions(conn)
+    assert (sid, status, source, model, count) == (session_id, 'closed', 'mic', 'base', 3)
+    assert ended >= started
+    segments = session_segments(conn, session_id)
+    assert [s['text'] for s in segments] == ["hello there", "resumen", "second line"]
+    assert [s['kind'] for s in segments] == ['segment', 'context', 'segment']
+    assert segments[0]['translation'] == "hola" and segments[2]['stream'] == 'b'
+
+
+def test_record_without_session_is_ignored(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.sqlite3'), commit_interval_seconds=0.05)
+    store.record_segment("nadie escucha")
+    assert store.stats()['pending'] == 0
+
+
+def test_export_formats(tmp_path):
+    store, session_id = recorded_store(tmp_path)
+    conn = connect(store.path)
+
+    output = io.StringIO()
+    assert export_session(conn, session_id, output, 'jsonl') == 3
+    assert [json.loads(line)['text'] for line in output.getvalue().splitlines()] == \
+        ["hello there", "resumen", "second line"]
+
+    output = io.StringIO()
+    assert export_session(conn, session_id, output, 'srt') == 2
+    assert output.getvalue() == ("1\n00:00:01,000 --> 00:00:02,500\nhola\n\n"
+                                 "2\n00:00:03,000 --> 00:00:04,000\n[b] second line\n\n")
+
+    output = io.StringIO()
+    assert export_session(conn, session_id, output, 'txt') == 3
+    assert "hello there\n           hola\n" in output.getvalue()
+
+    with pytest.raises(ValueError):
+        export_session(conn, session_id, io.StringIO(), 'docx')
+
+
+def test_recover_only_stale_sessions(tmp_path):
+    conn = connect(str(tmp_path / 'sessions.sqlite3'))
+    now = time.time()
+    conn.execute("INSERT INTO sessions (id, started, status, heartbeat) VALUES ('viejo', ?, 'active', ?)",
+                 (now - 100, now - 100))
+    conn.execute("INSERT INTO sessions (id, started, status, heartbeat) VALUES ('vivo', ?, 'active', ?)",
+                 (now - 100, now))
+    conn.execute("INSERT INTO segments (session_id, kind, created, text) VALUES ('viejo', 'segment', ?, 'x')",
+                 (now - 90,))
+    conn.commit()
+
+    assert recover_sessions(conn, stale_after=10) == [('viejo', 1)]
+    statuses = {row[0]: (row[3], row[2]) for row in list_sessions(conn)}
+    assert statuses['viejo'] == ('recovered', pytest.approx(now - 90))
+    assert statuses['vivo'] == ('active', None)
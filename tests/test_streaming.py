@@ -0,0 +1,43 @@
+from streaming import LocalAgreement
+
+
+def words(*items):
+    """('texto', inicio) → (inicio, fin, texto) con palabras de 10 muestras"""
+    return [(start, start + 10, text) for text, start in items]
+
+
+def test_common_prefix_of_consecutive_hypotheses_is_committed():
+    agreement = LocalAgreement()
+    assert agreement.insert(words(('the', 0), ('cat', 10))) == ([], words(('the', 0), ('cat', 10)))
+
+    committed, partial = agreement.insert(words(('the', 0), ('cat', 10), ('sat', 20)))
+
+    assert [w[2] for w in committed] == ['the', 'cat']
+    assert [w[2] for w in partial] == ['sat']
+    assert agreement.committed_end == 20
+
+
+def test_disagreement_commits_nothing():
+    agreement = LocalAgreement()
+    agreement.insert(words(('the', 0), ('cat', 10)))
+    committed, partial = agreement.insert(words(('a', 0), ('cat', 10)))
+    assert committed == [] and [w[2] for w in partial] == ['a', 'cat']
+
+
+def test_committed_words_are_not_repeated():
+    agreement = LocalAgreement(tolerance_samples=5)
+    agreement.insert(words(('hello', 0), ('there', 10)))
+    agreement.insert(words(('hello', 0), ('there', 10), ('general', 20)))
+
+    # El borde se re-transcribe: 'there' vuelve a aparecer dentro de la tolerancia
+    committed, partial = agreement.insert(words(('there', 16), ('general', 20), ('kenobi', 30)))
+
+    assert [w[2] for w in committed] == ['general']
+    assert [w[2] for w in partial] == ['kenobi']
+
+
+def test_flush_commits_the_rest():
+    agreement = LocalAgreement()
+    agreement.insert(words(('good', 0), ('morning', 10)))
+    assert [w[2] for w in agreement.flush()] == ['good', 'morning']
+    assert agreement.previous == [] and agreement.committed_end == 20
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+import config
+import transcriber
+from backpressure import create_queue
+from features import mel_filters
+from metrics import SegmentTrace
+from translation_batch import drain_batch
+
+
+class StubModel:
+    """Modelo con la forma de openai-whisper (dims + decode) que registra cada llamada"""
+
+    dims = type('Dims', (), {'n_mels': 80})
+
+    def __init__(self):
+        self.transcribed = []
+        self.decoded = []
+
+    def decode(self, *args):
+        pass
+
+    def transcribe(self, audio, **options):
+        self.transcribed.append(options)
+        return {'text': f" {len(audio)}", 'segments': [], 'language': 'en'}
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setitem(config.WHISPER_CONFIG, 'batch_decoding', True)
+    monkeypatch.setattr(transcriber, '_openai_mel_filters', lambda m: mel_filters(80))
+
+    def decode_batch(m, mel, language, task, prompt):
+        model.decoded.append(mel.copy())
+        return [(' hola', [1, 2], -0.2, 0.01)] * len(mel)
+
+    monkeypatch.setattr(transcriber, '_openai_decode_batch', decode_batch)
+    return model
+
+
+def speech(seconds, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * 16000)) * 0.1).astype(np.float32)
+
+
+def test_single_job_with_mel_uses_transcribe(model):
+    audio = speech(2)
+    options = {'language': 'en', 'beam_size': 5, 'condition_on_previous_text': True}
+    mel = transcriber.log_mel_batch([audio], mel_filters(80))[0][:, :200]
+
+    with_mel = transcriber.transcribe_batch(model, [(audio, 'rt', dict(options, mel=mel))])
+    without_mel = transcriber.transcribe_batch(model, [(audio, 'rt', dict(options))])
+
+    assert with_mel == without_mel
+    assert model.transcribed == [options, options]
+    assert model.decoded == []
+
+
+def test_batch_decodes_once_with_precomputed_mel(model):
+    audio = speech(2)
+    mel = transcriber.log_mel_batch([audio], mel_filters(80))[0][:, :200]
+    items = [(audio, 'rt', {'language': 'en', 'mel': mel}), (speech(1, 1), 'rt', {'language': 'en'})]
+
+    results = transcriber.transcribe_batch(model, items)
+
+    assert [result['text'].strip() for result in results] == ['hola', 'hola']
+    assert len(model.decoded) == 1 and model.decoded[0].shape == (2, 80, 3000)
+    np.testing.assert_array_equal(model.decoded[0][0][:, :200], mel)
+    assert model.transcribed == []
+
+
+def test_unbatchable_items_keep_their_options(model):
+    items = [(speech(1), 'rt', {'language': 'en', 'word_timestamps': True}),
+             (speech(1), 'rt', {'language': 'en', 'word_timestamps': True})]
+
+    transcriber.transcribe_batch(model, items)
+
+    assert model.transcribed == [{'language': 'en', 'word_timestamps': True}] * 2
+    assert model.decoded == []
+
+
+def test_queued_utterances_decode_in_one_call(model):
+    # Como contextual_transcribe_loop de main.py: lo que ya espera en la cola va en un trabajo
+    text_stream = create_queue('transcription', size_of=lambda info: info['window_seconds'],
+                               merge=lambda previous, info: None)
+    for seed in range(3):
+        text_stream.put(SegmentTrace(audio=speech(1.5, seed), window_seconds=1.5))
+    options = {'language': 'en', 'fp16': False, 'task': 'transcribe', 'verbose': False,
+               'initial_prompt': "Previous conversation: hi Continue the conversation:",
+               'condition_on_previous_text': True}
+
+    batch = drain_batch(text_stream, config.INFERENCE_CONFIG['batch']['max_batch_size'], 0, timeout=0.1)
+    results = transcriber.transcribe_batch(model, [(info['audio'], 'context', options) for info in batch])
+
+    assert len(batch) == 3 and text_stream.qsize() == 0
+    assert [result['text'].strip() for result in results] == ['hola'] * 3
+    assert len(model.decoded) == 1 and model.decoded[0].shape == (3, 80, 3000)
+    assert model.transcribed == []
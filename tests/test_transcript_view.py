@@ -0,0 +1,191 @@
+import tkinter as tk
+
+import pytest
+
+from transcript_view import TranscriptHistory, TranscriptView
+
+
+class FakeText:
+    """Lo que TranscriptView usa de un ScrolledText, con el contenido como lista de líneas"""
+
+    def __init__(self):
+        self.lines = []
+        self.view = (0.0, 1.0)
+        self.state = tk.DISABLED
+        self.seen_end = 0
+
+    def configure(self, **options):
+        pass
+
+    def config(self, state=None):
+        self.state = state
+
+    def _line(self, index):
+        return int(index.split('.')[0]) - 1
+
+    def insert(self, index, text):
+        assert self.state == tk.NORMAL
+        new = text[:-1].split("\n")
+        at = len(self.lines) if index == tk.END else self._line(index)
+        self.lines[at:at] = new
+
+    def delete(self, start, end):
+        assert self.state == tk.NORMAL
+        stop = len(self.lines) if end == "end-1c" else self._line(end)
+        del self.lines[self._line(start):stop]
+
+    def see(self, index):
+        self.seen_end += 1
+
+    def yview(self):
+        return self.view
+
+    def yview_moveto(self, fraction):
+        self.moved_to = fraction
+
+
+class FakeRoot:
+    def __init__(self):
+        self.idle = []
+
+    def after(self, ms, fn):
+        pass
+
+    def after_idle(self, fn):
+        self.idle.append(fn)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for fn in idle:
+            fn()
+
+
+def view(max_lines=5, page_lines=3):
+    root, text = FakeRoot(), FakeText()
+    return TranscriptView(root, text, max_lines=max_lines, refresh_fps=10, page_lines=page_lines), root, text
+
+
+def test_history_compresses_blocks_and_reads_any_range():
+    history = TranscriptHistory(block_lines=4)
+    history.extend([f"l{n}" for n in range(10)])
+    assert len(history) == 10 and len(history._blocks) == 2 and history._tail == ["l8", "l9"]
+    assert history.lines(2, 9) == [f"l{n}" for n in range(2, 9)]
+    assert history.lines(-5, 3) == ["l0", "l1", "l2"]
+    assert history.lines(8, 50) == ["l8", "l9"]
+    history.clear()
+    assert len(history) == 0 and history.lines(0, 10) == []
+
+
+def test_flush_batches_pending_text_and_callbacks():
+    transcript, _, text = view()
+    shown_calls = []
+    transcript.append("a")
+    transcript.append("b\nc\n", on_shown=lambda: shown_calls.append(len(text.lines)))
+    assert text.lines == [] and shown_calls == []
+
+    transcript.flush()
+    assert text.lines == ["a", "b", "c"] and shown_calls == [3]
+    assert text.state == tk.DISABLED and text.seen_end == 1
+
+
+def test_only_latest_status_and_partial_are_painted():
+    class Label:
+        def __init__(self):
+            self.calls = []
+
+        def config(self, **options):
+            self.calls.append(options)
+
+    status, partial = Label(), Label()
+    transcript = TranscriptView(FakeRoot(), FakeText(), status, partial, max_lines=5, refresh_fps=10,
+                                page_lines=3)
+    transcript.set_status("uno", fg="red")
+    transcript.set_status("dos", fg="green")
+    transcript.set_partial("ho")
+    transcript.set_partial("hola")
+    transcript.flush()
+    transcript.flush()
+    assert status.calls == [{'text': "dos", 'fg': "green"}] and partial.calls == [{'text': "hola"}]
+
+
+def test_widget_keeps_last_max_lines_while_following():
+    transcript, _, text = view(max_lines=5)
+    for n in range(12):
+        transcript.append(f"l{n}")
+        transcript.flush()
+    assert text.lines == [f"l{n}" for n in range(7, 12)]
+    assert (transcript.first_line, transcript.end_line) == (7, 12)
+    assert len(transcript.history) == 12
+
+
+def test_reading_back_lets_widget_grow_up_to_max_window():
+    transcript, _, text = view(max_lines=5)
+    transcript.append("\n".join(f"l{n}" for n in range(5)))
+    transcript.flush()
+    text.view = (0.2, 0.6)  # El usuario subió con el scroll
+    for n in range(5, 30):
+        transcript.append(f"l{n}")
+        transcript.flush()
+    # No se recorta a max_lines mientras se lee, solo al tope de 4 * max_lines
+    assert len(text.lines) == 20 and text.lines[-1] == "l29"
+    assert transcript.first_line == 10
+
+
+def test_scroll_to_top_pages_in_older_history():
+    transcript, root, text = view(max_lines=5, page_lines=3)
+    transcript.append("\n".join(f"l{n}" for n in range(12)))
+    transcript.flush()
+    assert text.lines == [f"l{n}" for n in range(7, 12)]
+
+    transcript._on_scroll("0.0", "0.4")
+    transcript._on_scroll("0.0", "0.4")  # Mientras carga no se piden más páginas
+    assert len(root.idle) == 1
+    root.run_idle()
+    assert text.lines == [f"l{n}" for n in range(4, 12)]
+    assert transcript.first_line == 4 and text.moved_to == pytest.approx(3 / 8)
+
+    transcript._on_scroll("0.0", "0.4")
+    root.run_idle()
+    transcript._on_scroll("0.0", "0.4")
+    root.run_idle()
+    assert text.lines == [f"l{n}" for n in range(12)] and transcript.first_line == 0
+    # Sin más historial arriba no se pide nada
+    transcript._on_scroll("0.0", "0.4")
+    assert root.idle == []
+
+
+def test_older_pages_trim_the_bottom_to_max_window():
+    transcript, root, text = view(max_lines=2, page_lines=3)
+    transcript.append("\n".join(f"l{n}" for n in range(20)))
+    transcript.flush()
+    for _ in range(4):
+        transcript._on_scroll("0.0", "0.5")
+        root.run_idle()
+    assert len(text.lines) == 8 and (transcript.first_line, transcript.end_line) == (6, 14)
+    assert text.lines == [f"l{n}" for n in range(6, 14)]
+
+
+def test_scrolling_down_pages_newer_lines_then_trims_back():
+    transcript, root, text = view(max_lines=2, page_lines=3)
+    transcript.append("\n".join(f"l{n}" for n in range(20)))
+    transcript.flush()
+    for _ in range(4):
+        transcript._on_scroll("0.0", "0.5")
+        root.run_idle()
+    assert transcript.end_line == 14
+
+    # Nuevo texto mientras se lee atrás: va al historial, no al widget
+    transcript.append("l20")
+    transcript.flush()
+    assert transcript.end_line == 14 and len(transcript.history) == 21
+
+    text.view = (0.5, 1.0)
+    while transcript.end_line < len(transcript.history):
+        transcript._on_scroll("0.5", "1.0")
+        root.run_idle()
+    assert text.lines[-1] == "l20" and len(text.lines) <= 8
+
+    # Abajo del todo en el final: vuelve a max_lines
+    transcript._on_scroll("0.5", "1.0")
+    root.run_idle()
+    assert text.lines == ["l19", "l20"] and transcript.first_line == 19
@@ -0,0 +1,114 @@
+import queue
+
+import pytest
+
+from translation_batch import SEPARATOR, BatchingTranslator, drain_batch
+
+
+class LineTranslator:
+    """Como el servicio real: traduce línea a línea; `merge_over` une las líneas de peticiones más largas"""
+
+    def __init__(self, merge_over=None, fail_on=None):
+        self.requests = []
+        self.merge_over = merge_over
+        self.fail_on = fail_on
+
+    def translate(self, text):
+        self.requests.append(text)
+        lines = text.split(SEPARATOR)
+        if self.fail_on is not None and self.fail_on in text:
+            raise ConnectionError("503 del servicio")
+        if self.merge_over is not None and len(lines) > self.merge_over:
+            # El servicio unió dos frases en una línea
+            lines = [lines[0] + " " + lines[1]] + lines[2:]
+        return SEPARATOR.join(f"es:{line}" for line in lines)
+
+
+def batcher(translator, max_batch_size=8, max_chars=1000):
+    return BatchingTranslator(translator, max_batch_size=max_batch_size, max_wait_ms=0, max_chars=max_chars)
+
+
+def test_one_request_per_batch():
+    translator = LineTranslator()
+    batch = batcher(translator)
+    assert batch.translate_many(["a", " b  c ", "", "d"]) == ["es:a", "es:b c", "", "es:d"]
+    assert translator.requests == [SEPARATOR.join(["a", "b c", "d"])]
+    assert batch.stats() == {'requests': 1, 'batches': 1, 'split_fallbacks': 0}
+
+
+def test_wrong_line_count_splits_and_retries():
+    translator = LineTranslator(merge_over=2)
+    batch = batcher(translator)
+
+    assert batch.translate_many(["a", "b", "c", "d"]) == ["es:a", "es:b", "es:c", "es:d"]
+    # 4 líneas fallan; las dos mitades de 2 ya salen bien
+    assert translator.requests == [SEPARATOR.join("abcd"), SEPARATOR.join("ab"), SEPARATOR.join("cd")]
+    assert batch.split_fallbacks == 1 and batch.requests == 3
+
+
+def test_split_goes_down_to_single_segments():
+    translator = LineTranslator(merge_over=1)
+    batch = batcher(translator)
+    assert batch.translate_many(["a", "b", "c"]) == ["es:a", "es:b", "es:c"]
+    assert translator.requests == [SEPARATOR.join("abc"), "a", SEPARATOR.join("bc"), "b", "c"]
+    assert batch.split_fallbacks == 2
+
+
+def test_empty_reply_also_splits():
+    class Silent(LineTranslator):
+        def translate(self, text):
+            self.requests.append(text)
+            return None if SEPARATOR in text else f"es:{text}"
+
+    batch = batcher(Silent())
+    assert batch.translate_many(["a", "b"]) == ["es:a", "es:b"]
+    assert batch.split_fallbacks == 1
+
+
+def test_service_error_reaches_the_caller():
+    translator = LineTranslator(fail_on="b")
+    batch = batcher(translator)
+    with pytest.raises(ConnectionError):
+        batch.translate_many(["a", "b"])
+
+
+def test_max_chars_and_max_batch_size_cut_requests():
+    translator = LineTranslator()
+    batch = batcher(translator, max_batch_size=3, max_chars=2 * (5 + len(SEPARATOR)))
+    texts = ["aaaaa", "bbbbb", "ccccc", "d", "e", "f", "g"]
+
+    assert batch.translate_many(texts) == [f"es:{text}" for text in texts]
+    assert translator.requests == [SEPARATOR.join(["aaaaa", "bbbbb"]), SEPARATOR.join(["ccccc", "d", "e"]),
+                                   SEPARATOR.join(["f", "g"])]
+    assert all(len(request) <= 2 * (5 + len(SEPARATOR)) for request in translator.requests)
+
+
+def test_text_longer_than_max_chars_goes_alone():
+    translator = LineTranslator()
+    batch = batcher(translator, max_chars=10)
+    assert batch.translate_many(["a" * 30, "b"]) == ["es:" + "a" * 30, "es:b"]
+    assert translator.requests == ["a" * 30, "b"]
+
+
+def test_native_batch_is_used_as_is():
+    class Native:
+        def __init__(self):
+            self.calls = []
+
+        def translate_native_batch(self, texts):
+            self.calls.append(list(texts))
+            return [text.upper() for text in texts]
+
+    native = Native()
+    batch = batcher(native, max_batch_size=2)
+    assert batch.translate_many(["a", "b", "c"]) == ["A", "B", "C"]
+    assert native.calls == [["a", "b"], ["c"]]
+
+
+def test_drain_batch_takes_what_is_queued():
+    source = queue.Queue()
+    for item in ["a", "b", None, "c"]:
+        source.put(item)
+    assert drain_batch(source, 8, 0) == ["a", "b", None]
+    assert drain_batch(source, 8, 0) == ["c"]
+    assert drain_batch(source, 8, 0, timeout=0.01) == []
@@ -0,0 +1,88 @@
+import pytest
+
+from translation_batch import BatchingTranslator
+from translation_cache import CachedTranslator, LRUCache, normalize_text
+
+
+class EchoBackend:
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        return f"es:{text}"
+
+
+class NativeBatchBackend(EchoBackend):
+    def translate_native_batch(self, texts):
+        self.calls.append(list(texts))
+        return [f"es:{text}" for text in texts]
+
+
+def cached(backend, tmp_path, persistent=False):
+    return CachedTranslator(backend, 'en', 'es', {
+        'max_entries': 100, 'ttl_seconds': None, 'persistent': persistent,
+        'db_path': str(tmp_path / 'cache.sqlite3'), 'max_text_chars': 500, 'prewarm_files': []})
+
+
+def test_normalize_text_collapses_spaces():
+    assert normalize_text("  Hello \n world ") == "Hello world"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and len(cache) == 2
+
+
+def test_lru_ttl_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('translation_cache.time.monotonic', lambda: now[0])
+    cache = LRUCache(10, ttl_seconds=5)
+    cache.put('a', 1)
+    now[0] += 6
+    assert cache.get('a') is None
+
+
+def test_memory_hit_skips_backend(tmp_path):
+    backend = EchoBackend()
+    translator = cached(backend, tmp_path)
+    assert translator.translate("hello  world") == "es:hello  world"
+    assert translator.translate("hello world") == "es:hello  world"
+    assert backend.calls == ["hello  world"]
+    assert translator.stats()['memory_hits'] == 1 and translator.stats()['misses'] == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    cached(EchoBackend(), tmp_path, persistent=True).translate("good morning")
+    backend = EchoBackend()
+    translator = cached(backend, tmp_path, persistent=True)
+    assert translator.translate("good morning") == "es:good morning"
+    assert backend.calls == [] and translator.disk_hits == 1
+
+
+def test_batch_misses_are_recorded_through_the_cache(tmp_path):
+    backend = EchoBackend()
+    translator = cached(backend, tmp_path)
+    translator.remember("hi", "hola")
+    batcher = BatchingTranslator(translator, max_batch_size=8, max_wait_ms=0, max_chars=1000)
+
+    assert batcher.translate_many(["hi", "one", "two"])[0] == "hola"
+    assert translator.misses == 2 and translator.memory_hits == 1
+    assert translator.lookup("one") is not None
+
+
+def test_native_batch_is_exposed_explicitly(tmp_path):
+    assert cached(EchoBackend(), tmp_path).translate_native_batch is None
+    backend = NativeBatchBackend()
+    translator = cached(backend, tmp_path)
+    BatchingTranslator(translator, max_batch_size=8, max_wait_ms=0, max_chars=1000).translate_many(["a", "b"])
+    assert backend.calls == [["a", "b"]]
+
+
+def test_unknown_attributes_are_not_forwarded(tmp_path):
+    with pytest.raises(AttributeError):
+        cached(EchoBackend(), tmp_path).translate_batch
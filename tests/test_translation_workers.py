@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+
+from translation_batch import drain_batch
+from translation_workers import OrderedTranslationPool, ReorderBuffer
+
+
+def buffer():
+    delivered = []
+    return ReorderBuffer(lambda seq, result, skipped: delivered.append((seq, result, skipped))), delivered
+
+
+def test_results_are_released_in_order():
+    reorder, delivered = buffer()
+    far = time.monotonic() + 60
+    for seq in range(3):
+        reorder.expect(seq, far)
+    reorder.put(2, 'c')
+    reorder.put(1, 'b')
+    assert delivered == []
+    reorder.put(0, 'a')
+    assert delivered == [(0, 'a', False), (1, 'b', False), (2, 'c', False)]
+    assert reorder.pending() == 0
+
+
+def test_overdue_segment_is_skipped():
+    reorder, delivered = buffer()
+    reorder.expect(0, time.monotonic() - 1)
+    reorder.expect(1, time.monotonic() + 60)
+    reorder.put(1, 'b')
+    assert delivered == [(0, None, True), (1, 'b', False)]
+    assert reorder.skipped == 1
+
+
+def test_late_result_after_skip_is_ignored():
+    reorder, delivered = buffer()
+    reorder.expect(0, time.monotonic() - 1)
+    reorder.release()
+    reorder.put(0, 'late')
+    assert delivered == [(0, None, True)]
+
+
+def test_waits_for_segment_within_deadline():
+    reorder, delivered = buffer()
+    reorder.expect(0, time.monotonic() + 60)
+    reorder.expect(1, time.monotonic() + 60)
+    reorder.put(1, 'b')
+    reorder.release()
+    assert delivered == [] and reorder.pending() == 2
+
+
+class StubBatcher:
+    """drain/translate_many como BatchingTranslator; `hang` bloquea los textos que empiezan por 'hang'"""
+
+    def __init__(self):
+        self.hang = threading.Event()
+        self.threads = set()
+
+    def drain(self, source_queue, timeout=0.5):
+        return drain_batch(source_queue, 1, 0, timeout)
+
+    def translate_many(self, texts):
+        self.threads.add(threading.current_thread())
+        if texts[0].startswith('hang'):
+            self.hang.wait(10)
+        if texts[0].startswith('fail'):
+            raise RuntimeError("servicio caído")
+        return [f"es:{text}" for text in texts]
+
+
+def run_pool(texts, workers=2, timeout_seconds=5.0, wait=5.0):
+    source = queue.Queue()
+    delivered = []
+    stop = threading.Event()
+    batcher = StubBatcher()
+    pool = OrderedTranslationPool(batcher, source, lambda seq, item, result, skipped:
+                                  delivered.append((item, result, skipped)),
+                                  stop, workers=workers, timeout_seconds=timeout_seconds)
+    pool.start()
+    for text in texts:
+        source.put(text)
+    deadline = time.monotonic() + wait
+    while len(delivered) < len(texts) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    pool.join(2)
+    batcher.hang.set()
+    return pool, batcher, delivered
+
+
+def test_pool_uses_fixed_workers_and_keeps_order():
+    pool, batcher, delivered = run_pool([f"t{n}" for n in range(20)] + ["fail"], workers=3)
+    assert delivered == [(f"t{n}", f"es:t{n}", False) for n in range(20)] + [("fail", None, False)]
+    assert len(batcher.threads) <= 3
+    assert pool.stats()['failed'] == 1
+
+
+def test_hung_workers_are_replaced_up_to_the_limit():
+    texts = [f"hang{n}" for n in range(6)] + ["ok"]
+    pool, batcher, delivered = run_pool(texts, workers=2, timeout_seconds=0.2, wait=0.8)
+    stats = pool.stats()
+    # Como mucho 2 abandonados a la vez: los demás lotes esperan a que alguno vuelva
+    assert stats['abandoned_batches'] == 2 and stats['hung_workers'] == 2
+    assert len(batcher.threads) <= 4
+    assert delivered[:4] == [(f"hang{n}", None, True) for n in range(4)]
+    assert len(delivered) == 4
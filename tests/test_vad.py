@@ -0,0 +1,62 @@
+import numpy as np
+
+from ring_buffer import AudioRingBuffer
+from vad import VoiceSegmenter
+
+RATE = 16000
+FRAME = 480  # 30 ms
+
+
+def signal(*parts):
+    """Silencio y tono de 440 Hz alternados: [('silence'|'tone', muestras), ...]"""
+    out = []
+    for kind, samples in parts:
+        if kind == 'tone':
+            out.append(0.3 * np.sin(2 * np.pi * 440 * np.arange(samples) / RATE))
+        else:
+            out.append(np.zeros(samples))
+    return np.concatenate(out).astype(np.float32)
+
+
+def segment(audio, **overrides):
+    ring = AudioRingBuffer(len(audio) + RATE)
+    segmenter = VoiceSegmenter(ring, RATE, **overrides)
+    ring.write(audio)
+    return segmenter.process() + segmenter.flush(), segmenter
+
+
+def test_pre_roll_and_hangover_boundaries():
+    tone_start, tone_len = 20 * FRAME, 50 * FRAME
+    audio = signal(('silence', tone_start), ('tone', tone_len), ('silence', 40 * FRAME))
+
+    segments, _ = segment(audio, pre_roll_ms=200, hangover_ms=390, min_speech_ms=90)
+
+    hangover = 13 * FRAME
+    assert segments == [(tone_start - 3200, tone_start + tone_len + hangover, False)]
+
+
+def test_pre_roll_does_not_reach_before_the_buffer():
+    audio = signal(('tone', 30 * FRAME), ('silence', 30 * FRAME))
+    segments, _ = segment(audio)
+    assert segments[0][0] == 0
+
+
+def test_long_utterance_is_cut_and_marked_forced():
+    audio = signal(('silence', 10 * FRAME), ('tone', 10 * RATE), ('silence', 30 * FRAME))
+
+    segments, _ = segment(audio, max_segment_seconds=4)
+
+    assert [forced for _, _, forced in segments] == [True, True, False]
+    assert all(end - start >= 4 * RATE for start, end, forced in segments if forced)
+    assert all(segments[i][1] == segments[i + 1][0] for i in range(len(segments) - 1))
+
+
+def test_short_blips_are_not_speech():
+    audio = signal(('silence', 10 * FRAME), ('tone', 2 * FRAME), ('silence', 30 * FRAME))
+    segments, segmenter = segment(audio, min_speech_ms=90)
+    assert segments == [] and segmenter.speech_ratio() == 0.0
+
+
+def test_silence_never_reaches_whisper():
+    segments, segmenter = segment(signal(('silence', 2 * RATE)))
+    assert segments == [] and segmenter.total_samples == 2 * RATE - 2 * RATE % FRAME
@@ -0,0 +1,331 @@
+"""
+Entrega de audio a Whisper en memoria y backends de inferencia
+
+Whisper acepta directamente un array float32 mono a 16 kHz: así se evita
+escribir un WAV temporal por ventana y el subproceso de ffmpeg que lo vuelve
+a decodificar. El volcado a disco queda solo como opción de depuración
+(DEBUG_CONFIG['dump_audio']), con nombres únicos por ventana.
+
+WHISPER_CONFIG['backend'] elige la implementación:
+- 'openai':         openai-whisper (PyTorch), implementación de referencia
+- 'faster-whisper': CTranslate2 con int8 en CPU y filtro VAD integrado
+
+Ambos devuelven el mismo resultado que whisper.transcribe ('text', 'segments'
+con avg_logprob/no_speech_prob y, si se piden, 'words'), así que el resto del
+pipeline no depende del backend.
+
+transcribe_batch decodifica varios segmentos a la vez: el log-mel de todos en
+una pasada vectorizada (log_mel_batch) y el codificador y el decodificador
+voraz con el lote completo, en lugar de rellenar cada uno a 30 s y pasar el
+codificador con lote 1.
+"""
+
+import itertools
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import config
+from resampler import resample
+
+WHISPER_SAMPLE_RATE = 16000
+
+_dump_counter = itertools.count()
+
+
+def prepare_audio(audio, sample_rate=WHISPER_SAMPLE_RATE):
+    """Devolver el audio como float32 mono contiguo a 16 kHz listo para Whisper"""
+    audio = np.asarray(audio)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        # Whisper no re-muestrea arrays: hacerlo aquí con el filtro polifásico
+        audio = resample(audio, sample_rate, WHISPER_SAMPLE_RATE)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def dump_debug_audio(audio, tag, sample_rate=WHISPER_SAMPLE_RATE):
+    """Guardar la ventana en disco para depuración; devuelve la ruta"""
+    import soundfile as sf
+
+    dump_dir = config.DEBUG_CONFIG['dump_dir']
+    os.makedirs(dump_dir, exist_ok=True)
+    # Hilo + contador: sin colisiones entre workers concurrentes
+    name = f"{tag}_{int(time.time() * 1000)}_{threading.get_ident()}_{next(_dump_counter)}.wav"
+    path = os.path.join(dump_dir, name)
+    sf.write(path, audio, sample_rate, subtype='PCM_16')
+    return path
+
+
+class FasterWhisperModel:
+    """faster-whisper con la interfaz y el resultado de whisper.transcribe"""
+
+    # Opciones de openai-whisper sin equivalente en faster-whisper
+    IGNORED_OPTIONS = ('fp16', 'verbose')
+
+    def __init__(self, model_size, compute_type="int8", cpu_threads=4, num_workers=1,
+                 beam_size=5, vad_filter=True, vad_min_silence_ms=500):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(model_size, device="cpu", compute_type=compute_type,
+                                  cpu_threads=cpu_threads, num_workers=num_workers)
+        self.defaults = {
+            'beam_size': beam_size,
+            'vad_filter': vad_filter,
+            'vad_parameters': {'min_silence_duration_ms': vad_min_silence_ms}
+        }
+
+    def transcribe(self, audio, **options):
+        for name in self.IGNORED_OPTIONS:
+            options.pop(name, None)
+        options = {**self.defaults, **options}
+        segments, info = self.model.transcribe(audio, **options)
+
+        # El generador decodifica al recorrerlo
+        result_segments = []
+        for seg in segments:
+            item = {
+                'id': seg.id,
+                'seek': seg.seek,
+                'start': seg.start,
+                'end': seg.end,
+                'text': seg.text,
+                'tokens': list(seg.tokens),
+                'temperature': getattr(seg, 'temperature', 0.0),
+                'avg_logprob': seg.avg_logprob,
+                'compression_ratio': seg.compression_ratio,
+                'no_speech_prob': seg.no_speech_prob
+            }
+            if seg.words is not None:
+                item['words'] = [{'word': w.word, 'start': w.start, 'end': w.end,
+                                  'probability': w.probability} for w in seg.words]
+            result_segments.append(item)
+        return {
+            'text': "".join(seg['text'] for seg in result_segments),
+            'segments': result_segments,
+            'language': info.language
+        }
+
+    def mel_filters(self, model=None):
+        return self.model.feature_extractor.mel_filters
+
+    def decode_batch(self, model, mel, language, task, prompt):
+        """Codificador y decodificador voraz de CTranslate2 sobre el lote entero"""
+        from faster_whisper.tokenizer import Tokenizer
+
+        tokenizer = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual, task=task,
+                              language=language)
+        previous = tokenizer.encode(" " + prompt.strip()) if prompt else None
+        prompt_ids = self.model.get_prompt(tokenizer, previous, without_timestamps=True)
+        encoder_output = self.model.encode(mel)
+        outputs = self.model.model.generate(encoder_output, [prompt_ids] * len(mel), beam_size=1,
+                                            return_scores=True, return_no_speech_prob=True,
+                                            max_length=self.model.max_length, suppress_blank=True)
+        decoded = []
+        for output in outputs:
+            tokens = [token for token in output.sequences_ids[0] if token < tokenizer.eot]
+            # Las puntuaciones vienen normalizadas por longitud (length_penalty=1), como en faster-whisper
+            avg_logprob = output.scores[0] * len(tokens) / (len(tokens) + 1)
+            decoded.append((tokenizer.decode(tokens), tokens, avg_logprob, output.no_speech_prob))
+        return decoded
+
+
+def load_model(backend=None, model_size=None):
+    """Cargar el modelo de Whisper según WHISPER_CONFIG"""
+    opts = config.WHISPER_CONFIG
+    backend = backend or opts['backend']
+    model_size = model_size or opts['model_size']
+    if backend == 'faster-whisper':
+        try:
+            return FasterWhisperModel(model_size, opts['compute_type'], opts['cpu_threads'],
+                                      opts['num_workers'], opts['beam_size'], opts['vad_filter'],
+                                      opts['vad_min_silence_ms'])
+        except ImportError:
+            print("⚠️ faster-whisper no está instalado: usando openai-whisper")
+            backend = 'openai'
+    if backend != 'openai':
+        raise ValueError(f"Backend de Whisper desconocido: '{backend}' (disponibles: openai, faster-whisper)")
+
+    import torch
+    import whisper
+
+    torch.set_num_threads(opts['cpu_threads'])
+    return whisper.load_model(model_size)
+
+
+def warmup_model(model, seconds=1.0):
+    """Decodificar un tramo de silencio para pagar el coste de la primera llamada"""
+    if seconds <= 0:
+        return
+    silence = np.zeros(int(seconds * WHISPER_SAMPLE_RATE), dtype=np.float32)
+    options = {'language': config.WHISPER_CONFIG['language'], 'fp16': False}
+    if isinstance(model, FasterWhisperModel):
+        # Con el filtro VAD el silencio no llegaría a decodificarse
+        options['vad_filter'] = False
+    model.transcribe(silence, **options)
+
+
+def transcribe_audio(model, audio, sample_rate=WHISPER_SAMPLE_RATE, tag="audio", **options):
+    """Transcribir un array de audio sin pasar por disco"""
+    audio = prepare_audio(audio, sample_rate)
+    if config.DEBUG_CONFIG['dump_audio']:
+        path = dump_debug_audio(audio, tag)
+        print(f"💾 Audio de depuración guardado: {path}")
+    return model.transcribe(audio, **options)
+
+
+# Ventana fija de Whisper: 30 s → 3000 tramas de mel (STFT de 400 muestras, salto de 160)
+N_FFT = 400
+HOP_LENGTH = 160
+WINDOW_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+WINDOW_FRAMES = WINDOW_SAMPLES // HOP_LENGTH
+
+# Umbrales de whisper.transcribe: por debajo de ellos una decodificación voraz se repite con temperatura
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# Opciones que solo entiende transcribe(): con ellas el segmento se decodifica por separado
+_UNBATCHABLE_OPTIONS = ('word_timestamps', 'clip_timestamps', 'temperature')
+
+
+def log_mel_batch(audios, filters):
+    """Log-mel de Whisper de varios segmentos en una sola pasada vectorizada
+
+    Cada segmento se rellena a 30 s y todos se apilan en una matriz: una FFT
+    por trama para el lote entero (STFT centrada con reflexión y ventana de
+    Hann, como torch.stft en whisper.log_mel_spectrogram). La normalización
+    (máximo - 8 dB) es por segmento. Devuelve float32 (lote, n_mels, 3000).
+    """
+    batch = np.zeros((len(audios), WINDOW_SAMPLES), dtype=np.float32)
+    for row, audio in zip(batch, audios):
+        row[:min(len(audio), WINDOW_SAMPLES)] = audio[:WINDOW_SAMPLES]
+    padded = np.pad(batch, ((0, 0), (N_FFT // 2, N_FFT // 2)), mode='reflect')
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT, axis=1)[:, ::HOP_LENGTH][:, :WINDOW_FRAMES]
+    window = np.hanning(N_FFT + 1)[:-1].astype(np.float32)  # Hann periódica
+    power = np.abs(np.fft.rfft(frames * window, axis=-1)).astype(np.float32) ** 2
+    mel = np.matmul(filters.astype(np.float32), power.transpose(0, 2, 1))
+    log_spec = np.log10(np.maximum(mel, 1e-10))
+    log_spec = np.maximum(log_spec, log_spec.max(axis=(1, 2), keepdims=True) - 8.0)
+    return ((log_spec + 4.0) / 4.0).astype(np.float32)
+
+
+def compression_ratio(text):
+    data = text.encode('utf-8')
+    return len(data) / len(zlib.compress(data)) if data else 0.0
+
+
+def _openai_mel_filters(model):
+    from whisper.audio import mel_filters
+
+    return mel_filters("cpu", model.dims.n_mels).numpy()
+
+
+def _openai_decode_batch(model, mel, language, task, prompt):
+    """Codificador y decodificador voraz de openai-whisper sobre el lote entero"""
+    import torch
+    import whisper
+
+    options = whisper.DecodingOptions(task=task, language=language, fp16=False, without_timestamps=True,
+                                      prompt=prompt)
+    with torch.no_grad():
+        results = whisper.decode(model, torch.from_numpy(mel).to(model.device), options)
+    return [(r.text, list(r.tokens), r.avg_logprob, r.no_speech_prob) for r in results]
+
+
+def _batch_backend(model):
+    """(filtros mel, decodificador por lotes) del modelo; None si no admite lotes"""
+    if isinstance(model, FasterWhisperModel):
+        return model.mel_filters, model.decode_batch
+    if hasattr(model, 'dims') and hasattr(model, 'decode'):
+        return _openai_mel_filters, _openai_decode_batch
+    return None
+
+
+def _batch_result(audio, text, tokens, avg_logprob, no_speech_prob, language):
+    """Resultado con la forma de whisper.transcribe para un segmento decodificado en lote"""
+    ratio = compression_ratio(text)
+    segment = {'id': 0, 'seek': 0, 'start': 0.0, 'end': len(audio) / WHISPER_SAMPLE_RATE, 'text': text,
+               'tokens': tokens, 'temperature': 0.0, 'avg_logprob': avg_logprob, 'compression_ratio': ratio,
+               'no_speech_prob': no_speech_prob}
+    silent = no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOGPROB_THRESHOLD
+    return {'text': "" if silent else text, 'segments': [] if silent else [segment], 'language': language}
+
+
+def _batchable(audio, options):
+    # Una sola ventana, idioma fijo y nada que solo haga transcribe()
+    return len(audio) <= WINDOW_SAMPLES and options.get('language') and \
+        not any(options.get(name) for name in _UNBATCHABLE_OPTIONS)
+
+
+def _needs_fallback(result):
+    # Como whisper.transcribe: repetición o baja confianza sin ser silencio → otra pasada con temperatura
+    segment = (result['segments'] or [None])[0]
+    return segment is not None and (segment['compression_ratio'] > COMPRESSION_RATIO_THRESHOLD or
+                                    segment['avg_logprob'] < LOGPROB_THRESHOLD)
+
+
+def _window_mel(audios, mels, filters):
+    """Log-mel (lote, n_mels, 3000): el ya calculado (features.py) solo se rellena, el resto se calcula"""
+    n_mels = filters.shape[0]
+    usable = [mel is not None and mel.shape[0] == n_mels for mel in mels]
+    batch = np.empty((len(audios), n_mels, WINDOW_FRAMES), dtype=np.float32)
+    missing = [row for row, ok in enumerate(usable) if not ok]
+    if missing:
+        batch[missing] = log_mel_batch([audios[row] for row in missing], filters)
+    for row, mel, ok in zip(batch, mels, usable):
+        if ok:
+            frames = min(mel.shape[1], WINDOW_FRAMES)
+            row[:, :frames] = mel[:, :frames]
+            row[:, frames:] = mel.max() - 2.0  # El relleno de ceros de Whisper, ya normalizado (máximo - 8 dB)
+    return batch
+
+
+def transcribe_batch(model, items):
+    """Transcribir varios segmentos con el mismo modelo; items: [(audio, etiqueta, opciones)]
+
+    Con WHISPER_CONFIG['batch_decoding'] los segmentos de hasta 30 s con las
+    mismas opciones de decodificación (idioma, tarea, prompt) se decodifican
+    juntos: log-mel de todos en una pasada, codificador y decodificador
+    voraz con el lote entero; si las opciones traen mel (log-mel ya calculado
+    de la ventana) no se rehace la STFT. Un segmento solo en su grupo, lo que
+    necesita transcribe() (timestamps por palabra, segmentos largos) y lo que
+    no supera los umbrales de confianza se decodifica aparte con
+    model.transcribe, sin el mel. Devuelve un resultado por segmento, en orden.
+    """
+    results = [None] * len(items)
+    groups = {}
+    backend = _batch_backend(model) if config.WHISPER_CONFIG['batch_decoding'] else None
+    for index, (audio, tag, options) in enumerate(items):
+        audio = prepare_audio(audio)
+        options = dict(options)
+        mel = options.pop('mel', None)
+        if config.DEBUG_CONFIG['dump_audio']:
+            print(f"💾 Audio de depuración guardado: {dump_debug_audio(audio, tag)}")
+        if backend is None or not _batchable(audio, options):
+            results[index] = model.transcribe(audio, **options)
+            continue
+        key = (options.get('language'), options.get('task', 'transcribe'), options.get('initial_prompt'))
+        groups.setdefault(key, []).append((index, audio, options, mel))
+
+    for (language, task, prompt), group in groups.items():
+        if len(group) == 1:
+            index, audio, options, _ = group[0]
+            results[index] = model.transcribe(audio, **options)
+            continue
+        mel_filters, decode_batch = backend
+        mel = _window_mel([audio for _, audio, _, _ in group], [mel for _, _, _, mel in group], mel_filters(model))
+        try:
+            decoded = decode_batch(model, mel, language, task, prompt)
+        except Exception as e:
+            print(f"⚠️ Decodificación por lotes fallida ({type(e).__name__}: {e}): segmento a segmento")
+            decoded = [None] * len(group)
+        for (index, audio, options, _), output in zip(group, decoded):
+            result = None if output is None else _batch_result(audio, *output, language)
+            if result is None or _needs_fallback(result):
+                result = model.transcribe(audio, **options)
+            results[index] = result
+    return results
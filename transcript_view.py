@@ -0,0 +1,233 @@
+"""
+Vista acotada de la transcripción para la GUI de Tk
+
+Con un root.after(0, ...) por segmento, cada uno cambiando el estado del
+ScrolledText, insertando y haciendo see(END), y con el widget creciendo sin
+límite, tras unas horas de sesión cada inserción se vuelve lenta y la
+memoria no para de subir. Aquí:
+
+- Los hilos del pipeline solo encolan (append, set_status, set_partial); un
+  único ciclo de Tk vuelca todo lo pendiente a ritmo fijo (refresh_fps) con
+  una sola inserción, y aplica solo el último estado y la última parcial
+- El widget muestra como mucho las últimas max_lines líneas; todas las
+  líneas quedan en TranscriptHistory, comprimidas por bloques
+- Al llegar arriba con el scroll se cargan páginas anteriores del
+  historial; mientras se lee hacia atrás no se salta al final, y al volver
+  abajo el widget se recorta otra vez
+"""
+
+import threading
+import zlib
+
+import tkinter as tk
+
+import config
+
+
+class TranscriptHistory:
+    """Todas las líneas de la sesión: bloques zlib de block_lines líneas más una cola sin comprimir"""
+
+    def __init__(self, block_lines=500):
+        self.block_lines = block_lines
+        self._blocks = []
+        self._tail = []
+
+    def __len__(self):
+        return len(self._blocks) * self.block_lines + len(self._tail)
+
+    def extend(self, lines):
+        self._tail.extend(lines)
+        while len(self._tail) >= self.block_lines:
+            block, self._tail = self._tail[:self.block_lines], self._tail[self.block_lines:]
+            self._blocks.append(zlib.compress("\n".join(block).encode('utf-8')))
+
+    def lines(self, start, end):
+        """Líneas [start, end) (se descomprimen solo los bloques que tocan)"""
+        start, end = max(start, 0), min(end, len(self))
+        result = []
+        index = start
+        while index < end:
+            block_index, offset = divmod(index, self.block_lines)
+            if block_index < len(self._blocks):
+                block = zlib.decompress(self._blocks[block_index]).decode('utf-8').split("\n")
+            else:
+                block = self._tail
+            chunk = block[offset:offset + end - index]
+            result.extend(chunk)
+            index += len(chunk)
+        return result
+
+    def clear(self):
+        self._blocks = []
+        self._tail = []
+
+
+class TranscriptView:
+    """Buffer entre los hilos del pipeline y un ScrolledText de solo lectura
+
+    El widget muestra la ventana [first_line, end_line) del historial; si
+    end_line es el final del historial la vista sigue el texto nuevo.
+    """
+
+    def __init__(self, root, text_area, status_label=None, partial_label=None, max_lines=None,
+                 refresh_fps=None, page_lines=None):
+        opts = config.UI_CONFIG['transcript']
+        self.root = root
+        self.text_area = text_area
+        self.status_label = status_label
+        self.partial_label = partial_label
+        self.max_lines = max_lines or opts['max_lines']
+        self.max_window = 4 * self.max_lines  # Tope del widget mientras se lee hacia atrás
+        self.interval_ms = max(int(1000 / (refresh_fps or opts['refresh_fps'])), 1)
+        self.page_lines = page_lines or opts['history_page_lines']
+        self.history = TranscriptHistory()
+        self.first_line = 0
+        self.end_line = 0
+        self._pending = []           # Textos aún no volcados (terminan en \n)
+        self._callbacks = []         # Funciones a llamar una vez mostrado su texto
+        self._status = None
+        self._partial = None
+        self._lock = threading.Lock()
+        self._paging = False
+        self._running = False
+        self._scrollbar_set = text_area.vbar.set if hasattr(text_area, 'vbar') else None
+        text_area.configure(yscrollcommand=self._on_scroll)
+
+    # --- Desde cualquier hilo ---
+
+    def append(self, text, on_shown=None):
+        """Encolar texto (una o varias líneas); on_shown() se llama en Tk al mostrarlo"""
+        if not text.endswith("\n"):
+            text += "\n"
+        with self._lock:
+            self._pending.append(text)
+            if on_shown is not None:
+                self._callbacks.append(on_shown)
+
+    def set_status(self, text, **options):
+        """Último estado para la barra (solo se pinta el más reciente de cada ciclo)"""
+        with self._lock:
+            self._status = (text, options)
+
+    def set_partial(self, text):
+        with self._lock:
+            self._partial = text
+
+    # --- En el hilo de Tk ---
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        try:
+            self.flush()
+        except tk.TclError:
+            # La ventana se cerró
+            self._running = False
+            return
+        except Exception as e:
+            print(f"Error actualizando la transcripción: {e}")
+        self.root.after(self.interval_ms, self._tick)
+
+    def flush(self):
+        """Volcar todo lo pendiente en una sola inserción y recortar el widget"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            callbacks, self._callbacks = self._callbacks, []
+            status, self._status = self._status, None
+            partial, self._partial = self._partial, None
+
+        if pending:
+            text = "".join(pending)
+            showing_tail = self.end_line == len(self.history)
+            self.history.extend(text[:-1].split("\n"))
+            if showing_tail:
+                following = self._at_bottom()
+                self._edit(self.text_area.insert, tk.END, text)
+                self.end_line = len(self.history)
+                # Con la vista más arriba se deja crecer hasta max_window para no moverla
+                self._trim_top(self.max_lines if following else self.max_window)
+                if following:
+                    self.text_area.see(tk.END)
+        if status is not None and self.status_label is not None:
+            self.status_label.config(text=status[0], **status[1])
+        if partial is not None and self.partial_label is not None:
+            self.partial_label.config(text=partial)
+        for callback in callbacks:
+            callback()
+
+    def _edit(self, method, *args):
+        self.text_area.config(state=tk.NORMAL)
+        method(*args)
+        self.text_area.config(state=tk.DISABLED)
+
+    def _at_bottom(self):
+        return self.text_area.yview()[1] >= 0.999
+
+    def _trim_top(self, limit):
+        excess = self.end_line - self.first_line - limit
+        if excess > 0:
+            self._edit(self.text_area.delete, "1.0", f"{excess + 1}.0")
+            self.first_line += excess
+        return max(excess, 0)
+
+    def _trim_bottom(self, limit):
+        excess = self.end_line - self.first_line - limit
+        if excess > 0:
+            self._edit(self.text_area.delete, f"{limit + 1}.0", "end-1c")
+            self.end_line -= excess
+
+    def _on_scroll(self, first, last):
+        if self._scrollbar_set is not None:
+            self._scrollbar_set(first, last)
+        if self._paging:
+            return
+        first, last = float(first), float(last)
+        if first <= 0.0 and self.first_line > 0:
+            # Arriba del todo con líneas ocultas: página anterior, fuera del callback
+            self._paging = True
+            self.root.after_idle(self._load_older)
+        elif last >= 0.999:
+            self._paging = True
+            self.root.after_idle(self._load_newer)
+
+    def _load_older(self):
+        try:
+            start = max(self.first_line - self.page_lines, 0)
+            lines = self.history.lines(start, self.first_line)
+            if not lines:
+                return
+            self._edit(self.text_area.insert, "1.0", "\n".join(lines) + "\n")
+            self.first_line = start
+            self._trim_bottom(self.max_window)
+            # Mantener a la vista la línea que se estaba leyendo
+            self.text_area.yview_moveto(len(lines) / (self.end_line - self.first_line))
+        finally:
+            self._paging = False
+
+    def _load_newer(self):
+        """Al llegar abajo: siguiente página del historial o, en el final, volver al tamaño normal"""
+        try:
+            if self.end_line == len(self.history):
+                if self.end_line - self.first_line > self.max_lines and self._at_bottom():
+                    self._trim_top(self.max_lines)
+                    self.text_area.see(tk.END)
+                return
+            top, bottom = self.text_area.yview()
+            shown = self.end_line - self.first_line
+            lines = self.history.lines(self.end_line, self.end_line + self.page_lines)
+            self._edit(self.text_area.insert, tk.END, "\n".join(lines) + "\n")
+            self.end_line += len(lines)
+            removed = self._trim_top(self.max_window)
+            total = self.end_line - self.first_line
+            # La última línea que se veía queda abajo de la vista
+            self.text_area.yview_moveto(max((shown - removed) / total - (bottom - top) * shown / total, 0))
+        finally:
+            self._paging = False
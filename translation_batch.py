@@ -0,0 +1,152 @@
+"""
+Traducción por lotes: agrupa los segmentos pendientes en una sola petición
+
+Bajo carga, cada segmento pagaba su propia latencia HTTP. El traductor por
+lotes vacía la cola de traducción dentro de un plazo corto (max_wait_ms), une
+los textos con saltos de línea en una sola petición y reparte el resultado
+línea a línea. Si la respuesta no trae el mismo número de líneas, el lote se
+parte en dos hasta llegar a peticiones individuales.
+"""
+
+import queue
+import time
+
+import config
+
+SEPARATOR = "\n"
+
+
+def drain_batch(source_queue, max_batch, max_wait, timeout=0.5):
+    """Esperar un elemento y juntar los que lleguen dentro de `max_wait` segundos"""
+    try:
+        first = source_queue.get(timeout=timeout)
+    except queue.Empty:
+        return []
+    batch = [first]
+    if first is None:
+        return batch
+    deadline = time.monotonic() + max_wait
+    while len(batch) < max_batch:
+        remaining = deadline - time.monotonic()
+        try:
+            item = source_queue.get(timeout=remaining) if remaining > 0 else source_queue.get_nowait()
+        except queue.Empty:
+            break
+        batch.append(item)
+        if item is None:
+            break
+    return batch
+
+
+class BatchingTranslator:
+    """Traduce listas de textos con el menor número de peticiones posible"""
+
+    def __init__(self, translator, max_batch_size=None, max_wait_ms=None, max_chars=None):
+        opts = config.TRANSLATION_CONFIG['batch']
+        self.translator = translator
+        self.max_batch_size = max_batch_size or opts['max_batch_size']
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else opts['max_wait_ms']) / 1000
+        self.max_chars = max_chars or opts['max_chars']
+        self.requests = 0
+        self.batches = 0
+        self.split_fallbacks = 0
+
+    def drain(self, source_queue, timeout=0.5):
+        """Juntar un lote de la cola según la configuración"""
+        return drain_batch(source_queue, self.max_batch_size, self.max_wait, timeout)
+
+    def translate(self, text):
+        return self.translate_many([text])[0]
+
+    def translate_many(self, texts):
+        """Traducir una lista de textos; devuelve las traducciones en el mismo orden"""
+        results = [None] * len(texts)
+        cleaned = [" ".join(text.split()) for text in texts]
+
+        # Lo que ya está en caché no viaja
+        lookup = getattr(self.translator, 'lookup', None)
+        pending = []
+        for i, text in enumerate(cleaned):
+            if not text:
+                results[i] = ""
+                continue
+            cached = lookup(text) if lookup else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if pending:
+            self.batches += 1
+            if lookup is not None:
+                self.translator.record_misses(len(pending))
+        for chunk in self._chunks(pending, cleaned):
+            for i, translation in zip(chunk, self._translate_chunk([cleaned[i] for i in chunk])):
+                results[i] = translation
+        return results
+
+    def _chunks(self, indices, texts):
+        """Partir en grupos que respeten max_batch_size y max_chars"""
+        chunk, size = [], 0
+        for i in indices:
+            length = len(texts[i]) + len(SEPARATOR)
+            if chunk and (len(chunk) >= self.max_batch_size or size + length > self.max_chars):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(i)
+            size += length
+        if chunk:
+            yield chunk
+
+    def _translate_chunk(self, texts):
+        translate_batch = getattr(self.translator, 'translate_native_batch', None)
+        if translate_batch is not None:
+            # Backends locales con inferencia por lotes real
+            self.requests += 1
+            translations = translate_batch(texts)
+        elif len(texts) == 1:
+            self.requests += 1
+            translations = [self._raw_translate(texts[0])]
+        else:
+            self.requests += 1
+            joined = self._raw_translate(SEPARATOR.join(texts)) or ""
+            translations = [line.strip() for line in joined.split(SEPARATOR) if line.strip()]
+            if len(translations) != len(texts):
+                # El servicio unió o partió líneas: dividir el lote y reintentar
+                self.split_fallbacks += 1
+                half = len(texts) // 2
+                return self._translate_chunk(texts[:half]) + self._translate_chunk(texts[half:])
+
+        remember = getattr(self.translator, 'remember', None)
+        if remember is not None:
+            for text, translation in zip(texts, translations):
+                remember(text, translation)
+        return translations
+
+    def _raw_translate(self, text):
+        # Saltar la caché en la petición unida: se guarda segmento a segmento
+        inner = getattr(self.translator, 'translator', self.translator)
+        return inner.translate(text)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'split_fallbacks': self.split_fallbacks
+        }
+
+
+class LocalStubTranslator:
+    """Traductor local de prueba con latencia simulada (benchmarks sin red)"""
+
+    def __init__(self, rtt_ms=150.0, per_char_ms=0.02, prefix="[es] "):
+        self.rtt = rtt_ms / 1000
+        self.per_char = per_char_ms / 1000
+        self.prefix = prefix
+        self.calls = 0
+
+    def translate(self, text):
+        self.calls += 1
+        time.sleep(self.rtt + self.per_char * len(text))
+        # Respeta los saltos de línea como lo hace el servicio real
+        return SEPARATOR.join(self.prefix + line for line in text.split(SEPARATOR))
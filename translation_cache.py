@@ -0,0 +1,212 @@
+"""
+Caché de traducciones en dos niveles
+
+- Nivel 1: LRU en memoria con tamaño máximo y caducidad (TTL)
+- Nivel 2: SQLite en disco, sobrevive entre sesiones
+
+La clave es (idioma origen, idioma destino, texto normalizado). Muletillas,
+saludos y frases repetidas se traducen una sola vez en vez de pagar una ida
+y vuelta de red por cada segmento.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import config
+
+
+def normalize_text(text):
+    """Normalizar el texto para usarlo como clave (Unicode NFC y espacios colapsados)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class LRUCache:
+    """LRU en memoria con tamaño máximo y TTL, seguro entre hilos"""
+
+    def __init__(self, max_entries, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteTranslationStore:
+    """Almacén persistente de traducciones en SQLite"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (source, target, text)
+                )
+            """)
+            self._conn.commit()
+
+    def get(self, source, target, text):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation FROM translations WHERE source=? AND target=? AND text=?",
+                (source, target, text)).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, rows):
+        """Guardar [(source, target, text, translation), ...] en una sola transacción"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                [(s, t, text, tr, now) for s, t, text, tr in rows])
+            self._conn.commit()
+
+    def put(self, source, target, text, translation):
+        self.put_many([(source, target, text, translation)])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedTranslator:
+    """Envuelve un traductor (p. ej. GoogleTranslator) con la caché de dos niveles"""
+
+    def __init__(self, translator, source, target, cache_config=None):
+        opts = dict(config.TRANSLATION_CONFIG['cache'])
+        opts.update(cache_config or {})
+        self.translator = translator
+        self.source = source
+        self.target = target
+        self.memory = LRUCache(opts['max_entries'], opts['ttl_seconds'])
+        self.store = SQLiteTranslationStore(opts['db_path']) if opts['persistent'] else None
+        self.max_text_chars = opts['max_text_chars']
+        self.prewarm_files = opts['prewarm_files']
+        # Inferencia por lotes real del backend, si la tiene (BatchingTranslator la usa tal cual)
+        self.translate_native_batch = getattr(translator, 'translate_native_batch', None)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text):
+        return (self.source, self.target, normalize_text(text))
+
+    def lookup(self, text):
+        """Buscar en caché sin traducir; None si no está"""
+        key = self._key(text)
+        translation = self.memory.get(key)
+        if translation is not None:
+            self.memory_hits += 1
+            return translation
+        if self.store is not None:
+            translation = self.store.get(*key)
+            if translation is not None:
+                self.disk_hits += 1
+                self.memory.put(key, translation)
+                return translation
+        return None
+
+    def remember(self, text, translation):
+        """Guardar una traducción obtenida por otra vía"""
+        key = self._key(text)
+        if not key[2] or translation is None or len(key[2]) > self.max_text_chars:
+            return
+        self.memory.put(key, translation)
+        if self.store is not None:
+            self.store.put(*key, translation)
+
+    def translate(self, text):
+        """Traducir usando la caché; misma interfaz que GoogleTranslator.translate"""
+        translation = self.lookup(text)
+        if translation is not None:
+            return translation
+        self.misses += 1
+        translation = self.translator.translate(text)
+        self.remember(text, translation)
+        return translation
+
+    def record_misses(self, count):
+        """Contar fallos de textos que se tradujeron fuera de translate() (lotes de BatchingTranslator)"""
+        self.misses += count
+
+    def prewarm(self, pairs):
+        """Cargar pares (texto, traducción) conocidos, p. ej. de sesiones anteriores"""
+        rows = []
+        for text, translation in pairs:
+            key = self._key(text)
+            if not key[2] or not translation or len(key[2]) > self.max_text_chars:
+                continue
+            self.memory.put(key, translation)
+            rows.append((*key, translation))
+        if self.store is not None and rows:
+            self.store.put_many(rows)
+        return len(rows)
+
+    def prewarm_from_jsonl(self, path, text_key='text', translation_key='translation'):
+        """Pre-cargar desde una transcripción previa en JSONL (una línea por segmento)"""
+        pairs = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get(text_key) and record.get(translation_key):
+                    pairs.append((record[text_key], record[translation_key]))
+        return self.prewarm(pairs)
+
+    def prewarm_configured(self):
+        """Pre-cargar los archivos de TRANSLATION_CONFIG['cache']['prewarm_files'] que existan"""
+        loaded = 0
+        for path in self.prewarm_files:
+            if os.path.exists(path):
+                loaded += self.prewarm_from_jsonl(path)
+        return loaded
+
+    def stats(self):
+        """Contadores de aciertos y fallos"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hit_rate = (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hit_rate,
+            'memory_entries': len(self.memory)
+        }
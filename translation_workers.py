@@ -0,0 +1,229 @@
+"""
+Traducción concurrente con reordenamiento por número de secuencia
+
+Un hilo despachador vacía la cola de traducción en lotes y los reparte entre
+varios workers; así una petición lenta o colgada a Google no frena a las
+demás. Cada segmento recibe un número de secuencia creciente y el buffer de
+reordenamiento entrega los resultados a la UI estrictamente en orden. Si un
+segmento supera su plazo (timeout_seconds) se entrega como omitido para no
+bloquear a los siguientes.
+
+Los workers son un conjunto fijo de hilos (TRANSLATION_CONFIG['workers']['count']).
+deep_translator no admite timeout en la petición HTTP: un worker colgado se
+abandona al vencer su plazo y su lugar lo ocupa uno nuevo, con como mucho
+tantos hilos abandonados a la vez como workers; por encima el lote sigue
+ocupando su lugar hasta que alguno vuelva.
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+import config
+import metrics
+
+
+class ReorderBuffer:
+    """Libera resultados en orden de secuencia; salta los que vencen su plazo"""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self.next_seq = 0
+        self._results = {}
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        # Una sola entrega a la vez: dos hilos no pueden intercalar resultados
+        self._release_lock = threading.Lock()
+        self.skipped = 0
+
+    def expect(self, seq, deadline):
+        """Registrar un segmento enviado y su plazo (time.monotonic)"""
+        with self._lock:
+            self._deadlines[seq] = deadline
+
+    def put(self, seq, result):
+        """Guardar el resultado de un segmento (ignorado si ya se omitió)"""
+        with self._lock:
+            if seq < self.next_seq:
+                return
+            self._results[seq] = result
+        self.release()
+
+    def release(self):
+        """Entregar todos los resultados consecutivos disponibles"""
+        with self._release_lock:
+            ready = []
+            with self._lock:
+                now = time.monotonic()
+                while True:
+                    if self.next_seq in self._results:
+                        ready.append((self.next_seq, self._results.pop(self.next_seq), False))
+                    elif self.next_seq in self._deadlines and now > self._deadlines[self.next_seq]:
+                        # Plazo vencido: no esperar más a este segmento
+                        self.skipped += 1
+                        ready.append((self.next_seq, None, True))
+                    else:
+                        break
+                    self._deadlines.pop(self.next_seq, None)
+                    self.next_seq += 1
+            for seq, result, skipped in ready:
+                self.deliver(seq, result, skipped)
+
+    def pending(self):
+        with self._lock:
+            return len(self._deadlines)
+
+
+class OrderedTranslationPool:
+    """Traduce los elementos de una cola con varios workers y entrega en orden"""
+
+    def __init__(self, batch_translator, source_queue, on_result, stop_event,
+                 text_of=None, workers=None, timeout_seconds=None):
+        opts = config.TRANSLATION_CONFIG['workers']
+        self.batch_translator = batch_translator
+        self.source_queue = source_queue
+        self.on_result = on_result
+        self.stop_event = stop_event
+        self.text_of = text_of or (lambda item: item)
+        self.workers = workers or opts['count']
+        self.timeout = timeout_seconds if timeout_seconds is not None else opts['timeout_seconds']
+        self.reorder = ReorderBuffer(self._deliver)
+        self._slots = threading.Semaphore(self.workers)
+        self._next_seq = 0
+        self._items = {}
+        self._batch_ids = itertools.count()
+        self._in_flight = {}  # batch_id -> plazo; fuera del dict = su lugar ya se liberó
+        self._jobs = queue.SimpleQueue()
+        self._threads = {}    # hilo worker -> batch_id en curso (None si está libre)
+        self._retired = set()  # Hilos abandonados con un lote colgado: terminan al volver
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self.failed = 0
+        self.abandoned = 0
+
+    def start(self):
+        for _ in range(self.workers):
+            self._spawn_worker()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def _spawn_worker(self):
+        thread = threading.Thread(target=self._worker_loop, daemon=True)
+        with self._lock:
+            self._threads[thread] = None
+        thread.start()
+
+    def join(self, timeout=None):
+        """Esperar al despachador (tras activar stop_event); los workers colgados no bloquean"""
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+
+    def _free_slot(self, batch_id):
+        """Liberar el lugar de un lote una sola vez (al terminar o al abandonarlo)"""
+        with self._lock:
+            if self._in_flight.pop(batch_id, None) is None:
+                return
+        self._slots.release()
+
+    def _abandon_overdue(self):
+        """Sustituir a los workers cuyo lote venció su plazo (sin pasar del límite de abandonados)"""
+        now = time.monotonic()
+        replaced = []
+        with self._lock:
+            overdue = {b for b, deadline in self._in_flight.items() if now > deadline}
+            for thread, batch_id in list(self._threads.items()):
+                if batch_id in overdue and len(self._retired) < self.workers:
+                    del self._threads[thread]
+                    self._retired.add(thread)
+                    self.abandoned += 1
+                    replaced.append(batch_id)
+        for batch_id in replaced:
+            self._spawn_worker()
+            self._free_slot(batch_id)
+
+    def _dispatch_loop(self):
+        while not self.stop_event.is_set():
+            # Vencer plazos aunque no lleguen resultados nuevos
+            self._abandon_overdue()
+            self.reorder.release()
+
+            # No sacar más de la cola que los workers libres (la cola sigue acotando)
+            if not self._slots.acquire(timeout=0.1):
+                continue
+            batch = self.batch_translator.drain(self.source_queue, timeout=0.1)
+            batch = [item for item in batch if item is not None]
+            if not batch:
+                self._slots.release()
+                continue
+
+            deadline = time.monotonic() + self.timeout
+            seqs = []
+            for item in batch:
+                seq = self._next_seq
+                self._next_seq += 1
+                self._items[seq] = item
+                self.reorder.expect(seq, deadline)
+                seqs.append(seq)
+            batch_id = next(self._batch_ids)
+            with self._lock:
+                self._in_flight[batch_id] = deadline
+            self._jobs.put((batch_id, seqs, batch))
+
+        # Los workers libres terminan; los ocupados, al acabar su lote
+        with self._lock:
+            workers = len(self._threads)
+        for _ in range(workers):
+            self._jobs.put(None)
+
+    def _worker_loop(self):
+        thread = threading.current_thread()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            batch_id, seqs, batch = job
+            with self._lock:
+                if thread in self._threads:
+                    self._threads[thread] = batch_id
+            self._work(batch_id, seqs, batch)
+            with self._lock:
+                if thread in self._retired:
+                    # Ya lo sustituyó otro: el lote llegó tarde
+                    self._retired.discard(thread)
+                    return
+                self._threads[thread] = None
+
+    def _work(self, batch_id, seqs, batch):
+        metrics.mark(batch, 'translate_start')
+        try:
+            translations = self.batch_translator.translate_many([self.text_of(item) for item in batch])
+        except Exception as e:
+            print(f"Error en worker de traducción: {e}")
+            with self._lock:
+                self.failed += len(batch)
+            translations = [None] * len(batch)
+        finally:
+            self._free_slot(batch_id)
+        metrics.mark(batch, 'translate_end')
+        for seq, translation in zip(seqs, translations):
+            self.reorder.put(seq, translation)
+
+    def _deliver(self, seq, translation, skipped):
+        item = self._items.pop(seq, None)
+        try:
+            self.on_result(seq, item, translation, skipped)
+        except Exception as e:
+            print(f"Error entregando traducción #{seq}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'submitted': self._next_seq,
+                'delivered': self.reorder.next_seq,
+                'skipped': self.reorder.skipped,
+                'abandoned_batches': self.abandoned,
+                'hung_workers': len(self._retired),
+                'failed': self.failed
+            }
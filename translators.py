@@ -0,0 +1,193 @@
+"""
+Backends de traducción intercambiables (TRANSLATION_CONFIG['service'])
+
+- 'google':      deep_translator.GoogleTranslator (red)
+- 'ctranslate2': modelo MarianMT en→es convertido a CTranslate2, CPU, int8
+- 'marian':      MarianMT con transformers/PyTorch, CPU
+- 'stub':        traductor local de prueba con latencia simulada
+
+Todos exponen translate(text); los locales también translate_native_batch(texts),
+que BatchingTranslator usa para inferencia por lotes real. Cada backend mide
+su latencia y rendimiento (stats()).
+"""
+
+import contextlib
+import threading
+import time
+
+import config
+import metrics
+
+
+class TranslatorBackend:
+    """Interfaz común: translate(text) y métricas de latencia/rendimiento"""
+
+    name = "base"
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+
+    def translate(self, text):
+        return self._timed([text], lambda texts: [self._translate_one(texts[0])])[0]
+
+    def _translate_one(self, text):
+        raise NotImplementedError
+
+    def _timed(self, texts, fn):
+        start = time.perf_counter()
+        result = fn(texts)
+        elapsed = time.perf_counter() - start
+        metrics.observe('translation_rtt_seconds', elapsed, backend=self.name)
+        with self._stats_lock:
+            self.calls += 1
+            self.items += len(texts)
+            self.busy_seconds += elapsed
+        return result
+
+    def stats(self):
+        """Latencia media por petición y segmentos por segundo de trabajo"""
+        with self._stats_lock:
+            return {
+                'backend': self.name,
+                'calls': self.calls,
+                'items': self.items,
+                'avg_latency_ms': 1000 * self.busy_seconds / self.calls if self.calls else 0.0,
+                'items_per_second': self.items / self.busy_seconds if self.busy_seconds else 0.0
+            }
+
+
+class GoogleBackend(TranslatorBackend):
+    """Google Translate vía deep_translator (requiere red)"""
+
+    name = "google"
+
+    def __init__(self, source, target, **_):
+        super().__init__()
+        from deep_translator import GoogleTranslator
+
+        self._translator = GoogleTranslator(source=source, target=target)
+
+    def _translate_one(self, text):
+        return self._translator.translate(text)
+
+
+class LocalBatchBackend(TranslatorBackend):
+    """Base de los backends locales: traducen por lotes de batch_size"""
+
+    # Si el modelo no admite llamadas concurrentes, los workers se turnan
+    thread_safe = False
+
+    def __init__(self, batch_size):
+        super().__init__()
+        self.batch_size = batch_size
+        self._model_lock = contextlib.nullcontext() if self.thread_safe else threading.Lock()
+
+    def _translate_one(self, text):
+        return self._translate_batch([text])[0]
+
+    def translate_native_batch(self, texts):
+        """Traducir una lista de textos con inferencia por lotes"""
+        results = []
+        for i in range(0, len(texts), self.batch_size):
+            chunk = texts[i:i + self.batch_size]
+            with self._model_lock:
+                results.extend(self._timed(chunk, self._translate_batch))
+        return results
+
+    def _translate_batch(self, texts):
+        raise NotImplementedError
+
+
+class CTranslate2Backend(LocalBatchBackend):
+    """MarianMT convertido a CTranslate2 (ct2-transformers-converter --quantization int8)"""
+
+    name = "ctranslate2"
+    thread_safe = True  # inter_threads reparte los lotes concurrentes
+
+    def __init__(self, source, target, model_path, tokenizer, batch_size=16, beam_size=2,
+                 inter_threads=1, intra_threads=4, compute_type="int8", **_):
+        super().__init__(batch_size)
+        try:
+            import ctranslate2
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError("El backend 'ctranslate2' requiere: pip install ctranslate2 transformers sentencepiece") from e
+
+        print(f"🚀 Cargando traductor local CTranslate2 ({model_path}, {compute_type})...")
+        self._translator = ctranslate2.Translator(model_path, device="cpu", compute_type=compute_type,
+                                                  inter_threads=inter_threads, intra_threads=intra_threads)
+        self._tokenizer = AutoTokenizer.from_pretrained(tokenizer)
+        self.beam_size = beam_size
+
+    def _translate_batch(self, texts):
+        tokens = [self._tokenizer.convert_ids_to_tokens(self._tokenizer.encode(text)) for text in texts]
+        results = self._translator.translate_batch(tokens, beam_size=self.beam_size,
+                                                   max_batch_size=self.batch_size)
+        return [self._tokenizer.decode(self._tokenizer.convert_tokens_to_ids(r.hypotheses[0]),
+                                       skip_special_tokens=True) for r in results]
+
+
+class MarianBackend(LocalBatchBackend):
+    """MarianMT con transformers/PyTorch en CPU"""
+
+    name = "marian"
+
+    def __init__(self, source, target, tokenizer, batch_size=16, beam_size=2, intra_threads=4, **_):
+        super().__init__(batch_size)
+        try:
+            import torch
+            from transformers import MarianMTModel, MarianTokenizer
+        except ImportError as e:
+            raise ImportError("El backend 'marian' requiere: pip install transformers sentencepiece torch") from e
+
+        print(f"🚀 Cargando traductor local MarianMT ({tokenizer})...")
+        torch.set_num_threads(intra_threads)
+        self._torch = torch
+        self._tokenizer = MarianTokenizer.from_pretrained(tokenizer)
+        self._model = MarianMTModel.from_pretrained(tokenizer).eval()
+        self.beam_size = beam_size
+
+    def _translate_batch(self, texts):
+        batch = self._tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+        with self._torch.inference_mode():
+            generated = self._model.generate(**batch, num_beams=self.beam_size)
+        return self._tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+
+class StubBackend(LocalBatchBackend):
+    """Traductor de prueba sin red (benchmarks offline)"""
+
+    name = "stub"
+    thread_safe = True
+
+    def __init__(self, source, target, batch_size=16, rtt_ms=150.0, **_):
+        super().__init__(batch_size)
+        from translation_batch import LocalStubTranslator
+
+        self._stub = LocalStubTranslator(rtt_ms=rtt_ms, prefix=f"[{target}] ")
+
+    def _translate_batch(self, texts):
+        # Una "petición" por lote, como haría un servicio con API por lotes
+        return self._stub.translate("\n".join(texts)).split("\n")
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'ctranslate2': CTranslate2Backend,
+    'marian': MarianBackend,
+    'stub': StubBackend,
+}
+
+
+def create_translator(service=None, source=None, target=None):
+    """Crear el backend configurado en TRANSLATION_CONFIG"""
+    service = service or config.TRANSLATION_CONFIG['service']
+    source = source or config.TRANSLATION_CONFIG['source_language']
+    target = target or config.TRANSLATION_CONFIG['target_language']
+    if service not in BACKENDS:
+        raise ValueError(f"Servicio de traducción desconocido: '{service}' (disponibles: {', '.join(BACKENDS)})")
+    options = dict(config.TRANSLATION_CONFIG['local'])
+    return BACKENDS[service](source, target, **options)
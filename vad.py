@@ -0,0 +1,168 @@
+"""
+Detección de voz (VAD) y segmentación por enunciados
+
+Las características se calculan de forma vectorizada sobre todas las tramas
+nuevas del buffer circular: energía (dBFS), tasa de cruces por cero y planitud
+espectral. Una máquina de estados con hangover y longitudes mínima/máxima
+convierte la decisión por trama en segmentos alineados con las pausas
+naturales; el audio sin voz nunca llega a Whisper.
+"""
+
+import numpy as np
+
+import config
+from ring_buffer import BufferOverrun
+
+
+def frame_features(frames):
+    """Energía (dBFS), cruces por cero y planitud espectral para cada trama (n, frame_len)"""
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frames.shape[1]
+
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 + 1e-12
+    # Planitud = media geométrica / media aritmética (≈0 tonal/voz, →1 ruido blanco)
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return energy_db, zcr, flatness
+
+
+class VoiceSegmenter:
+    """Corta el audio del buffer circular en segmentos de voz"""
+
+    def __init__(self, ring, sample_rate=config.SAMPLE_RATE, max_segment_seconds=None, **overrides):
+        opts = dict(config.VAD_CONFIG)
+        opts.update(overrides)
+        if max_segment_seconds is not None:
+            opts['max_segment_seconds'] = max_segment_seconds
+
+        self.ring = ring
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * opts['frame_ms'] / 1000)
+        self.energy_margin_db = opts['energy_margin_db']
+        self.min_energy_db = opts['min_energy_db']
+        self.zcr_max = opts['zcr_max']
+        self.flatness_max = opts['flatness_max']
+        self.hangover_frames = max(1, int(opts['hangover_ms'] / opts['frame_ms']))
+        self.min_speech_frames = max(1, int(opts['min_speech_ms'] / opts['frame_ms']))
+        self.pre_roll = int(sample_rate * opts['pre_roll_ms'] / 1000)
+        self.min_segment = int(sample_rate * opts['min_segment_seconds'])
+        self.max_segment = int(sample_rate * opts['max_segment_seconds'])
+        self.noise_adapt = opts['noise_adapt']
+        self.reset()
+
+    def reset(self, start_pos=None):
+        """Reiniciar el estado (nuevo stream)"""
+        self.cursor = self.ring.write_pos if start_pos is None else start_pos
+        self.noise_floor_db = self.min_energy_db - self.energy_margin_db
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.segment_start = 0
+        self.last_speech_end = 0
+        # Estadísticas: cuánto audio se descarta por no tener voz
+        self.total_samples = 0
+        self.speech_samples = 0
+        self.segments_emitted = 0
+        self.segments_discarded = 0
+
+    def speech_mask(self, frames):
+        """Decisión voz/no-voz por trama (actualiza el piso de ruido adaptativo)"""
+        energy_db, zcr, flatness = frame_features(frames)
+        threshold = max(self.noise_floor_db + self.energy_margin_db, self.min_energy_db)
+        mask = (energy_db > threshold) & (zcr < self.zcr_max) & (flatness < self.flatness_max)
+
+        # Adaptar el piso de ruido con las tramas sin voz (baja rápido, sube despacio)
+        noise = energy_db[~mask]
+        if len(noise):
+            self.noise_floor_db = min(self.noise_floor_db, float(noise.min()))
+            weight = 1 - (1 - self.noise_adapt) ** len(noise)
+            self.noise_floor_db += weight * (float(noise.mean()) - self.noise_floor_db)
+        return mask
+
+    def process(self):
+        """Analizar las tramas nuevas; devuelve [(start, end, forced), ...] en posiciones del buffer"""
+        write_pos = self.ring.write_pos
+        if self.cursor < self.ring.oldest_pos:
+            # Nos quedamos atrás: el audio sin analizar ya se perdió
+            self.cursor = self.ring.oldest_pos
+            self.in_speech = False
+            self.speech_run = 0
+        n_frames = (write_pos - self.cursor) // self.frame_len
+        if n_frames <= 0:
+            return []
+
+        end = self.cursor + n_frames * self.frame_len
+        try:
+            audio = self.ring.read(self.cursor, end)
+        except BufferOverrun:
+            self.cursor = self.ring.oldest_pos
+            return []
+        mask = self.speech_mask(audio.reshape(n_frames, self.frame_len))
+
+        segments = []
+        for i, speech in enumerate(mask):
+            frame_start = self.cursor + i * self.frame_len
+            frame_end = frame_start + self.frame_len
+            segments.extend(self._step(speech, frame_start, frame_end))
+
+        self.total_samples += end - self.cursor
+        self.cursor = end
+        return segments
+
+    def flush(self):
+        """Cerrar el segmento abierto (al detener); devuelve la lista de segmentos"""
+        if not self.in_speech:
+            return []
+        self.in_speech = False
+        return self._close(self.segment_start, self.last_speech_end, forced=False)
+
+    def _step(self, speech, frame_start, frame_end):
+        """Máquina de estados: una trama"""
+        if not self.in_speech:
+            if speech:
+                self.speech_run += 1
+                if self.speech_run >= self.min_speech_frames:
+                    # Abrir segmento incluyendo un poco de audio previo (ataque de la palabra)
+                    first = frame_end - self.speech_run * self.frame_len
+                    self.segment_start = max(self.ring.oldest_pos, first - self.pre_roll)
+                    self.in_speech = True
+                    self.silence_run = 0
+                    self.last_speech_end = frame_end
+            else:
+                self.speech_run = 0
+            return []
+
+        if speech:
+            self.silence_run = 0
+            self.last_speech_end = frame_end
+        else:
+            self.silence_run += 1
+            if self.silence_run >= self.hangover_frames:
+                # Pausa natural: cerrar en el final del hangover
+                self.in_speech = False
+                self.speech_run = 0
+                return self._close(self.segment_start, frame_end, forced=False)
+
+        if frame_end - self.segment_start >= self.max_segment:
+            # Enunciado demasiado largo: cortar y seguir en el mismo estado
+            start = self.segment_start
+            self.segment_start = frame_end
+            return self._close(start, frame_end, forced=True)
+        return []
+
+    def _close(self, start, end, forced):
+        if end - start < self.min_segment:
+            self.segments_discarded += 1
+            return []
+        self.speech_samples += end - start
+        self.segments_emitted += 1
+        return [(start, end, forced)]
+
+    def speech_ratio(self):
+        """Fracción del audio analizado que se envió a transcripción"""
+        if self.total_samples == 0:
+            return 0.0
+        return self.speech_samples / self.total_samples